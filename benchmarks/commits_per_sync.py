@@ -0,0 +1,118 @@
+"""Count SQLite commits for one sync that finds N new follows.
+
+    python benchmarks/commits_per_sync.py --new-follows 20
+
+"per-event" replays the old call pattern through the single-row methods (an insert and
+a notified update per follow, then the poll-success update); "batched" runs
+AlphaMonitorService.sync_target against the same data and then one outbox pass, so both
+modes include recording the delivery. The old mark_event_notified also committed
+last_alert_at separately, so the real pre-batching count was one more per follow.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from tw_alpha_scraper.models import (  # noqa: E402
+    AppConfig,
+    DiscordSettings,
+    FollowEvent,
+    MonitorSettings,
+    ResolvedUser,
+    StorageSettings,
+)
+from tw_alpha_scraper.service import AlphaMonitorService  # noqa: E402
+from tw_alpha_scraper.storage import AppDatabase, utcnow_iso  # noqa: E402
+
+
+class _Twitter:
+    def __init__(self, users: list[ResolvedUser]) -> None:
+        self.users = users
+
+    async def iter_following(self, user_id: str, limit: int | None = None):
+        for user in self.users[:limit]:
+            yield user
+
+    async def list_accounts(self):
+        return [{"username": "bench", "active": True}]
+
+
+class _Notifier:
+    async def send_follow_alerts(self, alerts, webhook_url=None) -> bool:
+        return True
+
+
+def _per_event(db: AppDatabase, users: list[ResolvedUser]) -> None:
+    for user in users:
+        event_id = db.record_follow_event(
+            FollowEvent(
+                target_user_id="1",
+                followed_user_id=user.id,
+                observed_at=utcnow_iso(),
+                followed_username=user.username,
+                followed_display_name=user.display_name,
+            )
+        )
+        if event_id:
+            db.mark_event_notified(event_id)
+    db.set_target_poll_success("1", users[0].id if users else None)
+
+
+async def _batched(db: AppDatabase, users: list[ResolvedUser], path: str) -> None:
+    config = AppConfig(
+        # Without a webhook URL nothing is queued, and the outbox pass would have nothing to commit.
+        discord=DiscordSettings(alert_webhook_url="https://discord.invalid/webhook"),
+        monitor=MonitorSettings(max_follow_scan=len(users) + 1, streaming_diff=False),
+        storage=StorageSettings(app_db_path=path),
+    )
+    service = AlphaMonitorService(config, db, twitter_client=_Twitter(users + [ResolvedUser(id="0")]), notifier=_Notifier(), logger=logging.getLogger("bench"))
+    await service.sync_target("1", send_alerts=True)
+    delivered = await service.outbox.deliver_pending()
+    assert delivered == len(users), f"expected {len(users)} deliveries, got {delivered}"
+
+
+def _prepare(path: str) -> AppDatabase:
+    db = AppDatabase(path)
+    db.initialize()
+    db.upsert_target("1", username="target")
+    db.set_target_last_seen("1", "0")
+    db.commit_count = 0
+    return db
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--new-follows", type=int, default=20)
+    args = parser.parse_args()
+    users = [ResolvedUser(id=str(1000 + index), username=f"user{index}") for index in range(args.new_follows)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = []
+        for mode in ("per-event", "batched"):
+            path = str(Path(tmp) / f"{mode}.db")
+            db = _prepare(path)
+            started = time.perf_counter()
+            if mode == "per-event":
+                _per_event(db, users)
+            else:
+                asyncio.run(_batched(db, users, path))
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            results.append((mode, db.commit_count, elapsed_ms))
+            db.close()
+
+    print(f"{'mode':<10} {'commits':>8} {'ms':>9}  ({args.new_follows} new follows, delivery included)")
+    for mode, commits, elapsed_ms in results:
+        print(f"{mode:<10} {commits:>8} {elapsed_ms:>9.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,98 @@
+"""Memory held by following scans for many targets, with and without the raw twscrape models.
+
+    python benchmarks/scan_memory.py --targets 1000 --follows 100
+
+Every target's scan is kept alive at once, as when many syncs are in flight. The stand-in
+twscrape user carries the nested fields a real ``twscrape.models.User`` parses out of the
+GraphQL payload, so "raw" approximates what the old ``_to_user`` retained and "lean" is what
+``TwitterClient`` keeps by default now.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from tw_alpha_scraper.twitter import TwitterClient  # noqa: E402
+
+
+@dataclass
+class _TwscrapeUser:
+    id: int
+    username: str
+    name: str
+    description: str
+    profile_image_url: str
+    url: str
+    created: str = "2020-01-01T00:00:00+00:00"
+    location: str = "Somewhere on the internet"
+    followersCount: int = 1234
+    friendsCount: int = 567
+    statusesCount: int = 8910
+    favouritesCount: int = 1112
+    listedCount: int = 13
+    mediaCount: int = 14
+    profileBannerUrl: str = "https://pbs.twimg.com/profile_banners/1/1600000000"
+    protected: bool = False
+    verified: bool = False
+    blue: bool = True
+    descriptionLinks: list[dict[str, str]] = field(default_factory=list)
+    pinnedIds: list[int] = field(default_factory=list)
+    _raw: dict[str, Any] = field(default_factory=dict)
+
+
+def _raw_user(index: int) -> _TwscrapeUser:
+    username = f"user{index}"
+    description = f"Building things #{index}. Opinions are my own. " * 3
+    return _TwscrapeUser(
+        id=10_000_000 + index,
+        username=username,
+        name=f"User {index}",
+        description=description,
+        profile_image_url=f"https://pbs.twimg.com/profile_images/{index}/photo_normal.jpg",
+        url=f"https://x.com/{username}",
+        descriptionLinks=[{"url": "https://t.co/abc", "text": "example.com", "tcourl": "https://t.co/abc"}],
+        pinnedIds=[1_700_000_000_000_000_000 + index],
+        _raw={
+            "__typename": "User",
+            "rest_id": str(10_000_000 + index),
+            "legacy": {"description": description, "screen_name": username, "entities": {"url": {"urls": []}}},
+            "professional": {"category": [{"id": 1, "name": "Technology"}]},
+        },
+    )
+
+
+def _measure(targets: int, follows: int, keep_raw: bool) -> int:
+    tracemalloc.start()
+    scans = []
+    for target in range(targets):
+        # twscrape builds fresh models per page; only what _to_user keeps should survive.
+        scans.append([TwitterClient._to_user(_raw_user(target * follows + index), keep_raw) for index in range(follows)])
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del scans
+    return current
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--targets", type=int, default=1000)
+    parser.add_argument("--follows", type=int, default=100)
+    args = parser.parse_args()
+
+    raw_bytes = _measure(args.targets, args.follows, keep_raw=True)
+    lean_bytes = _measure(args.targets, args.follows, keep_raw=False)
+    print(f"{'mode':<6} {'MiB':>9}  ({args.targets} targets x {args.follows} follows held at once)")
+    print(f"{'raw':<6} {raw_bytes / 2**20:>9.1f}")
+    print(f"{'lean':<6} {lean_bytes / 2**20:>9.1f}  ({1 - lean_bytes / raw_bytes:.0%} less)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
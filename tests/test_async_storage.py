@@ -0,0 +1,30 @@
+import sqlite3
+import threading
+
+import pytest
+
+from tw_alpha_scraper.async_storage import AsyncAppDatabase
+from tw_alpha_scraper.storage import AppDatabase
+
+
+@pytest.mark.asyncio
+async def test_writes_use_one_writer_thread_and_reads_see_them(tmp_path):
+    db = AppDatabase(str(tmp_path / "app.db"))
+    storage = AsyncAppDatabase(db, read_pool_size=2)
+    await storage.initialize()
+
+    await storage.upsert_target("1", username="alpha")
+    await storage.set_state("paused", True)
+    writer_threads = {await storage.write(lambda _: threading.current_thread().name) for _ in range(3)}
+    reader_thread = await storage.read(lambda _: threading.current_thread().name)
+
+    assert (await storage.get_target("@alpha")).user_id == "1"
+    assert await storage.is_paused() is True
+    assert len(writer_threads) == 1
+    assert reader_thread != threading.current_thread().name
+    assert reader_thread not in writer_threads
+
+    with pytest.raises(sqlite3.OperationalError):
+        await storage.read(lambda reader: reader.set_state("paused", False))
+    storage.close()
+    db.close()
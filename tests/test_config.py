@@ -40,3 +40,26 @@ def test_load_config_supports_env_overrides(tmp_path):
     assert config.storage.app_db_path == "data/from-env.db"
     assert config.targets[0].user_id == "123"
     assert config.targets[0].label == "alpha"
+
+
+def test_load_config_parses_webhook_routes(tmp_path):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(
+        json.dumps(
+            {
+                "targets": [{"user_id": "123", "label": "alpha"}],
+                "routes": [
+                    {"name": "main", "targets": ["123", "@beta"]},
+                    {"name": "archive", "webhook_url": "https://discord.test/archive", "labels": ["alpha"]},
+                    {"webhook_url": "https://discord.test/all"},
+                ],
+            }
+        )
+    )
+
+    config = load_config(str(config_path), str(tmp_path / "missing.env"))
+
+    assert [route.name for route in config.routes] == ["main", "archive", "route-3"]
+    assert config.routes[0].targets == ("123", "@beta")
+    assert config.routes[0].webhook_url is None
+    assert config.routes[1].labels == ("alpha",)
@@ -0,0 +1,39 @@
+import asyncio
+import logging
+import time
+
+import pytest
+
+from tw_alpha_scraper.loop_watchdog import LoopWatchdog
+from tw_alpha_scraper.metrics import MonitorMetrics
+
+
+def _block_the_loop(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+@pytest.mark.asyncio
+async def test_watchdog_records_stall_with_blocking_task_and_stack():
+    metrics = MonitorMetrics()
+    watchdog = LoopWatchdog(
+        logging.getLogger("test"), interval_seconds=0.01, stall_threshold_seconds=0.05, metrics=metrics
+    )
+    stop = asyncio.Event()
+    runner = asyncio.create_task(watchdog.run(stop))
+    await asyncio.sleep(0.05)
+
+    async def blocker() -> None:
+        _block_the_loop(0.2)
+
+    await asyncio.create_task(blocker(), name="blocker")
+    await asyncio.sleep(0.05)
+    stop.set()
+    await runner
+
+    snapshot = watchdog.snapshot()
+    assert snapshot["max_lag_ms"] >= 150
+    worst = snapshot["worst_stalls"][0]
+    assert worst["task"].startswith("blocker")
+    assert "_block_the_loop" in worst["stack"]
+    assert metrics.loop_stalls.value() == snapshot["stalls"] >= 1
+    assert metrics.loop_lag_seconds.count() == snapshot["samples"]
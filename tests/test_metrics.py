@@ -0,0 +1,87 @@
+import asyncio
+import logging
+
+import pytest
+
+from tw_alpha_scraper.metrics import MetricsRegistry, MetricsServer
+from tw_alpha_scraper.models import AppConfig, MonitorSettings, ResolvedUser, StorageSettings
+from tw_alpha_scraper.service import AlphaMonitorService
+from tw_alpha_scraper.storage import AppDatabase
+
+
+class FlakyTwitterClient:
+    def __init__(self, follows: list[ResolvedUser]):
+        self.follows = follows
+        self.failures = 1
+
+    async def iter_following(self, user_id: str, limit: int | None = None):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("temporary failure")
+        for user in self.follows:
+            yield user
+
+    async def list_accounts(self):
+        return [{"username": "worker-1", "active": True, "proxy": None}]
+
+
+async def http_get(port: int, path: str) -> tuple[str, str]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    response = (await reader.read()).decode()
+    writer.close()
+    head, _, body = response.partition("\r\n\r\n")
+    return head.splitlines()[0], body
+
+
+def test_histogram_renders_cumulative_buckets_with_escaped_labels():
+    registry = MetricsRegistry(prefix="")
+    histogram = registry.histogram("latency_seconds", "Latency.", labels=("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, 'fe"tch')
+    registry.counter("events_total", "Events.").inc(amount=2)
+
+    text = registry.render()
+
+    assert 'latency_seconds_bucket{stage="fe\\"tch",le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{stage="fe\\"tch",le="1"} 3' in text
+    assert 'latency_seconds_bucket{stage="fe\\"tch",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{stage="fe\\"tch"} 4' in text
+    assert "# TYPE events_total counter\nevents_total 2\n" in text
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_exposes_sync_retry_commit_and_worker_metrics(tmp_path):
+    db = AppDatabase(str(tmp_path / "app.db"))
+    config = AppConfig(
+        monitor=MonitorSettings(max_retry_attempts=2, retry_base_delay_seconds=0),
+        storage=StorageSettings(app_db_path=str(tmp_path / "app.db")),
+    )
+    twitter = FlakyTwitterClient([ResolvedUser(id="200", username="beta")])
+    service = AlphaMonitorService(config, db, twitter_client=twitter, logger=logging.getLogger("test"))
+    await service.initialize()
+    db.upsert_target("100", username="alpha", display_name="Alpha")
+    await service.sync_target("100")
+
+    server = MetricsServer(
+        service.metrics.registry, "127.0.0.1", 0, logging.getLogger("test"), collect=service.collect_metrics
+    )
+    await server.start()
+    try:
+        status, body = await http_get(server.bound_port, "/metrics")
+        missing_status, _ = await http_get(server.bound_port, "/")
+    finally:
+        await server.close()
+        await service.shutdown()
+
+    assert status == "HTTP/1.1 200 OK"
+    assert missing_status == "HTTP/1.1 404 Not Found"
+    assert 'tw_alpha_retries_total{operation="fetch"} 1' in body
+    assert 'tw_alpha_sync_stage_seconds_count{stage="total"} 1' in body
+    assert 'tw_alpha_worker_available{worker="worker-1"} 1' in body
+    assert "tw_alpha_pending_alerts 0" in body
+    commit_count = next(
+        line for line in body.splitlines() if line.startswith("tw_alpha_sqlite_commit_seconds_count")
+    )
+    assert int(commit_count.split()[-1]) > 0
@@ -0,0 +1,151 @@
+import asyncio
+import logging
+
+import pytest
+
+from tw_alpha_scraper.http_client import AsyncHTTPClient
+from tw_alpha_scraper.models import ResolvedUser, TargetRecord
+from tw_alpha_scraper.notifications import DiscordWebhookNotifier
+
+
+class FakeWebhookServer:
+    """Plain asyncio HTTP/1.1 server that records requests and keeps connections open."""
+
+    def __init__(self):
+        self.requests: list[bytes] = []
+        self.connections = 0
+        self.server: asyncio.base_events.Server | None = None
+        self.port = 0
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                body = await reader.readexactly(length)
+                self.requests.append(body)
+                writer.write(b"HTTP/1.1 204 No Content\r\nContent-Length: 0\r\n\r\n")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+
+def make_target() -> TargetRecord:
+    return TargetRecord(
+        user_id="1",
+        username="alpha",
+        display_name="Alpha",
+        label=None,
+        poll_interval_seconds=None,
+        active=True,
+        last_seen_followed_user_id=None,
+        last_polled_at=None,
+        last_success_at=None,
+        last_error=None,
+        created_at="x",
+        updated_at="x",
+    )
+
+
+@pytest.mark.asyncio
+async def test_notifier_reuses_one_connection_for_a_burst_of_alerts():
+    async with FakeWebhookServer() as server:
+        client = AsyncHTTPClient(max_connections=1)
+        notifier = DiscordWebhookNotifier(
+            f"http://127.0.0.1:{server.port}/api/webhooks/1/token",
+            logging.getLogger("test"),
+            http_client=client,
+        )
+
+        for index in range(5):
+            assert await notifier.send_follow_alert(make_target(), ResolvedUser(id=str(index), username=f"u{index}"))
+        await notifier.close()
+
+    assert len(server.requests) == 5
+    assert server.connections == 1
+    assert client.connections_opened == 1
+    assert notifier.stats.sent == 5
+    assert notifier.stats.last_latency_ms is not None
+
+
+class DroppingServer:
+    """Answers the first request on a connection, then reads the next one and hangs up or stalls."""
+
+    def __init__(self, stall: bool = False):
+        self.stall = stall
+        self.requests: list[bytes] = []
+        self.received = asyncio.Event()
+        self.closed_by_client = asyncio.Event()
+        self.server: asyncio.base_events.Server | None = None
+        self.port = 0
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        await reader.readuntil(b"\r\n\r\n")
+        writer.write(b"HTTP/1.1 204 No Content\r\nContent-Length: 0\r\n\r\n")
+        await writer.drain()
+        self.requests.append(await reader.readuntil(b"\r\n\r\n"))
+        self.received.set()
+        if self.stall:
+            # Never answer; read() returns once the client closes its end.
+            await reader.read()
+            self.closed_by_client.set()
+        writer.close()
+
+
+@pytest.mark.asyncio
+async def test_post_on_a_reused_socket_is_not_resent_after_the_server_drops_it():
+    from tw_alpha_scraper.http_client import HTTPClientError
+
+    async with DroppingServer() as server:
+        client = AsyncHTTPClient(max_connections=1)
+        url = f"http://127.0.0.1:{server.port}/api/webhooks/1/token"
+        assert (await client.request("GET", url)).status == 204
+
+        with pytest.raises(HTTPClientError):
+            await client.request("POST", url, body=b"{}")
+        await client.close()
+
+    assert len(server.requests) == 1
+    assert client.connections_opened == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_request_closes_its_connection():
+    async with DroppingServer(stall=True) as server:
+        client = AsyncHTTPClient(max_connections=1)
+        url = f"http://127.0.0.1:{server.port}/api/webhooks/1/token"
+        await client.request("GET", url)
+        [connection] = client._idle[("http", "127.0.0.1", server.port)]
+
+        task = asyncio.create_task(client.request("POST", url, body=b"{}"))
+        await server.received.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert connection.writer.is_closing()
+        assert client._idle[("http", "127.0.0.1", server.port)] == []
+        await asyncio.wait_for(server.closed_by_client.wait(), timeout=1.0)
+        await client.close()
@@ -0,0 +1,245 @@
+import logging
+
+import pytest
+
+from tw_alpha_scraper.async_storage import AsyncAppDatabase
+from tw_alpha_scraper.http_client import HTTPResponse
+from tw_alpha_scraper.models import FollowEvent, ResolvedUser, TargetRecord, WebhookRoute
+from tw_alpha_scraper.notifications import RateLimitBucket, WebhookRateLimited, pack_follow_alerts
+from tw_alpha_scraper.outbox import AlertOutbox
+from tw_alpha_scraper.routing import AlertRouter
+from tw_alpha_scraper.storage import AppDatabase
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FlakyNotifier:
+    def __init__(self, failures: list[Exception | None]):
+        self.failures = failures
+        self.sent: list[str] = []
+
+        self.messages: list[list[str]] = []
+        self.urls: list[str | None] = []
+        self.webhook_url = "https://hooks/default"
+
+    async def send_follow_alerts(self, alerts, webhook_url=None):
+        self.urls.append(webhook_url)
+        if self.failures:
+            failure = self.failures.pop(0)
+            if failure is not None:
+                raise failure
+        self.messages.append([followed_user.id for _, followed_user in alerts])
+        self.sent.extend(followed_user.id for _, followed_user in alerts)
+        return True
+
+
+def queue_events(db: AppDatabase, *followed_ids: str, sinks: tuple[str, ...] = ("default",)) -> None:
+    db.upsert_target("100", username="alpha", display_name="Alpha")
+    db.record_follow_events(
+        [
+            FollowEvent(
+                target_user_id="100",
+                followed_user_id=followed_id,
+                observed_at="2024-01-01T00:00:00+00:00",
+                followed_username=f"user{followed_id}",
+            )
+            for followed_id in followed_ids
+        ],
+        alert_sinks=sinks,
+    )
+
+
+@pytest.mark.asyncio
+async def test_failed_alert_is_retried_with_backoff_and_survives_restart(tmp_path):
+    db = AppDatabase(str(tmp_path / "app.db"))
+    db.initialize()
+    clock = FakeClock(now=2_000_000_000.0)
+    queue_events(db, "200")
+    storage = AsyncAppDatabase(db)
+    notifier = FlakyNotifier([RuntimeError("HTTP 500")])
+    outbox = AlertOutbox(storage, notifier, logging.getLogger("test"), retry_base_seconds=30, clock=clock)
+
+    assert await outbox.deliver_pending() == 0
+    assert db.next_alert_due_at() == int(clock.now) + 30
+
+    # A fresh outbox on the same database, as after a restart, picks the alert up once it is due.
+    restarted = AlertOutbox(storage, notifier, logging.getLogger("test"), retry_base_seconds=30, clock=clock)
+    assert await restarted.deliver_pending() == 0
+    clock.now += 30
+    assert await restarted.deliver_pending() == 1
+    assert notifier.sent == ["200"]
+    assert db.count_pending_alerts() == 0
+    assert db.recent_follow_events(limit=1)[0]["notified_at"] is not None
+    storage.close()
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_pauses_delivery_without_spending_attempts(tmp_path):
+    db = AppDatabase(str(tmp_path / "app.db"))
+    db.initialize()
+    clock = FakeClock(now=2_000_000_000.0)
+    followed_ids = [str(200 + index) for index in range(12)]
+    queue_events(db, *followed_ids)
+    storage = AsyncAppDatabase(db)
+    notifier = FlakyNotifier([None, WebhookRateLimited(2.5)])
+    outbox = AlertOutbox(storage, notifier, logging.getLogger("test"), max_attempts=1, clock=clock)
+
+    assert await outbox.deliver_pending() == 10
+    assert outbox.stats.rate_limited == 1
+    assert db.count_pending_alerts() == 2
+    assert await outbox.deliver_pending() == 0
+    clock.now += 3
+    assert await outbox.deliver_pending() == 2
+    assert notifier.messages == [followed_ids[:10], followed_ids[10:]]
+    assert outbox.stats.dropped == 0
+    storage.close()
+
+
+@pytest.mark.asyncio
+async def test_alert_is_dropped_after_max_attempts(tmp_path):
+    db = AppDatabase(str(tmp_path / "app.db"))
+    db.initialize()
+    clock = FakeClock(now=2_000_000_000.0)
+    queue_events(db, "200")
+    storage = AsyncAppDatabase(db)
+    notifier = FlakyNotifier([RuntimeError("HTTP 404"), RuntimeError("HTTP 404")])
+    outbox = AlertOutbox(storage, notifier, logging.getLogger("test"), max_attempts=2, retry_base_seconds=1, clock=clock)
+
+    await outbox.deliver_pending()
+    clock.now += 1
+    await outbox.deliver_pending()
+
+    assert db.count_pending_alerts() == 0
+    assert outbox.stats.dropped == 1
+    assert notifier.sent == []
+    storage.close()
+
+
+@pytest.mark.asyncio
+async def test_each_sink_retries_on_its_own_and_event_is_notified_once_all_deliver(tmp_path):
+    db = AppDatabase(str(tmp_path / "app.db"))
+    db.initialize()
+    clock = FakeClock(now=2_000_000_000.0)
+    queue_events(db, "200", sinks=("main", "archive"))
+    storage = AsyncAppDatabase(db)
+    router = AlertRouter(
+        [WebhookRoute(name="main", webhook_url="https://hooks/main"), WebhookRoute(name="archive", webhook_url="https://hooks/archive")],
+        None,
+    )
+
+    class ArchiveDownOnceNotifier(FlakyNotifier):
+        async def send_follow_alerts(self, alerts, webhook_url=None):
+            if webhook_url == "https://hooks/archive" and "https://hooks/archive" not in self.urls:
+                self.urls.append(webhook_url)
+                raise RuntimeError("HTTP 502")
+            return await super().send_follow_alerts(alerts, webhook_url)
+
+    notifier = ArchiveDownOnceNotifier([])
+    outbox = AlertOutbox(storage, notifier, logging.getLogger("test"), router, retry_base_seconds=10, clock=clock)
+
+    assert await outbox.deliver_pending() == 1
+    assert sorted(notifier.urls) == ["https://hooks/archive", "https://hooks/main"]
+    assert db.recent_follow_events(limit=1)[0]["notified_at"] is None
+    assert db.count_pending_alerts() == 1
+
+    clock.now += 10
+    assert await outbox.deliver_pending() == 1
+    assert notifier.urls[-1] == "https://hooks/archive"
+    assert db.recent_follow_events(limit=1)[0]["notified_at"] is not None
+    storage.close()
+
+
+@pytest.mark.asyncio
+async def test_alerts_without_a_webhook_url_are_not_queued_or_retried(tmp_path):
+    db = AppDatabase(str(tmp_path / "app.db"))
+    db.initialize()
+    queue_events(db, "200")
+    storage = AsyncAppDatabase(db)
+    notifier = FlakyNotifier([])
+    notifier.webhook_url = None
+    outbox = AlertOutbox(storage, notifier, logging.getLogger("test"), max_attempts=5)
+
+    assert outbox.router.sinks_for(db.get_target("100")) == ()
+    # Rows queued while a URL was still configured are dropped on the first pass.
+    assert await outbox.deliver_pending() == 0
+    assert db.count_pending_alerts() == 0
+    assert outbox.stats.dropped == 1
+    assert outbox.stats.retried == 0
+    assert notifier.urls == []
+    storage.close()
+
+
+def test_router_matches_targets_by_id_username_and_label():
+    router = AlertRouter(
+        [
+            WebhookRoute(name="main"),
+            WebhookRoute(name="whales", targets=("@Alpha", "999")),
+            WebhookRoute(name="vc", labels=("vc",), webhook_url="https://hooks/vc"),
+        ],
+        "https://hooks/default",
+    )
+    target = TargetRecord(
+        user_id="1",
+        username="alpha",
+        display_name="Alpha",
+        label="vc",
+        poll_interval_seconds=None,
+        active=True,
+        last_seen_followed_user_id=None,
+        last_polled_at=None,
+        last_success_at=None,
+        last_error=None,
+        created_at="x",
+        updated_at="x",
+    )
+
+    assert router.sinks_for(target) == ("main", "whales", "vc")
+    assert router.webhook_url("main") == "https://hooks/default"
+    assert router.webhook_url("vc") == "https://hooks/vc"
+    assert AlertRouter([], "https://hooks/default").sinks_for(target) == ("default",)
+
+
+def test_rate_limit_bucket_reads_discord_headers():
+    bucket = RateLimitBucket()
+    exhausted = HTTPResponse(
+        status=204,
+        headers={"x-ratelimit-remaining": "0", "x-ratelimit-reset-after": "1.5", "x-ratelimit-bucket": "abc"},
+    )
+    assert bucket.update(exhausted, now=100.0) is None
+    assert bucket.bucket_id == "abc"
+    assert bucket.delay(100.0) == 1.5
+
+    throttled = HTTPResponse(status=429, body=b'{"retry_after": 4.0, "global": false}')
+    assert bucket.update(throttled, now=101.0) == 4.0
+    assert bucket.delay(101.0) == 4.0
+
+
+def test_pack_follow_alerts_respects_embed_count_and_text_limits():
+    target = TargetRecord(
+        user_id="1",
+        username="alpha",
+        display_name="Alpha",
+        label=None,
+        poll_interval_seconds=None,
+        active=True,
+        last_seen_followed_user_id=None,
+        last_polled_at=None,
+        last_success_at=None,
+        last_error=None,
+        created_at="x",
+        updated_at="x",
+    )
+    short = [(target, ResolvedUser(id=str(index), username=f"u{index}")) for index in range(23)]
+    assert [len(batch) for batch in pack_follow_alerts(short)] == [10, 10, 3]
+
+    # Bios are capped at one field's worth, so about five long alerts fill the 6000 character budget.
+    wordy = [(target, ResolvedUser(id=str(index), description="x" * 5000)) for index in range(7)]
+    batches = pack_follow_alerts(wordy)
+    assert [index for batch in batches for index in batch] == list(range(7))
+    assert all(len(batch) < 7 for batch in batches)
@@ -0,0 +1,25 @@
+from tw_alpha_scraper.scheduler import DueScheduler
+
+
+def test_pop_due_returns_targets_in_due_order():
+    scheduler = DueScheduler()
+    scheduler.schedule("b", 20)
+    scheduler.schedule("a", 10)
+    scheduler.schedule("c", 30)
+
+    assert scheduler.pop_due(now=25) == ["a", "b"]
+    assert scheduler.next_due_at() == 30
+    assert len(scheduler) == 1
+
+
+def test_reschedule_and_remove_skip_stale_entries():
+    scheduler = DueScheduler()
+    scheduler.schedule("a", 10)
+    scheduler.schedule("b", 15)
+    scheduler.schedule("a", 50)
+    scheduler.remove("b")
+
+    assert scheduler.pop_due(now=20) == []
+    assert scheduler.seconds_until_due(now=20) == 30
+    assert scheduler.pop_due(now=50) == ["a"]
+    assert scheduler.next_due_at() is None
@@ -1,4 +1,6 @@
+import asyncio
 import logging
+import time
 
 import pytest
 
@@ -6,6 +8,8 @@ from tw_alpha_scraper.models import AppConfig, DiscordSettings, MonitorSettings,
 from tw_alpha_scraper.service import AlphaMonitorService
 from tw_alpha_scraper.storage import AppDatabase
 
+WEBHOOK_URL = "https://discord.com/api/webhooks/1/token"
+
 
 class FakeTwitterClient:
     def __init__(self):
@@ -13,14 +17,17 @@ class FakeTwitterClient:
         self.resolve_map: dict[str, ResolvedUser] = {}
         self.accounts = [{"username": "worker-1", "active": True, "proxy": None}]
         self.fail_fetch_attempts = 0
+        self.fetch_error = "temporary failure"
+        self.resolve_calls: list[str] = []
 
     async def resolve_user(self, identifier: str) -> ResolvedUser:
+        self.resolve_calls.append(identifier)
         return self.resolve_map[identifier]
 
     async def iter_following(self, user_id: str, limit: int | None = None):
         if self.fail_fetch_attempts:
             self.fail_fetch_attempts -= 1
-            raise RuntimeError("temporary failure")
+            raise RuntimeError(self.fetch_error)
 
         users = self.follow_map.get(user_id, [])
         if limit is not None:
@@ -36,8 +43,8 @@ class FakeNotifier:
     def __init__(self):
         self.sent: list[tuple[str, str]] = []
 
-    async def send_follow_alert(self, target, followed_user):
-        self.sent.append((target.user_id, followed_user.id))
+    async def send_follow_alerts(self, alerts, webhook_url=None):
+        self.sent.extend((target.user_id, followed_user.id) for target, followed_user in alerts)
         return True
 
 
@@ -45,7 +52,7 @@ class FakeNotifier:
 async def test_sync_target_bootstraps_without_spamming_backlog(tmp_path):
     db = AppDatabase(str(tmp_path / "app.db"))
     config = AppConfig(
-        discord=DiscordSettings(),
+        discord=DiscordSettings(alert_webhook_url=WEBHOOK_URL),
         monitor=MonitorSettings(default_poll_interval_seconds=60, retry_base_delay_seconds=0),
         storage=StorageSettings(app_db_path=str(tmp_path / "app.db")),
     )
@@ -69,12 +76,17 @@ async def test_sync_target_bootstraps_without_spamming_backlog(tmp_path):
         ResolvedUser(id="300", username="delta", display_name="Delta"),
         ResolvedUser(id="200", username="beta", display_name="Beta"),
     ]
+    commits_before = db.commit_count
     second_sync = await service.sync_target("100", send_alerts=True)
 
     assert second_sync.bootstrapped is False
+    assert db.commit_count - commits_before == 2
     assert second_sync.inserted_count == 1
-    assert second_sync.notified_count == 1
+    assert second_sync.queued_count == 1
+    assert notifier.sent == []
+    assert await service.outbox.deliver_pending() == 1
     assert notifier.sent == [("100", "300")]
+    assert db.count_pending_alerts() == 0
 
 
 @pytest.mark.asyncio
@@ -101,10 +113,73 @@ async def test_add_target_bootstraps_and_remove_target_deactivates(tmp_path):
     assert db.get_target("100").active is False
 
 
+@pytest.mark.asyncio
+async def test_resolve_user_is_served_from_cache_filled_by_scans(tmp_path):
+    db = AppDatabase(str(tmp_path / "app.db"))
+    config = AppConfig(
+        monitor=MonitorSettings(retry_base_delay_seconds=0, user_cache_ttl_seconds=3600),
+        storage=StorageSettings(app_db_path=str(tmp_path / "app.db")),
+    )
+    twitter = FakeTwitterClient()
+    twitter.resolve_map["@alpha"] = ResolvedUser(id="100", username="alpha", display_name="Alpha")
+    twitter.follow_map["100"] = [ResolvedUser(id="200", username="Beta", display_name="Beta")]
+    service = AlphaMonitorService(config, db, twitter_client=twitter, notifier=FakeNotifier(), logger=logging.getLogger("test"))
+
+    await service.initialize()
+    await service.add_target("@alpha")
+    await service.add_target("@alpha")
+    followed = await service.resolve_user("@beta")
+
+    assert twitter.resolve_calls == ["@alpha"]
+    assert (followed.id, followed.username) == ("200", "Beta")
+    assert db.lookup_twitter_user("200", max_age_seconds=3600) is not None
+    assert db.lookup_twitter_user("@beta", max_age_seconds=3600, now=int(time.time()) + 7200) is None
+
+
+@pytest.mark.asyncio
+async def test_change_probe_skips_scan_until_following_count_changes(tmp_path):
+    class ProbedTwitterClient(FakeTwitterClient):
+        def __init__(self):
+            super().__init__()
+            self.scans = 0
+
+        async def following_count(self, user_id):
+            return len(self.follow_map.get(user_id, []))
+
+        async def iter_following(self, user_id, limit=None):
+            self.scans += 1
+            async for user in super().iter_following(user_id, limit):
+                yield user
+
+    db = AppDatabase(str(tmp_path / "app.db"))
+    config = AppConfig(
+        monitor=MonitorSettings(retry_base_delay_seconds=0, change_probe_enabled=True),
+        storage=StorageSettings(app_db_path=str(tmp_path / "app.db")),
+    )
+    twitter = ProbedTwitterClient()
+    service = AlphaMonitorService(config, db, twitter_client=twitter, notifier=FakeNotifier(), logger=logging.getLogger("test"))
+    await service.initialize()
+    db.upsert_target("100", username="alpha")
+    twitter.follow_map["100"] = [ResolvedUser(id="200", username="beta")]
+
+    await service.sync_target("100")
+    assert db.get_target("100").following_count == 1
+    skipped = await service.sync_target("100")
+    assert skipped.scan_stop_reason == "probe_unchanged"
+    assert twitter.scans == 1
+
+    twitter.follow_map["100"].insert(0, ResolvedUser(id="300", username="delta"))
+    changed = await service.sync_target("100", send_alerts=True)
+    assert changed.inserted_count == 1
+    assert twitter.scans == 2
+    assert service.probe_stats.snapshot()["hit_rate"] == 0.5
+
+
 @pytest.mark.asyncio
 async def test_sync_target_recovers_after_retry(tmp_path):
     db = AppDatabase(str(tmp_path / "app.db"))
     config = AppConfig(
+        discord=DiscordSettings(alert_webhook_url=WEBHOOK_URL),
         monitor=MonitorSettings(max_retry_attempts=2, retry_base_delay_seconds=0),
         storage=StorageSettings(app_db_path=str(tmp_path / "app.db")),
     )
@@ -121,5 +196,321 @@ async def test_sync_target_recovers_after_retry(tmp_path):
     result = await service.sync_target("100", send_alerts=True)
 
     assert result.inserted_count == 1
-    assert result.notified_count == 1
+    assert result.queued_count == 1
     assert service.degraded is False
+
+
+@pytest.mark.asyncio
+async def test_target_id_containing_429_is_still_retried(tmp_path):
+    db = AppDatabase(str(tmp_path / "app.db"))
+    config = AppConfig(
+        monitor=MonitorSettings(max_retry_attempts=2, retry_base_delay_seconds=0),
+        storage=StorageSettings(app_db_path=str(tmp_path / "app.db")),
+    )
+    twitter = FakeTwitterClient()
+    service = AlphaMonitorService(
+        config, db, twitter_client=twitter, notifier=FakeNotifier(), logger=logging.getLogger("test")
+    )
+
+    await service.initialize()
+    db.upsert_target("1442912345", username="alpha", display_name="Alpha")
+    db.set_target_last_seen("1442912345", "200")
+    twitter.follow_map["1442912345"] = [ResolvedUser(id="300", username="delta", display_name="Delta")]
+    twitter.fail_fetch_attempts = 1
+    twitter.fetch_error = "GET /Following?userId=1442912345 timed out"
+
+    result = await service.sync_target("1442912345", send_alerts=True)
+
+    assert result.inserted_count == 1
+    assert service.metrics.retries.value("fetch") == 1
+
+
+@pytest.mark.asyncio
+async def test_sync_target_reports_stage_timings_and_tracks_slow_targets(tmp_path):
+    db = AppDatabase(str(tmp_path / "app.db"))
+    config = AppConfig(
+        monitor=MonitorSettings(max_retry_attempts=2, retry_base_delay_seconds=0.02),
+        storage=StorageSettings(app_db_path=str(tmp_path / "app.db")),
+    )
+    twitter = FakeTwitterClient()
+    service = AlphaMonitorService(config, db, twitter_client=twitter, notifier=FakeNotifier(), logger=logging.getLogger("test"))
+
+    await service.initialize()
+    db.upsert_target("100", username="alpha", display_name="Alpha")
+    db.set_target_last_seen("100", "200")
+    twitter.follow_map["100"] = [ResolvedUser(id="300", username="delta")]
+    twitter.fail_fetch_attempts = 1
+
+    result = await service.sync_target("100")
+
+    assert set(result.timings_ms) == {"fetch", "retry_wait", "diff", "persist", "total"}
+    assert result.timings_ms["retry_wait"] >= 20
+    assert result.timings_ms["total"] >= sum(
+        result.timings_ms[stage] for stage in ("fetch", "retry_wait", "diff")
+    )
+    target = db.get_target("100")
+    assert target.last_sync_ms is not None and target.avg_sync_ms == target.last_sync_ms
+    assert [row["user_id"] for row in db.slowest_targets()] == ["100"]
+    assert "slowest_targets: Alpha avg" in await service.status_text()
+
+
+class SlowTwitterClient(FakeTwitterClient):
+    def __init__(self):
+        super().__init__()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.failing_user_ids: set[str] = set()
+        self.polls: dict[str, int] = {}
+
+    async def iter_following(self, user_id: str, limit: int | None = None):
+        self.polls[user_id] = self.polls.get(user_id, 0) + 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if user_id in self.failing_user_ids:
+                raise RuntimeError("boom")
+        finally:
+            self.in_flight -= 1
+        for user in self.follow_map.get(user_id, []):
+            yield user
+
+
+@pytest.mark.asyncio
+async def test_run_monitor_cycle_syncs_targets_concurrently_within_limit(tmp_path):
+    db = AppDatabase(str(tmp_path / "app.db"))
+    config = AppConfig(
+        monitor=MonitorSettings(
+            max_retry_attempts=1,
+            retry_base_delay_seconds=0,
+            target_jitter_min_seconds=0,
+            target_jitter_max_seconds=0,
+            max_concurrent_syncs=3,
+        ),
+        storage=StorageSettings(app_db_path=str(tmp_path / "app.db")),
+    )
+    twitter = SlowTwitterClient()
+    service = AlphaMonitorService(config, db, twitter_client=twitter, notifier=FakeNotifier(), logger=logging.getLogger("test"))
+
+    await service.initialize()
+    for index in range(8):
+        db.upsert_target(str(100 + index), username=f"user{index}")
+        twitter.follow_map[str(100 + index)] = [ResolvedUser(id=str(900 + index))]
+    twitter.failing_user_ids.add("103")
+
+    await service.run_monitor_cycle()
+
+    assert twitter.max_in_flight == 3
+    failed = db.get_target("103")
+    assert failed.last_error is not None
+    assert failed.last_polled_at is not None
+    assert db.get_target("100").last_seen_followed_user_id == "900"
+
+
+@pytest.mark.asyncio
+async def test_run_monitor_cycle_only_syncs_targets_that_are_due(tmp_path):
+    db = AppDatabase(str(tmp_path / "app.db"))
+    config = AppConfig(
+        monitor=MonitorSettings(
+            default_poll_interval_seconds=300,
+            retry_base_delay_seconds=0,
+            target_jitter_min_seconds=0,
+            target_jitter_max_seconds=0,
+        ),
+        storage=StorageSettings(app_db_path=str(tmp_path / "app.db")),
+    )
+    twitter = SlowTwitterClient()
+    service = AlphaMonitorService(config, db, twitter_client=twitter, notifier=FakeNotifier(), logger=logging.getLogger("test"))
+
+    await service.initialize()
+    db.upsert_target("100", username="alpha")
+    twitter.follow_map["100"] = [ResolvedUser(id="200")]
+
+    await service.run_monitor_cycle()
+    first_polled_at = db.get_target("100").last_polled_at
+    await service.run_monitor_cycle()
+
+    assert first_polled_at is not None
+    assert service.scheduler.seconds_until_due() > 290
+    assert db.get_target("100").last_polled_at == first_polled_at
+
+    await service.remove_target("100")
+    assert "100" not in service.scheduler
+
+
+@pytest.mark.asyncio
+async def test_sync_target_stops_scanning_at_known_head_or_known_run(tmp_path):
+    db = AppDatabase(str(tmp_path / "app.db"))
+    config = AppConfig(
+        monitor=MonitorSettings(retry_base_delay_seconds=0, known_run_stop_count=2),
+        storage=StorageSettings(app_db_path=str(tmp_path / "app.db")),
+    )
+    twitter = FakeTwitterClient()
+    service = AlphaMonitorService(config, db, twitter_client=twitter, notifier=FakeNotifier(), logger=logging.getLogger("test"))
+
+    await service.initialize()
+    db.upsert_target("100", username="alpha")
+    twitter.follow_map["100"] = [ResolvedUser(id=str(user_id)) for user_id in range(200, 260)]
+
+    bootstrap = await service.sync_target("100")
+    assert bootstrap.bootstrapped is True
+    assert bootstrap.fetched_count == 1
+
+    twitter.follow_map["100"] = [ResolvedUser(id="300")] + twitter.follow_map["100"]
+    head_sync = await service.sync_target("100")
+    assert head_sync.inserted_count == 1
+    assert head_sync.fetched_count == 2
+    assert head_sync.scan_stop_reason == "known_head"
+
+    twitter.follow_map["100"] = [ResolvedUser(id="301")] + twitter.follow_map["100"]
+    await service.sync_target("100")
+
+    # The stored head disappears (unfollowed); a run of already-recorded follows still ends the scan.
+    db.set_target_last_seen("100", "missing")
+    twitter.follow_map["100"] = [ResolvedUser(id="302")] + twitter.follow_map["100"]
+    run_sync = await service.sync_target("100")
+    assert run_sync.inserted_count == 1
+    assert run_sync.fetched_count == 3
+    assert run_sync.scan_stop_reason == "known_run"
+
+
+@pytest.mark.asyncio
+async def test_run_monitor_cycle_defers_targets_when_worker_budget_is_exhausted(tmp_path):
+    db = AppDatabase(str(tmp_path / "app.db"))
+    config = AppConfig(
+        monitor=MonitorSettings(
+            retry_base_delay_seconds=0,
+            target_jitter_min_seconds=0,
+            target_jitter_max_seconds=0,
+            worker_requests_per_window=1,
+            worker_window_seconds=600,
+        ),
+        storage=StorageSettings(app_db_path=str(tmp_path / "app.db")),
+    )
+    twitter = FakeTwitterClient()
+    service = AlphaMonitorService(config, db, twitter_client=twitter, notifier=FakeNotifier(), logger=logging.getLogger("test"))
+
+    await service.initialize()
+    db.upsert_target("100", username="alpha")
+    db.upsert_target("101", username="beta")
+
+    await service.run_monitor_cycle()
+
+    deferred = [user_id for user_id in ("100", "101") if db.get_target(user_id).last_polled_at is None]
+    assert len(deferred) == 1
+    assert service.scheduler.due_at(deferred[0]) - time.time() > 500
+    health = await service.health_check()
+    assert health["deferred_syncs"] == 1
+    assert health["worker_budgets"][0]["remaining_requests"] == 0
+
+
+@pytest.mark.asyncio
+async def test_sharded_services_do_not_poll_the_same_target_twice(tmp_path):
+    path = str(tmp_path / "app.db")
+    twitter = SlowTwitterClient()
+    twitter.follow_map["100"] = [ResolvedUser(id="200")]
+    services = []
+    for owner_id in ("node-a", "node-b"):
+        config = AppConfig(
+            monitor=MonitorSettings(
+                retry_base_delay_seconds=0,
+                target_jitter_min_seconds=0,
+                target_jitter_max_seconds=0,
+                sharding_enabled=True,
+                shard_owner_id=owner_id,
+            ),
+            storage=StorageSettings(app_db_path=path),
+        )
+        services.append(
+            AlphaMonitorService(config, AppDatabase(path), twitter_client=twitter, notifier=FakeNotifier(), logger=logging.getLogger("test"))
+        )
+    for service in services:
+        await service.initialize()
+    services[0].storage.upsert_target("100", username="alpha")
+
+    await asyncio.gather(*(service.run_monitor_cycle() for service in services))
+
+    # One poll in total: neither overlapping nor repeated by the member that lost the lease.
+    assert twitter.polls == {"100": 1}
+    assert twitter.max_in_flight == 1
+    health = await services[0].health_check()
+    assert health["shard"]["owner_id"] == "node-a"
+    assert health["shard"]["owned_targets"] == []
+    assert [member["owner_id"] for member in health["shard"]["members"]] == ["node-a", "node-b"]
+
+
+class GatedTwitterClient(FakeTwitterClient):
+    def __init__(self):
+        super().__init__()
+        self.started = asyncio.Event()
+        self.proceed = asyncio.Event()
+
+    async def iter_following(self, user_id: str, limit: int | None = None):
+        self.started.set()
+        await self.proceed.wait()
+        for user in self.follow_map.get(user_id, []):
+            yield user
+
+
+def sharded_config(path: str, **overrides) -> AppConfig:
+    options = {
+        "retry_base_delay_seconds": 0,
+        "target_jitter_min_seconds": 0,
+        "target_jitter_max_seconds": 0,
+        "sharding_enabled": True,
+        "shard_owner_id": "node-a",
+    }
+    options.update(overrides)
+    return AppConfig(monitor=MonitorSettings(**options), storage=StorageSettings(app_db_path=path))
+
+
+@pytest.mark.asyncio
+async def test_shard_refresh_keeps_deferrals_and_picks_up_new_targets(tmp_path):
+    path = str(tmp_path / "app.db")
+    db = AppDatabase(path)
+    config = sharded_config(path, worker_requests_per_window=1, worker_window_seconds=600)
+    service = AlphaMonitorService(
+        config, db, twitter_client=FakeTwitterClient(), notifier=FakeNotifier(), logger=logging.getLogger("test")
+    )
+    await service.initialize()
+    db.upsert_target("100", username="alpha")
+    db.upsert_target("101", username="beta")
+    await service.run_monitor_cycle()
+    [deferred] = [user_id for user_id in ("100", "101") if db.get_target(user_id).last_polled_at is None]
+    deferred_until = service.scheduler.due_at(deferred)
+
+    # Added by another member or the bot's process.
+    AppDatabase(path).upsert_target("102", username="gamma")
+    await service._refresh_schedule()
+
+    assert service.scheduler.due_at(deferred) == deferred_until
+    assert service.scheduler.due_at("102") is not None
+    await service.outbox.shard.claim("__alert_outbox__")
+    assert (await service.health_check())["shard"]["owned_targets"] == []
+
+
+@pytest.mark.asyncio
+async def test_shutdown_lets_in_flight_syncs_finish_before_leaving_the_shard(tmp_path):
+    path = str(tmp_path / "app.db")
+    db = AppDatabase(path)
+    twitter = GatedTwitterClient()
+    twitter.follow_map["100"] = [ResolvedUser(id="200")]
+    service = AlphaMonitorService(
+        sharded_config(path), db, twitter_client=twitter, notifier=FakeNotifier(), logger=logging.getLogger("test")
+    )
+    await service.initialize()
+    db.upsert_target("100", username="alpha")
+
+    cycle = asyncio.create_task(service.run_monitor_cycle())
+    await twitter.started.wait()
+    shutdown = asyncio.create_task(service.shutdown())
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+    assert not shutdown.done()
+    assert db._conn.execute("SELECT owner_id FROM target_leases").fetchall()[0][0] == "node-a"
+
+    twitter.proceed.set()
+    await asyncio.gather(cycle, shutdown)
+    assert db.get_target("100").last_success_at is not None
+    assert db._conn.execute("SELECT COUNT(*) FROM target_leases").fetchone()[0] == 0
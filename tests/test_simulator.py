@@ -0,0 +1,86 @@
+from dataclasses import replace
+
+import pytest
+
+from tw_alpha_scraper.bench import BenchOptions, bench_cooldown_seconds, format_report, run_bench
+from tw_alpha_scraper.simulator import SimulatedTwitterClient, SimulationSettings
+from tw_alpha_scraper.twitter import TwitterClientError
+from tw_alpha_scraper.workers import is_rate_limit_error
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def collect(client: SimulatedTwitterClient, user_id: str, limit: int | None = None) -> list[str]:
+    return [user.id async for user in client.iter_following(user_id, limit=limit)]
+
+
+@pytest.mark.asyncio
+async def test_simulator_pages_following_and_adds_follows_over_time():
+    clock = FakeClock()
+    client = SimulatedTwitterClient(
+        SimulationSettings(follows_per_hour=3600, initial_following=45, page_size=20, seed=7), clock=clock
+    )
+
+    first = await collect(client, "1")
+    assert len(first) == 45
+    assert client.requests == 3
+    assert await client.following_count("1") == 45
+
+    clock.now += 60
+    second = await collect(client, "1", limit=100)
+    arrived = [user_id for user_id in second if user_id not in first]
+    assert arrived and second[: len(arrived)] == arrived
+    assert await client.following_count("1") == 45 + len(arrived)
+    assert all(("1", user_id) in client.arrivals for user_id in arrived)
+    # Targets share their initial follows, so a new target costs no new profiles.
+    assert (await collect(client, "2"))[-45:] == first
+
+
+@pytest.mark.asyncio
+async def test_simulator_rate_limit_bursts_and_worker_bans():
+    client = SimulatedTwitterClient(SimulationSettings(rate_limit_probability=1.0, rate_limit_burst=2, workers=2))
+
+    with pytest.raises(TwitterClientError) as excinfo:
+        await client.following_count("1")
+    assert is_rate_limit_error(excinfo.value)
+    assert client.rate_limited == 1
+
+    banned = SimulatedTwitterClient(SimulationSettings(ban_probability=1.0, workers=2))
+    await banned.following_count("1")
+    await banned.following_count("1")
+    assert [account["active"] for account in await banned.list_accounts()] == [False, False]
+    with pytest.raises(TwitterClientError, match="No active accounts"):
+        await banned.following_count("1")
+
+
+@pytest.mark.asyncio
+async def test_bench_runs_the_monitor_against_the_simulator(tmp_path):
+    report = await run_bench(
+        BenchOptions(
+            targets=25,
+            duration_seconds=1.0,
+            poll_interval_seconds=1,
+            db_path=str(tmp_path / "bench.db"),
+            simulation=SimulationSettings(seed=3),
+        )
+    )
+
+    assert report.syncs >= 25
+    assert report.failed_syncs == 0
+    assert report.twitter_requests >= report.syncs
+    assert report.sqlite_commits > 0
+    idle = replace(report, alert_latency_ms={"p50": None, "p95": None, "max": None}, peak_rss_mib=None)
+    assert "alert latency:    p50 n/a, p95 n/a, max n/a" in format_report(idle)
+    assert "None" not in format_report(idle)
+
+
+def test_bench_cooldown_is_scaled_to_the_run():
+    assert bench_cooldown_seconds(0.2) == 1
+    assert bench_cooldown_seconds(60) == 6
+
@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+
+# Cumulative `python -X importtime` cost of importing the CLI module, in microseconds. Importing
+# the CLI measures about 30ms locally; pulling asyncio and the service stack back in at module
+# level roughly doubles it, and discord.py or twscrape add far more.
+CLI_IMPORT_BUDGET_US = 120_000
+
+# Modules that subcommands import on demand and must not be loaded just to parse arguments.
+LAZY_MODULES = (
+    "asyncio",
+    "discord",
+    "twscrape",
+    "tw_alpha_scraper.service",
+    "tw_alpha_scraper.bot",
+    "tw_alpha_scraper.accounts",
+    "tw_alpha_scraper.storage",
+)
+
+
+def import_times(module: str) -> dict[str, int]:
+    """Return the cumulative import time of each module loaded by a cold ``import module``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    times: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_cli_import_skips_heavy_dependencies():
+    times = import_times("tw_alpha_scraper.cli")
+
+    assert "tw_alpha_scraper.cli" in times
+    assert [module for module in LAZY_MODULES if module in times] == []
+
+
+def test_cli_cold_start_stays_within_budget():
+    # Best of three runs so one slow filesystem hit does not fail the build.
+    cost = min(import_times("tw_alpha_scraper.cli")["tw_alpha_scraper.cli"] for _ in range(3))
+
+    assert cost <= CLI_IMPORT_BUDGET_US, f"importing the CLI took {cost}us, budget is {CLI_IMPORT_BUDGET_US}us"
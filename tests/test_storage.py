@@ -1,5 +1,10 @@
-import json
+import sqlite3
+import threading
+from contextlib import closing
 
+import pytest
+
+from tw_alpha_scraper import migrations
 from tw_alpha_scraper.models import FollowEvent
 from tw_alpha_scraper.storage import AppDatabase, utcnow_iso
 
@@ -10,15 +15,11 @@ def test_follow_event_dedupes_by_target_and_followed_user(tmp_path):
 
     event = FollowEvent(
         target_user_id="1",
-        target_username="alpha",
-        target_display_name="Alpha",
         followed_user_id="2",
+        observed_at=utcnow_iso(),
         followed_username="beta",
         followed_display_name="Beta",
         followed_bio="bio",
-        followed_profile_image_url=None,
-        observed_at=utcnow_iso(),
-        payload_json=json.dumps({"target_user_id": "1", "followed_user_id": "2"}),
     )
 
     first_id = db.record_follow_event(event)
@@ -26,3 +27,316 @@ def test_follow_event_dedupes_by_target_and_followed_user(tmp_path):
 
     assert first_id is not None
     assert second_id is None
+
+
+def test_list_due_targets_uses_persisted_next_due_at(tmp_path):
+    db = AppDatabase(str(tmp_path / "app.db"))
+    db.initialize()
+    db.upsert_target("1", username="alpha")
+    db.upsert_target("2", username="beta")
+    db.upsert_target("3", username="gamma", active=False)
+
+    db.set_target_poll_success("1", "10", next_due_at=1_000)
+    db.set_target_poll_failure("2", "boom", next_due_at=2_000)
+
+    assert [target.user_id for target in db.list_due_targets(now=1_500)] == ["1"]
+    assert [target.user_id for target in db.list_due_targets(now=2_000)] == ["1", "2"]
+    assert [target.user_id for target in db.list_due_targets(now=2_000, limit=1)] == ["1"]
+    plan = db._conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM targets WHERE active = 1 AND next_due_at <= 0 ORDER BY next_due_at"
+    ).fetchall()
+    assert any("idx_targets_active_next_due" in row["detail"] for row in plan)
+
+
+def test_initialize_adds_next_due_at_to_existing_database(tmp_path):
+    path = tmp_path / "legacy.db"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        """
+        CREATE TABLE targets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL UNIQUE,
+            username TEXT,
+            display_name TEXT,
+            label TEXT,
+            poll_interval_seconds INTEGER,
+            active INTEGER NOT NULL DEFAULT 1,
+            last_seen_followed_user_id TEXT,
+            last_polled_at TEXT,
+            last_success_at TEXT,
+            last_error TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        "INSERT INTO targets (user_id, last_polled_at, created_at, updated_at) VALUES (?, ?, ?, ?)",
+        ("1", "2024-01-01T00:00:00+00:00", "x", "x"),
+    )
+    conn.commit()
+    conn.close()
+
+    db = AppDatabase(str(path))
+    db.initialize()
+
+    assert db.get_target("1").next_due_at == 1704067200
+
+
+def test_target_lease_is_exclusive_until_it_expires(tmp_path):
+    db = AppDatabase(str(tmp_path / "app.db"))
+    db.initialize()
+    db.upsert_shard_member("a", "host", 1, expires_at=200)
+    db.upsert_shard_member("b", "host", 2, expires_at=200)
+
+    assert db.claim_target_lease("1", "a", expires_at=200, now=100) is True
+    assert db.claim_target_lease("1", "b", expires_at=300, now=150) is False
+    assert db.claim_target_lease("1", "a", expires_at=250, now=150) is True
+
+    db.renew_shard("a", expires_at=400)
+    assert db.claim_target_lease("1", "b", expires_at=500, now=300) is False
+    assert db.claim_target_lease("1", "b", expires_at=500, now=400) is True
+
+    members = {member["owner_id"]: member for member in db.list_shard_members()}
+    assert members["a"]["leased_targets"] == 0
+    assert members["b"]["leased_targets"] == 1
+
+    db.prune_expired_shard_state(now=350)
+    assert [member["owner_id"] for member in db.list_shard_members()] == ["a"]
+
+
+def test_record_follow_events_batches_inserts_into_one_commit(tmp_path):
+    db = AppDatabase(str(tmp_path / "app.db"))
+    db.initialize()
+
+    def event(followed_user_id: str) -> FollowEvent:
+        return FollowEvent(target_user_id="1", followed_user_id=followed_user_id, observed_at=utcnow_iso())
+
+    db.record_follow_event(event("2"))
+    db.commit_count = 0
+
+    ids = db.record_follow_events([event("2"), event("3"), event("4"), event("3")])
+
+    assert ids[0] is None and ids[3] is None
+    assert ids[1] is not None and ids[2] is not None
+    assert db.commit_count == 1
+
+    with db.transaction():
+        db.mark_events_notified([ids[1], ids[2]])
+        db.set_target_poll_success("1", "4")
+    assert db.commit_count == 2
+    assert db.get_state("last_alert_at") is not None
+
+
+def test_monitor_state_is_cached_and_deferred_writes_persist_on_next_commit(tmp_path):
+    path = str(tmp_path / "app.db")
+    db = AppDatabase(path)
+    db.initialize()
+
+    assert db.get_state("paused", False) is False
+    assert db.get_state("paused", False) is False
+    db.set_paused(True)
+    assert db.is_paused() is True
+    assert db.state_cache_misses == 1
+    assert db.state_cache_hits == 2
+
+    commits = db.commit_count
+    db.set_state("last_cycle_at", "2024-01-01T00:00:00+00:00", deferred=True)
+    assert db.commit_count == commits
+    assert db.get_state("last_cycle_at") == "2024-01-01T00:00:00+00:00"
+    assert AppDatabase(path, read_only=True).get_state("last_cycle_at") is None
+
+    db.record_admin_action("1", None, "monitor.pause")
+    assert db.commit_count == commits + 1
+    assert AppDatabase(path, read_only=True).get_state("last_cycle_at") == "2024-01-01T00:00:00+00:00"
+
+    db.set_state("last_cycle_at", "2024-01-02T00:00:00+00:00", deferred=True)
+    db.close()
+    assert AppDatabase(path).get_state("last_cycle_at") == "2024-01-02T00:00:00+00:00"
+
+
+def test_rolled_back_transaction_drops_its_deferred_state(tmp_path):
+    path = str(tmp_path / "app.db")
+    db = AppDatabase(path)
+    db.initialize()
+    db.set_state("last_cycle_at", "before", deferred=True)
+
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            db.set_state("last_cycle_at", "failed sync", deferred=True)
+            db.set_state("last_alert_at", "failed sync", deferred=True)
+            raise RuntimeError("sync failed")
+    db.flush_state()
+
+    reader = AppDatabase(path, read_only=True)
+    assert reader.get_state("last_cycle_at") == "before"
+    assert reader.get_state("last_alert_at") is None
+    assert db.get_state("last_alert_at") is None
+
+
+def test_state_cache_counters_stay_exact_under_concurrent_peeks(tmp_path):
+    db = AppDatabase(str(tmp_path / "app.db"))
+    db.initialize()
+    db.set_state("paused", False)
+    peeks_per_thread = 5_000
+
+    def peek() -> None:
+        for _ in range(peeks_per_thread):
+            db.peek_state("paused")
+            db.peek_state("missing")
+
+    threads = [threading.Thread(target=peek) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for index in range(200):
+        db.set_state("last_cycle_at", index, deferred=True)
+        db.invalidate_state_cache()
+        db.load_state("paused")
+    for thread in threads:
+        thread.join()
+
+    stats = db.state_cache_stats()
+    assert stats["hits"] + stats["misses"] == 4 * 2 * peeks_per_thread
+
+
+def test_initialize_records_schema_version_and_indexes_identifier_lookups(tmp_path):
+    db = AppDatabase(str(tmp_path / "app.db"))
+    db.initialize()
+    db.initialize()
+    db.upsert_target("1", username="alpha", label="first")
+    db.upsert_target("2", username="first")
+    # Created first, so an unordered scan would meet its username and label before user 3's id.
+    db.upsert_target("9", username="3", label="3")
+    db.upsert_target("3", username="gamma")
+
+    assert migrations.schema_version(db._conn) == migrations.SCHEMA_VERSION
+    assert db.get_target("@alpha").user_id == "1"
+    assert db.get_target("first").user_id == "2"
+    assert db.get_target("3").user_id == "3"
+    assert db.get_target("missing") is None
+    plan = " ".join(
+        row["detail"]
+        for row in db._conn.execute(
+            """
+            EXPLAIN QUERY PLAN
+            SELECT * FROM targets WHERE user_id = ?
+            UNION ALL SELECT * FROM targets WHERE username = ?
+            UNION ALL SELECT * FROM targets WHERE label = ?
+            """,
+            ("x", "x", "x"),
+        ).fetchall()
+    )
+    assert "idx_targets_username" in plan
+    assert "idx_targets_label" in plan
+    assert "SCAN targets" not in plan
+
+
+def test_initialize_moves_follow_event_profiles_into_twitter_users(tmp_path):
+    path = tmp_path / "wide.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE follow_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            target_user_id TEXT NOT NULL,
+            target_username TEXT,
+            target_display_name TEXT,
+            followed_user_id TEXT NOT NULL,
+            followed_username TEXT,
+            followed_display_name TEXT,
+            followed_bio TEXT,
+            followed_profile_image_url TEXT,
+            observed_at TEXT NOT NULL,
+            notified_at TEXT,
+            payload_json TEXT NOT NULL,
+            UNIQUE(target_user_id, followed_user_id)
+        );
+        INSERT INTO follow_events VALUES (1, '10', 'a', 'A', '99', 'old', 'Old', 'old bio', NULL, '2024-01-01', NULL, '{}');
+        INSERT INTO follow_events VALUES (2, '11', 'b', 'B', '99', 'new', 'New', 'new bio', NULL, '2024-01-02', '2024-01-02', '{}');
+        """
+    )
+    conn.commit()
+    conn.close()
+
+    db = AppDatabase(str(path))
+    db.initialize()
+
+    columns = {row[1] for row in db._conn.execute("PRAGMA table_info(follow_events)").fetchall()}
+    assert columns == {"id", "target_user_id", "followed_user_id", "observed_at", "notified_at"}
+    users = db._conn.execute("SELECT user_id, username, bio FROM twitter_users").fetchall()
+    assert [tuple(row) for row in users] == [("99", "new", "new bio")]
+
+    db.upsert_target("11", username="beta")
+    latest = db.recent_follow_events(limit=1)[0]
+    assert latest["target_username"] == "beta"
+    assert latest["followed_username"] == "new"
+    assert latest["followed_bio"] == "new bio"
+    assert db.record_follow_event(FollowEvent(target_user_id="10", followed_user_id="99", observed_at="x")) is None
+
+
+def _database_before_profile_split(path) -> None:
+    conn = sqlite3.connect(path)
+    # Stop at the schema that still kept followed-user profiles on follow_events.
+    for version, migration in enumerate(migrations.MIGRATIONS[:4], start=1):
+        with closing(conn.cursor()) as cur:
+            migration(cur)
+            cur.execute(f"PRAGMA user_version = {version}")
+    conn.execute(
+        "INSERT INTO follow_events (target_user_id, followed_user_id, followed_bio, observed_at, payload_json)"
+        " VALUES ('10', '99', 'bio', '2024-01-01', '{}')"
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_interrupted_migration_rolls_back_with_its_version(tmp_path, monkeypatch):
+    path = tmp_path / "app.db"
+    _database_before_profile_split(path)
+
+    class CrashBeforeRename:
+        def __init__(self, cur):
+            self.cur = cur
+
+        def execute(self, sql, *args):
+            if "RENAME TO follow_events" in sql:
+                raise KeyboardInterrupt
+            return self.cur.execute(sql, *args)
+
+    real_normalize = migrations._normalize_followed_profiles
+    crashing = list(migrations.MIGRATIONS)
+    crashing[4] = lambda cur: real_normalize(CrashBeforeRename(cur))
+    monkeypatch.setattr(migrations, "MIGRATIONS", crashing)
+    conn = sqlite3.connect(path)
+    try:
+        migrations.apply_migrations(conn)
+    except KeyboardInterrupt:
+        pass
+    assert migrations.schema_version(conn) == 4
+    assert conn.execute("SELECT followed_bio FROM follow_events").fetchall() == [("bio",)]
+    conn.close()
+
+    monkeypatch.undo()
+    db = AppDatabase(str(path))
+    db.initialize()
+    assert migrations.schema_version(db._conn) == migrations.SCHEMA_VERSION
+    assert [tuple(row) for row in db._conn.execute("SELECT target_user_id, followed_user_id FROM follow_events")] == [
+        ("10", "99")
+    ]
+    assert db._conn.execute("SELECT bio FROM twitter_users").fetchone()[0] == "bio"
+
+
+def test_worker_refresh_keeps_a_running_cooldown_and_clears_an_expired_one(tmp_path):
+    db = AppDatabase(str(tmp_path / "app.db"))
+    db.initialize()
+    healthy = {"username": "worker-1", "active": True}
+    db.upsert_worker_health(healthy)
+
+    db.set_worker_cooldown("worker-1", "2999-01-01T00:00:00+00:00", 1, "429")
+    db.upsert_worker_health(healthy)
+    assert db.list_worker_health()[0].cooldown_until == "2999-01-01T00:00:00+00:00"
+
+    db.set_worker_cooldown("worker-1", "2000-01-01T00:00:00+00:00", 1, "429")
+    db.upsert_worker_health(healthy)
+    [record] = db.list_worker_health()
+    assert record.cooldown_until is None
+    assert record.is_healthy
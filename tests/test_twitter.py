@@ -0,0 +1,113 @@
+from types import SimpleNamespace
+
+import pytest
+
+from tw_alpha_scraper.twitter import TwitterClient, TwitterClientError, TwitterRateLimitError
+from tw_alpha_scraper.workers import is_rate_limit_error
+
+
+class FakeAPI:
+    def __init__(self):
+        self.calls: list[str] = []
+        self.users = {"alpha": SimpleNamespace(id=100, username="alpha", name="Alpha", friendsCount=7)}
+
+    async def user_by_login(self, username):
+        self.calls.append(username)
+        return self.users.get(username)
+
+    async def following(self, user_id):
+        for user in self.users.values():
+            yield user
+
+
+def make_client(api: FakeAPI, keep_raw: bool = False) -> TwitterClient:
+    client = TwitterClient(keep_raw=keep_raw)
+    client._api = api
+    return client
+
+
+@pytest.mark.asyncio
+async def test_following_scan_drops_raw_models_unless_asked_to_keep_them():
+    api = FakeAPI()
+
+    lean = [user async for user in make_client(api).iter_following("1")]
+    debug = [user async for user in make_client(api, keep_raw=True).iter_following("1")]
+
+    assert lean[0].raw is None
+    assert (lean[0].id, lean[0].username, lean[0].following_count) == ("100", "alpha", 7)
+    assert debug[0].raw is api.users["alpha"]
+
+
+@pytest.mark.asyncio
+async def test_resolve_user_memoizes_the_username_lookup_method():
+    api = FakeAPI()
+    client = make_client(api)
+
+    assert (await client.resolve_user("@alpha")).id == "100"
+    with pytest.raises(TwitterClientError, match="was not found"):
+        await client.resolve_user("@missing")
+    assert client._username_method == "user_by_login"
+    assert api.calls == ["alpha", "missing"]
+
+
+@pytest.mark.asyncio
+async def test_resolve_user_falls_through_when_a_lookup_method_returns_nothing():
+    class SplitAPI(FakeAPI):
+        # Some twscrape releases keep user_by_login around but only answer through the newer name.
+        async def user_by_login(self, username):
+            self.calls.append(f"login:{username}")
+            return None
+
+        async def user_by_username(self, username):
+            self.calls.append(f"username:{username}")
+            return self.users.get(username)
+
+    api = SplitAPI()
+    client = make_client(api)
+
+    assert (await client.resolve_user("@alpha")).id == "100"
+    assert client._username_method == "user_by_username"
+    assert (await client.resolve_user("alpha")).id == "100"
+    assert api.calls == ["login:alpha", "username:alpha", "username:alpha"]
+
+
+class HTTPStatusError(Exception):
+    # Shaped like httpx's: the status lives on the attached response.
+    def __init__(self, status_code: int):
+        super().__init__(f"Server error '{status_code}' for url 'https://x.com/i/api/graphql/1442912345'")
+        self.response = SimpleNamespace(status_code=status_code)
+
+
+@pytest.mark.asyncio
+async def test_twscrape_429s_are_raised_as_rate_limit_errors():
+    class ThrottledAPI(FakeAPI):
+        async def user_by_id(self, user_id):
+            raise HTTPStatusError(429)
+
+        async def following(self, user_id):
+            yield self.users["alpha"]
+            raise HTTPStatusError(429)
+
+    client = make_client(ThrottledAPI())
+
+    with pytest.raises(TwitterRateLimitError) as probe:
+        await client.following_count("1")
+    assert isinstance(probe.value.__cause__, HTTPStatusError)
+    with pytest.raises(TwitterRateLimitError):
+        await client.resolve_user("1")
+    with pytest.raises(TwitterRateLimitError) as scan:
+        [user async for user in client.iter_following("1")]
+    try:
+        raise RuntimeError("fetch following for 1 failed after 1 attempts") from scan.value
+    except RuntimeError as wrapped:
+        assert is_rate_limit_error(wrapped)
+
+
+@pytest.mark.asyncio
+async def test_other_twscrape_errors_pass_through_unchanged():
+    class FailingAPI(FakeAPI):
+        async def user_by_id(self, user_id):
+            raise HTTPStatusError(503)
+
+    with pytest.raises(HTTPStatusError):
+        await make_client(FailingAPI()).following_count("1")
@@ -0,0 +1,80 @@
+from tw_alpha_scraper.twitter import TwitterRateLimitError
+from tw_alpha_scraper.workers import WorkerBudgetManager, WorkerLease, estimate_following_requests, is_rate_limit_error
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def build_manager(clock: FakeClock, **overrides) -> WorkerBudgetManager:
+    options = {"requests_per_window": 2, "window_seconds": 60, "cooldown_seconds": 300, "failure_threshold": 2}
+    options.update(overrides)
+    return WorkerBudgetManager(clock=clock, **options)
+
+
+def test_acquire_spreads_budget_and_defers_when_exhausted():
+    clock = FakeClock()
+    manager = build_manager(clock)
+    manager.sync_accounts([{"username": "a", "active": True}, {"username": "b", "active": True}])
+
+    leases = [manager.acquire() for _ in range(4)]
+    assert sorted(lease.username for lease in leases) == ["a", "a", "b", "b"]
+    assert manager.acquire() is None
+    assert manager.deferred_count == 1
+    assert manager.next_available_at() == 1_060
+
+    clock.now += 60
+    assert manager.acquire() is not None
+
+
+def test_rate_limit_error_puts_account_into_cooldown():
+    clock = FakeClock()
+    manager = build_manager(clock, requests_per_window=10)
+    manager.sync_accounts([{"username": "a", "active": True}])
+
+    lease = manager.acquire()
+    assert manager.release(lease, error=RuntimeError("HTTP 429 Too Many Requests")) is True
+    assert manager.acquire() is None
+    assert manager.snapshot()[0]["cooldown_until"] is not None
+
+    clock.now += 300
+    assert manager.acquire() == WorkerLease(username="a")
+
+
+def test_rate_limit_is_classified_from_the_cause_not_the_target_id():
+    clock = FakeClock()
+    manager = build_manager(clock, requests_per_window=10, failure_threshold=3)
+    manager.sync_accounts([{"username": "a", "active": True}])
+
+    try:
+        try:
+            raise RuntimeError("temporary failure")
+        except RuntimeError as exc:
+            raise RuntimeError("fetch following for 1442912345 failed after 3 attempts: temporary failure") from exc
+    except RuntimeError as wrapped:
+        error = wrapped
+
+    assert is_rate_limit_error(error) is False
+    assert manager.release(manager.acquire(), error=error) is False
+    assert manager.acquire() is not None
+
+    limited = RuntimeError("fetch following for 1442912345 failed")
+    limited.__cause__ = TwitterRateLimitError("throttled")
+    assert is_rate_limit_error(limited) is True
+
+    class StatusError(Exception):
+        status_code = 503
+
+    assert is_rate_limit_error(StatusError("429 in the body")) is False
+
+
+def test_unmanaged_pool_and_request_estimate():
+    manager = build_manager(FakeClock())
+
+    assert manager.acquire() == WorkerLease(username=None)
+    assert estimate_following_requests(0) == 1
+    assert estimate_following_requests(41) == 3
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, TypeVar
+
+from .storage import AppDatabase
+
+T = TypeVar("T")
+
+# AppDatabase methods that never write; everything else goes through the writer thread.
+READ_METHODS = frozenset(
+    {
+        "list_targets",
+        "list_due_targets",
+        "get_target",
+        "recent_followed_user_ids",
+        "recent_follow_events",
+        "pending_alerts",
+        "lookup_twitter_user",
+        "next_alert_due_at",
+        "count_pending_alerts",
+        "slowest_targets",
+        "list_worker_health",
+        "list_shard_members",
+        "build_runtime_snapshot",
+        "export_status",
+    }
+)
+
+
+class AsyncAppDatabase:
+    """Awaitable view of an AppDatabase that keeps SQLite off the event loop.
+
+    Writes run one at a time on a dedicated writer thread that owns the wrapped
+    connection, so they keep their ordering. Reads run on a small pool of
+    read-only connections; in WAL mode they see every write that has already
+    been awaited. Every AppDatabase method is available under the same name as
+    a coroutine. monitor_state reads are answered from the writer's state cache
+    without leaving the loop whenever the key is cached.
+    """
+
+    def __init__(self, database: AppDatabase, read_pool_size: int = 2) -> None:
+        self.database = database
+        self.read_pool_size = read_pool_size if str(database.path) != ":memory:" else 0
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="storage-writer")
+        self._readers = (
+            ThreadPoolExecutor(max_workers=self.read_pool_size, thread_name_prefix="storage-reader")
+            if self.read_pool_size
+            else None
+        )
+        self._local = threading.local()
+        self._reader_connections: list[AppDatabase] = []
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        method = getattr(AppDatabase, name, None)
+        if method is None or name.startswith("_") or not callable(method):
+            raise AttributeError(name)
+        run = self.read if name in READ_METHODS else self.write
+
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            return await run(lambda db: getattr(db, name)(*args, **kwargs))
+
+        call.__name__ = name
+        return call
+
+    async def get_state(self, key: str, default: Any = None) -> Any:
+        found, value = self.database.peek_state(key, default)
+        if found:
+            return value
+        return await self.write(lambda db: db.load_state(key, default))
+
+    async def is_paused(self) -> bool:
+        return bool(await self.get_state("paused", False))
+
+    async def write(self, action: Callable[[AppDatabase], T]) -> T:
+        """Run ``action`` on the writer connection. Use it to group several writes in one transaction."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer, action, self.database)
+
+    async def read(self, action: Callable[[AppDatabase], T]) -> T:
+        if self._readers is None:
+            return await self.write(action)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, partial(self._run_read, action))
+
+    def _run_read(self, action: Callable[[AppDatabase], T]) -> T:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = AppDatabase(str(self.database.path), read_only=True)
+            self._local.connection = connection
+            with self._lock:
+                self._reader_connections.append(connection)
+        return action(connection)
+
+    def close(self) -> None:
+        if self._readers is not None:
+            self._readers.shutdown(wait=True)
+        self._writer.shutdown(wait=True)
+        with self._lock:
+            for connection in self._reader_connections:
+                connection.close()
+            self._reader_connections.clear()
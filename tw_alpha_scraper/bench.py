@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Sequence
+
+from .models import AppConfig, DiscordSettings, MonitorSettings, ResolvedUser, StorageSettings, TargetRecord
+from .service import AlphaMonitorService
+from .simulator import SimulatedTwitterClient, SimulationSettings
+from .storage import AppDatabase
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+# Synthetic target IDs start here so they never collide with the simulator's follow IDs.
+FIRST_TARGET_ID = 1_000_000
+# A 429 cools a worker down for this share of the run, not for the production default of 15
+# minutes, which would idle the pool for the rest of any short run after one burst.
+COOLDOWN_SHARE_OF_RUN = 0.1
+
+
+@dataclass(slots=True)
+class BenchOptions:
+    targets: int = 1000
+    duration_seconds: float = 60.0
+    poll_interval_seconds: int = 60
+    concurrency: int = 32
+    requests_per_window: int = 100_000
+    change_probe: bool = False
+    db_path: str | None = None
+    simulation: SimulationSettings = field(default_factory=SimulationSettings)
+
+
+@dataclass(slots=True)
+class BenchReport:
+    targets: int
+    duration_seconds: float
+    setup_seconds: float
+    syncs: int
+    skipped_syncs: int
+    failed_syncs: int
+    deferred_syncs: int
+    syncs_per_second: float
+    twitter_requests: int
+    rate_limited_requests: int
+    banned_workers: int
+    follows_arrived: int
+    alerts_delivered: int
+    alerts_pending: int
+    alert_latency_ms: dict[str, float | None]
+    sqlite_commits: int
+    cpu_seconds: float
+    cpu_percent: float
+    peak_rss_mib: float | None
+    loop_max_lag_ms: float
+
+
+class _RecordingNotifier:
+    """Accepts every alert and measures how long after the simulated follow it arrived."""
+
+    def __init__(self, twitter: SimulatedTwitterClient) -> None:
+        self.twitter = twitter
+        self.webhook_url = "https://bench.invalid/webhook"
+        self.latencies: list[float] = []
+
+    async def send_follow_alerts(
+        self,
+        alerts: Sequence[tuple[TargetRecord, ResolvedUser]],
+        webhook_url: str | None = None,
+    ) -> bool:
+        now = time.time()
+        for target, followed_user in alerts:
+            arrived_at = self.twitter.arrivals.get((target.user_id, followed_user.id))
+            if arrived_at is not None:
+                self.latencies.append(now - arrived_at)
+        return True
+
+
+def _percentiles(values: list[float]) -> dict[str, float | None]:
+    if not values:
+        return {"p50": None, "p95": None, "max": None}
+    ordered = sorted(values)
+
+    def pick(fraction: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 1)
+
+    return {"p50": pick(0.5), "p95": pick(0.95), "max": round(ordered[-1] * 1000, 1)}
+
+
+def _peak_rss_mib() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return round(peak / 1024 if peak < 1 << 32 else peak / (1024 * 1024), 1)
+
+
+def bench_cooldown_seconds(duration_seconds: float) -> int:
+    return max(1, round(duration_seconds * COOLDOWN_SHARE_OF_RUN))
+
+
+async def run_bench(options: BenchOptions, logger: logging.Logger | None = None) -> BenchReport:
+    """Run the real monitor loop against the simulator for ``duration_seconds``; no network needed."""
+    logger = logger or logging.getLogger("tw_alpha_scraper.bench")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = options.db_path or str(Path(tmp) / "bench.db")
+        setup_started = time.perf_counter()
+        db = AppDatabase(db_path)
+        db.initialize()
+        with db.transaction():
+            for index in range(options.targets):
+                user_id = str(FIRST_TARGET_ID + index)
+                db.upsert_target(user_id, username=f"target{user_id}", display_name=f"Target {user_id}")
+        twitter = SimulatedTwitterClient(options.simulation)
+        notifier = _RecordingNotifier(twitter)
+        config = AppConfig(
+            discord=DiscordSettings(alert_webhook_url=notifier.webhook_url),
+            monitor=MonitorSettings(
+                default_poll_interval_seconds=options.poll_interval_seconds,
+                target_jitter_min_seconds=0.0,
+                target_jitter_max_seconds=0.0,
+                scheduler_tick_seconds=1,
+                retry_base_delay_seconds=0.5,
+                max_concurrent_syncs=options.concurrency,
+                worker_requests_per_window=options.requests_per_window,
+                worker_cooldown_seconds=bench_cooldown_seconds(options.duration_seconds),
+                change_probe_enabled=options.change_probe,
+            ),
+            storage=StorageSettings(app_db_path=db_path),
+        )
+        service = AlphaMonitorService(config, db, twitter_client=twitter, notifier=notifier, logger=logger)
+        await service.initialize()
+        setup_seconds = time.perf_counter() - setup_started
+
+        commits_before = db.commit_count
+        cpu_started = time.process_time()
+        started = time.perf_counter()
+        monitor = asyncio.create_task(service.run_forever(), name="bench-monitor")
+        await asyncio.sleep(options.duration_seconds)
+        await service.shutdown()
+        await monitor
+        elapsed = time.perf_counter() - started
+        cpu_seconds = time.process_time() - cpu_started
+
+        syncs = service.metrics.syncs
+        completed = int(syncs.value("ok") + syncs.value("skipped"))
+        accounts = await twitter.list_accounts()
+        report = BenchReport(
+            targets=options.targets,
+            duration_seconds=round(elapsed, 2),
+            setup_seconds=round(setup_seconds, 2),
+            syncs=completed,
+            skipped_syncs=int(syncs.value("skipped")),
+            failed_syncs=int(syncs.value("error")),
+            deferred_syncs=service.workers.deferred_count,
+            syncs_per_second=round(completed / elapsed, 1) if elapsed else 0.0,
+            twitter_requests=twitter.requests,
+            rate_limited_requests=twitter.rate_limited,
+            banned_workers=sum(1 for account in accounts if not account["active"]),
+            follows_arrived=len(twitter.arrivals),
+            alerts_delivered=len(notifier.latencies),
+            alerts_pending=db.count_pending_alerts(),
+            alert_latency_ms=_percentiles(notifier.latencies),
+            sqlite_commits=db.commit_count - commits_before,
+            cpu_seconds=round(cpu_seconds, 2),
+            cpu_percent=round(100 * cpu_seconds / elapsed, 1) if elapsed else 0.0,
+            peak_rss_mib=_peak_rss_mib(),
+            loop_max_lag_ms=service.loop_watchdog.snapshot()["max_lag_ms"],
+        )
+        service.async_storage.close()
+        db.close()
+    return report
+
+
+def _with_unit(value: float | None, unit: str) -> str:
+    return "n/a" if value is None else f"{value}{unit}"
+
+
+def format_report(report: BenchReport) -> str:
+    latency: dict[str, Any] = report.alert_latency_ms
+    lines = [
+        f"targets:          {report.targets} (setup {report.setup_seconds}s)",
+        f"duration:         {report.duration_seconds}s",
+        f"syncs:            {report.syncs} ({report.syncs_per_second}/s, {report.skipped_syncs} skipped by probe, "
+        f"{report.failed_syncs} failed, {report.deferred_syncs} deferred for worker budget)",
+        f"twitter requests: {report.twitter_requests} ({report.rate_limited_requests} rate limited, "
+        f"{report.banned_workers} workers banned)",
+        f"alerts:           {report.alerts_delivered} delivered of {report.follows_arrived} follows, "
+        f"{report.alerts_pending} pending",
+        f"alert latency:    p50 {_with_unit(latency['p50'], 'ms')}, p95 {_with_unit(latency['p95'], 'ms')}, "
+        f"max {_with_unit(latency['max'], 'ms')}",
+        f"sqlite commits:   {report.sqlite_commits}",
+        f"cpu:              {report.cpu_seconds}s ({report.cpu_percent}%)",
+        f"peak rss:         {_with_unit(report.peak_rss_mib, ' MiB')}",
+        f"loop max lag:     {report.loop_max_lag_ms}ms",
+    ]
+    return "\n".join(lines)
@@ -74,7 +74,7 @@ class DiscordAdminBot:
         async def target_list(interaction: Any) -> None:
             if not await self._authorize(interaction):
                 return
-            rows = self.service.storage.list_targets()
+            rows = await self.service.async_storage.list_targets()
             if not rows:
                 message = "No targets configured."
             else:
@@ -1,19 +1,14 @@
 from __future__ import annotations
 
 import argparse
-import asyncio
 import json
-import signal
-from dataclasses import asdict
-from pathlib import Path
-from typing import Sequence
+from typing import TYPE_CHECKING, Sequence
 
-from .accounts import run_account_command_sync
-from .bot import DiscordAdminBot
-from .config import load_config
-from .logging_utils import setup_logging
-from .service import AlphaMonitorService
-from .storage import AppDatabase
+# Subcommands run from cron and health probes, so each one imports only what it uses:
+# asyncio and the service stack load for commands that need them, discord.py when the bot
+# starts, and twscrape on the first Twitter call (see TwitterClient._ensure_api).
+if TYPE_CHECKING:
+    from .service import AlphaMonitorService
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -37,12 +32,53 @@ def build_parser() -> argparse.ArgumentParser:
         help="Deliver Discord alerts for newly found follows.",
     )
 
+    archive_parser = subparsers.add_parser(
+        "archive-events",
+        help="Move old follow events and admin actions into compressed monthly archives.",
+    )
+    archive_parser.add_argument(
+        "--vacuum",
+        action="store_true",
+        help="Run a full VACUUM afterwards instead of an incremental one.",
+    )
+
+    archived_parser = subparsers.add_parser("archived-events", help="Print archived rows as NDJSON.")
+    archived_parser.add_argument("--table", choices=["follow_events", "admin_actions"], default="follow_events")
+    archived_parser.add_argument("--since", default=None, help="Inclusive ISO timestamp or prefix, e.g. 2024-03")
+    archived_parser.add_argument("--until", default=None, help="Exclusive ISO timestamp or prefix")
+    archived_parser.add_argument("--target", default=None, help="Only rows for this target user ID")
+    archived_parser.add_argument("--limit", type=int, default=None)
+
     run_parser = subparsers.add_parser("run", help="Run monitor loop and Discord admin bot.")
     run_parser.add_argument(
         "--without-bot",
         action="store_true",
         help="Run the monitor loop without starting the Discord bot.",
     )
+    run_parser.add_argument(
+        "--sharded",
+        action="store_true",
+        help="Share targets with other processes using the same database through leases.",
+    )
+
+    bench_parser = subparsers.add_parser(
+        "bench",
+        help="Load-test the monitor against a simulated Twitter backend; needs no network or config.",
+    )
+    bench_parser.add_argument("--targets", type=int, default=1000)
+    bench_parser.add_argument("--duration", type=float, default=60.0, help="Seconds to run the monitor loop")
+    bench_parser.add_argument("--poll-interval", type=int, default=60, help="Seconds between polls of a target")
+    bench_parser.add_argument("--concurrency", type=int, default=32, help="max_concurrent_syncs")
+    bench_parser.add_argument("--workers", type=int, default=10, help="Simulated worker accounts")
+    bench_parser.add_argument("--requests-per-window", type=int, default=100_000, help="Budget per worker")
+    bench_parser.add_argument("--follows-per-hour", type=float, default=2.0, help="New follows per target")
+    bench_parser.add_argument("--page-latency-ms", type=float, default=150.0)
+    bench_parser.add_argument("--rate-limit-probability", type=float, default=0.0, help="Chance a page starts a 429 burst")
+    bench_parser.add_argument("--ban-probability", type=float, default=0.0, help="Chance a page gets its worker banned")
+    bench_parser.add_argument("--change-probe", action="store_true", help="Enable the following-count probe")
+    bench_parser.add_argument("--seed", type=int, default=None)
+    bench_parser.add_argument("--db", default=None, help="Keep the bench database at this path")
+    bench_parser.add_argument("--json", action="store_true", help="Print the report as JSON")
 
     accounts_parser = subparsers.add_parser("accounts", help="Manage twscrape worker accounts.")
     accounts_subparsers = accounts_parser.add_subparsers(dest="account_command", required=True)
@@ -58,28 +94,52 @@ def main(argv: Sequence[str] | None = None) -> int:
     args = parser.parse_args(argv)
 
     if args.command == "accounts":
+        from .accounts import run_account_command_sync
+
         return run_account_command_sync(args.account_command)
+    if args.command == "bench":
+        return _run_bench(args)
+
+    from .config import load_config
 
     config = load_config(config_path=args.config, env_path=args.env_file)
-    logger = setup_logging(config.storage.log_file_path)
+    if args.command == "archived-events":
+        return _print_archived_events(config.storage.archive_dir, args)
+    if getattr(args, "sharded", False):
+        config.monitor.sharding_enabled = True
+
+    from .logging_utils import setup_logging
+    from .storage import AppDatabase
+
+    logger = setup_logging(config.storage.log_file_path, config.storage.log_format)
     storage = AppDatabase(config.storage.app_db_path)
-    service = AlphaMonitorService(config=config, storage=storage, logger=logger)
+    if args.command == "init-db":
+        try:
+            storage.initialize()
+            storage.seed_targets(config.targets)
+        finally:
+            storage.close()
+        print(f"Initialized database at {config.storage.app_db_path}")
+        return 0
+
+    import asyncio
 
+    from .service import AlphaMonitorService
+
+    service = AlphaMonitorService(config=config, storage=storage, logger=logger)
     try:
-        if args.command == "init-db":
-            service.storage.initialize()
-            service.storage.seed_targets(config.targets)
-            print(f"Initialized database at {config.storage.app_db_path}")
-            return 0
         if args.command == "migrate-state":
             return asyncio.run(_migrate_state(service, args.state_file or config.storage.legacy_state_path))
         if args.command == "health-check":
             return asyncio.run(_health_check(service))
+        if args.command == "archive-events":
+            return asyncio.run(_archive_events(service, args.vacuum))
         if args.command == "sync-target":
             return asyncio.run(_sync_target(service, args.identifier, args.send_alerts))
         if args.command == "run":
             return asyncio.run(_run_service(service, include_bot=not args.without_bot))
     finally:
+        service.async_storage.close()
         storage.close()
 
     parser.error(f"Unknown command: {args.command}")
@@ -87,6 +147,8 @@ def main(argv: Sequence[str] | None = None) -> int:
 
 
 async def _migrate_state(service: AlphaMonitorService, state_file: str) -> int:
+    from pathlib import Path
+
     await service.initialize()
     path = Path(state_file)
     if not path.exists():
@@ -110,20 +172,87 @@ async def _health_check(service: AlphaMonitorService) -> int:
     return 0
 
 
+async def _archive_events(service: AlphaMonitorService, vacuum: bool) -> int:
+    from dataclasses import asdict
+
+    await service.initialize()
+    result = await service.run_retention(vacuum=vacuum)
+    print(json.dumps(asdict(result), indent=2))
+    return 0
+
+
+def _print_archived_events(archive_dir: str, args: argparse.Namespace) -> int:
+    from .retention import read_archive
+
+    rows = read_archive(archive_dir, table=args.table, since=args.since, until=args.until, target_user_id=args.target)
+    for index, row in enumerate(rows):
+        if args.limit is not None and index >= args.limit:
+            break
+        print(json.dumps(row))
+    return 0
+
+
 async def _sync_target(service: AlphaMonitorService, identifier: str, send_alerts: bool) -> int:
+    import time
+    from dataclasses import asdict
+
     await service.initialize()
     result = await service.sync_target(identifier, send_alerts=send_alerts)
-    print(json.dumps(asdict(result), indent=2, default=str))
+    payload = asdict(result)
+    if send_alerts:
+        # No outbox worker runs for a one-off sync, so deliver what is due before exiting.
+        notify_started = time.perf_counter()
+        payload["delivered_count"] = await service.outbox.deliver_pending()
+        payload["timings_ms"]["notify"] = round((time.perf_counter() - notify_started) * 1000, 2)
+    print(json.dumps(payload, indent=2, default=str))
+    return 0
+
+
+def _run_bench(args: argparse.Namespace) -> int:
+    import asyncio
+    import logging
+    from dataclasses import asdict
+
+    from .bench import BenchOptions, format_report, run_bench
+    from .simulator import SimulationSettings
+
+    options = BenchOptions(
+        targets=args.targets,
+        duration_seconds=args.duration,
+        poll_interval_seconds=args.poll_interval,
+        concurrency=args.concurrency,
+        requests_per_window=args.requests_per_window,
+        change_probe=args.change_probe,
+        db_path=args.db,
+        simulation=SimulationSettings(
+            follows_per_hour=args.follows_per_hour,
+            page_latency_seconds=args.page_latency_ms / 1000,
+            rate_limit_probability=args.rate_limit_probability,
+            ban_probability=args.ban_probability,
+            workers=args.workers,
+            seed=args.seed,
+        ),
+    )
+    # Simulated 429s and bans would flood the console with retry warnings.
+    logger = logging.getLogger("tw_alpha_scraper.bench")
+    logger.setLevel(logging.CRITICAL)
+    report = asyncio.run(run_bench(options, logger))
+    print(json.dumps(asdict(report), indent=2) if args.json else format_report(report))
     return 0
 
 
 async def _run_service(service: AlphaMonitorService, include_bot: bool) -> int:
+    import asyncio
+    import signal
+
     await service.initialize()
     monitor_task = asyncio.create_task(service.run_forever(), name="monitor-loop")
-    bot: DiscordAdminBot | None = None
+    bot = None
     tasks = [monitor_task]
 
     if include_bot and service.config.discord.bot_token:
+        from .bot import DiscordAdminBot
+
         bot = DiscordAdminBot(service)
         tasks.append(asyncio.create_task(bot.start(), name="discord-bot"))
 
@@ -5,7 +5,7 @@ import os
 from pathlib import Path
 from typing import Any
 
-from .models import AppConfig, DiscordSettings, MonitorSettings, StorageSettings, TargetConfig
+from .models import AppConfig, DiscordSettings, MonitorSettings, StorageSettings, TargetConfig, WebhookRoute
 
 
 def _load_dotenv(path: Path) -> dict[str, str]:
@@ -84,6 +84,31 @@ def _parse_targets(raw_targets: list[Any] | None) -> list[TargetConfig]:
     return targets
 
 
+def _parse_str_list(value: Any) -> tuple[str, ...]:
+    if value in (None, "", []):
+        return ()
+    if isinstance(value, (list, tuple)):
+        return tuple(str(item) for item in value)
+    return tuple(item.strip() for item in str(value).split(",") if item.strip())
+
+
+def _parse_routes(raw_routes: list[Any] | None) -> list[WebhookRoute]:
+    routes: list[WebhookRoute] = []
+    for index, raw in enumerate(raw_routes or [], start=1):
+        if not isinstance(raw, dict):
+            continue
+        routes.append(
+            WebhookRoute(
+                # The name keys queued deliveries, so renaming a route drops its pending alerts.
+                name=str(raw.get("name") or f"route-{index}"),
+                webhook_url=raw.get("webhook_url"),
+                targets=_parse_str_list(raw.get("targets")),
+                labels=_parse_str_list(raw.get("labels")),
+            )
+        )
+    return routes
+
+
 def load_config(config_path: str | None = None, env_path: str | None = None) -> AppConfig:
     config_path_value = config_path or os.getenv("TW_ALPHA_CONFIG_PATH", "config.json")
     env_path_value = env_path or os.getenv("TW_ALPHA_ENV_PATH", ".env")
@@ -132,6 +157,75 @@ def load_config(config_path: str | None = None, env_path: str | None = None) ->
                 discord_data.get("admin_role_ids"),
             )
         ),
+        webhook_timeout_seconds=_parse_float(
+            _env_or_data(
+                "DISCORD_WEBHOOK_TIMEOUT_SECONDS",
+                discord_data,
+                merged_env,
+                discord_data.get("webhook_timeout_seconds", 15.0),
+            ),
+            15.0,
+        )
+        or 15.0,
+        webhook_connect_timeout_seconds=_parse_float(
+            _env_or_data(
+                "DISCORD_WEBHOOK_CONNECT_TIMEOUT_SECONDS",
+                discord_data,
+                merged_env,
+                discord_data.get("webhook_connect_timeout_seconds", 10.0),
+            ),
+            10.0,
+        )
+        or 10.0,
+        webhook_max_connections=_parse_int(
+            _env_or_data(
+                "DISCORD_WEBHOOK_MAX_CONNECTIONS",
+                discord_data,
+                merged_env,
+                discord_data.get("webhook_max_connections", 4),
+            ),
+            4,
+        )
+        or 4,
+        alert_max_attempts=_parse_int(
+            _env_or_data(
+                "DISCORD_ALERT_MAX_ATTEMPTS",
+                discord_data,
+                merged_env,
+                discord_data.get("alert_max_attempts", 8),
+            ),
+            8,
+        )
+        or 8,
+        alert_retry_base_seconds=_parse_float(
+            _env_or_data(
+                "DISCORD_ALERT_RETRY_BASE_SECONDS",
+                discord_data,
+                merged_env,
+                discord_data.get("alert_retry_base_seconds", 5.0),
+            ),
+            5.0,
+        )
+        or 5.0,
+        alert_retry_max_seconds=_parse_float(
+            _env_or_data(
+                "DISCORD_ALERT_RETRY_MAX_SECONDS",
+                discord_data,
+                merged_env,
+                discord_data.get("alert_retry_max_seconds", 900.0),
+            ),
+            900.0,
+        )
+        or 900.0,
+        alert_coalesce_seconds=_parse_float(
+            _env_or_data(
+                "DISCORD_ALERT_COALESCE_SECONDS",
+                discord_data,
+                merged_env,
+                discord_data.get("alert_coalesce_seconds", 2.0),
+            ),
+            2.0,
+        ),
     )
 
     monitor = MonitorSettings(
@@ -233,6 +327,161 @@ def load_config(config_path: str | None = None, env_path: str | None = None) ->
             900,
         )
         or 900,
+        worker_requests_per_window=_parse_int(
+            _env_or_data(
+                "MONITOR_WORKER_REQUESTS_PER_WINDOW",
+                monitor_data,
+                merged_env,
+                monitor_data.get("worker_requests_per_window", 450),
+            ),
+            450,
+        )
+        or 450,
+        worker_window_seconds=_parse_int(
+            _env_or_data(
+                "MONITOR_WORKER_WINDOW_SECONDS",
+                monitor_data,
+                merged_env,
+                monitor_data.get("worker_window_seconds", 900),
+            ),
+            900,
+        )
+        or 900,
+        worker_failure_threshold=_parse_int(
+            _env_or_data(
+                "MONITOR_WORKER_FAILURE_THRESHOLD",
+                monitor_data,
+                merged_env,
+                monitor_data.get("worker_failure_threshold", 3),
+            ),
+            3,
+        )
+        or 3,
+        max_concurrent_syncs=_parse_int(
+            _env_or_data(
+                "MONITOR_MAX_CONCURRENT_SYNCS",
+                monitor_data,
+                merged_env,
+                monitor_data.get("max_concurrent_syncs", 1),
+            ),
+            1,
+        )
+        or 1,
+        streaming_diff=_parse_bool(
+            _env_or_data(
+                "MONITOR_STREAMING_DIFF",
+                monitor_data,
+                merged_env,
+                monitor_data.get("streaming_diff", True),
+            ),
+            True,
+        ),
+        known_run_stop_count=_parse_int(
+            _env_or_data(
+                "MONITOR_KNOWN_RUN_STOP_COUNT",
+                monitor_data,
+                merged_env,
+                monitor_data.get("known_run_stop_count", 3),
+            ),
+            3,
+        ),
+        sharding_enabled=_parse_bool(
+            _env_or_data(
+                "MONITOR_SHARDING_ENABLED",
+                monitor_data,
+                merged_env,
+                monitor_data.get("sharding_enabled", False),
+            )
+        ),
+        shard_owner_id=_env_or_data(
+            "MONITOR_SHARD_OWNER_ID",
+            monitor_data,
+            merged_env,
+            monitor_data.get("shard_owner_id"),
+        )
+        or None,
+        lease_ttl_seconds=_parse_int(
+            _env_or_data(
+                "MONITOR_LEASE_TTL_SECONDS",
+                monitor_data,
+                merged_env,
+                monitor_data.get("lease_ttl_seconds", 120),
+            ),
+            120,
+        )
+        or 120,
+        change_probe_enabled=_parse_bool(
+            _env_or_data(
+                "MONITOR_CHANGE_PROBE_ENABLED",
+                monitor_data,
+                merged_env,
+                monitor_data.get("change_probe_enabled", False),
+            )
+        ),
+        change_probe_max_staleness_seconds=_parse_int(
+            _env_or_data(
+                "MONITOR_CHANGE_PROBE_MAX_STALENESS_SECONDS",
+                monitor_data,
+                merged_env,
+                monitor_data.get("change_probe_max_staleness_seconds", 1800),
+            ),
+            1800,
+        )
+        or 1800,
+        user_cache_ttl_seconds=_parse_int(
+            _env_or_data(
+                "MONITOR_USER_CACHE_TTL_SECONDS",
+                monitor_data,
+                merged_env,
+                monitor_data.get("user_cache_ttl_seconds", 86400),
+            ),
+            86400,
+        ),
+        metrics_enabled=_parse_bool(
+            _env_or_data(
+                "MONITOR_METRICS_ENABLED",
+                monitor_data,
+                merged_env,
+                monitor_data.get("metrics_enabled", False),
+            )
+        ),
+        metrics_host=str(
+            _env_or_data(
+                "MONITOR_METRICS_HOST",
+                monitor_data,
+                merged_env,
+                monitor_data.get("metrics_host", "127.0.0.1"),
+            )
+            or "127.0.0.1"
+        ),
+        metrics_port=_parse_int(
+            _env_or_data(
+                "MONITOR_METRICS_PORT",
+                monitor_data,
+                merged_env,
+                monitor_data.get("metrics_port", 9464),
+            ),
+            9464,
+        ),
+        loop_watchdog_enabled=_parse_bool(
+            _env_or_data(
+                "MONITOR_LOOP_WATCHDOG_ENABLED",
+                monitor_data,
+                merged_env,
+                monitor_data.get("loop_watchdog_enabled", True),
+            ),
+            True,
+        ),
+        loop_stall_threshold_seconds=_parse_float(
+            _env_or_data(
+                "MONITOR_LOOP_STALL_THRESHOLD_SECONDS",
+                monitor_data,
+                merged_env,
+                monitor_data.get("loop_stall_threshold_seconds", 0.5),
+            ),
+            0.5,
+        )
+        or 0.5,
     )
 
     storage = StorageSettings(
@@ -260,8 +509,72 @@ def load_config(config_path: str | None = None, env_path: str | None = None) ->
                 storage_data.get("log_file_path", "logs/tw_alpha_scraper.log"),
             )
         ),
+        log_format=str(
+            _env_or_data(
+                "LOG_FORMAT",
+                storage_data,
+                merged_env,
+                storage_data.get("log_format", "text"),
+            )
+            or "text"
+        ).lower(),
+        archive_dir=str(
+            _env_or_data(
+                "STORAGE_ARCHIVE_DIR",
+                storage_data,
+                merged_env,
+                storage_data.get("archive_dir", "data/archive"),
+            )
+        ),
+        retention_enabled=_parse_bool(
+            _env_or_data(
+                "STORAGE_RETENTION_ENABLED",
+                storage_data,
+                merged_env,
+                storage_data.get("retention_enabled", False),
+            )
+        ),
+        follow_event_retention_days=_parse_int(
+            _env_or_data(
+                "STORAGE_FOLLOW_EVENT_RETENTION_DAYS",
+                storage_data,
+                merged_env,
+                storage_data.get("follow_event_retention_days", 90),
+            ),
+            90,
+        ),
+        admin_action_retention_days=_parse_int(
+            _env_or_data(
+                "STORAGE_ADMIN_ACTION_RETENTION_DAYS",
+                storage_data,
+                merged_env,
+                storage_data.get("admin_action_retention_days", 365),
+            ),
+            365,
+        ),
+        retention_batch_size=_parse_int(
+            _env_or_data(
+                "STORAGE_RETENTION_BATCH_SIZE",
+                storage_data,
+                merged_env,
+                storage_data.get("retention_batch_size", 500),
+            ),
+            500,
+        )
+        or 500,
+        retention_interval_seconds=_parse_int(
+            _env_or_data(
+                "STORAGE_RETENTION_INTERVAL_SECONDS",
+                storage_data,
+                merged_env,
+                storage_data.get("retention_interval_seconds", 21600),
+            ),
+            21600,
+        )
+        or 21600,
     )
 
     targets = _parse_targets(config_payload.get("targets"))
+    routes = _parse_routes(config_payload.get("routes"))
 
-    return AppConfig(discord=discord, monitor=monitor, storage=storage, targets=targets)
+    return AppConfig(discord=discord, monitor=monitor, storage=storage, targets=targets, routes=routes)
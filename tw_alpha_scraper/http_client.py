@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import ssl
+import time
+from dataclasses import dataclass, field
+from typing import Any
+from urllib.parse import urlsplit
+
+DEFAULT_USER_AGENT = "tw_alpha_scraper (https://github.com, 1.0)"
+# Methods that are safe to send twice when a reused socket fails mid-request.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class HTTPClientError(RuntimeError):
+    """Raised when a request cannot be sent or its response cannot be read."""
+
+
+@dataclass(slots=True)
+class HTTPResponse:
+    status: int
+    headers: dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+    elapsed_seconds: float = 0.0
+
+    def json(self) -> Any:
+        return json.loads(self.body) if self.body else None
+
+
+@dataclass(slots=True)
+class _Connection:
+    key: tuple[str, str, int]
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+    idle_since: float = 0.0
+    # Set once this request's bytes were handed to the socket.
+    sent: bool = False
+
+    def usable(self, idle_timeout: float) -> bool:
+        if self.writer.is_closing() or self.reader.at_eof():
+            return False
+        return time.monotonic() - self.idle_since < idle_timeout
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class AsyncHTTPClient:
+    """Minimal HTTP/1.1 client on asyncio streams with keep-alive connection reuse.
+
+    Only the standard library is used, so webhook delivery works without aiohttp or httpx.
+    At most ``max_connections`` requests are in flight at once; idle sockets are kept per
+    host and reused until ``idle_timeout`` passes or the server closes them. When a reused
+    socket turns out to be dead, the request is resent once on a new one, but only if it is
+    idempotent or never reached the socket; a webhook POST is never sent twice.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_connections: int = 4,
+        connect_timeout: float = 10.0,
+        read_timeout: float = 15.0,
+        idle_timeout: float = 60.0,
+        user_agent: str = DEFAULT_USER_AGENT,
+    ) -> None:
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.idle_timeout = idle_timeout
+        self.user_agent = user_agent
+        self._semaphore = asyncio.Semaphore(max(1, max_connections))
+        self._idle: dict[tuple[str, str, int], list[_Connection]] = {}
+        self._ssl_context: ssl.SSLContext | None = None
+        self.connections_opened = 0
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        body: bytes | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> HTTPResponse:
+        parts = urlsplit(url)
+        if parts.scheme not in {"http", "https"} or not parts.hostname:
+            raise HTTPClientError(f"Unsupported URL: {parts.scheme}://{parts.hostname}")
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        key = (parts.scheme, parts.hostname, port)
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        host_header = parts.hostname if parts.port is None else f"{parts.hostname}:{port}"
+        request_bytes = self._encode_request(method, target, host_header, body or b"", headers or {})
+
+        async with self._semaphore:
+            for attempt in (1, 2):
+                connection, reused = await self._acquire(key)
+                connection.sent = False
+                started = time.perf_counter()
+                try:
+                    response, keep_alive = await asyncio.wait_for(
+                        self._exchange(connection, request_bytes, method),
+                        timeout=self.read_timeout,
+                    )
+                except asyncio.TimeoutError as exc:
+                    connection.close()
+                    raise HTTPClientError(f"{method} {parts.hostname} timed out after {self.read_timeout}s") from exc
+                except asyncio.CancelledError:
+                    # Half a request or response may be on the wire, so the socket cannot be pooled.
+                    connection.close()
+                    raise
+                except (OSError, asyncio.IncompleteReadError, ValueError) as exc:
+                    connection.close()
+                    # A pooled socket the server already closed fails before any response; retry on a
+                    # fresh one, unless the server may have acted on a POST it already received.
+                    if reused and attempt == 1 and (method in IDEMPOTENT_METHODS or not connection.sent):
+                        continue
+                    raise HTTPClientError(f"{method} {parts.hostname} failed: {exc}") from exc
+                response.elapsed_seconds = time.perf_counter() - started
+                if keep_alive:
+                    connection.idle_since = time.monotonic()
+                    self._idle.setdefault(key, []).append(connection)
+                else:
+                    connection.close()
+                return response
+        raise HTTPClientError(f"{method} {parts.hostname} failed")  # pragma: no cover
+
+    async def close(self) -> None:
+        for connections in self._idle.values():
+            for connection in connections:
+                connection.close()
+        self._idle.clear()
+
+    async def _acquire(self, key: tuple[str, str, int]) -> tuple[_Connection, bool]:
+        idle = self._idle.get(key, [])
+        while idle:
+            connection = idle.pop()
+            if connection.usable(self.idle_timeout):
+                return connection, True
+            connection.close()
+        scheme, host, port = key
+        ssl_context = None
+        if scheme == "https":
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            ssl_context = self._ssl_context
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port, ssl=ssl_context),
+                timeout=self.connect_timeout,
+            )
+        except (OSError, asyncio.TimeoutError) as exc:
+            raise HTTPClientError(f"Could not connect to {host}:{port}: {exc}") from exc
+        self.connections_opened += 1
+        return _Connection(key=key, reader=reader, writer=writer), False
+
+    def _encode_request(
+        self,
+        method: str,
+        target: str,
+        host: str,
+        body: bytes,
+        headers: dict[str, str],
+    ) -> bytes:
+        merged = {"Host": host, "User-Agent": self.user_agent, "Connection": "keep-alive"}
+        merged.update(headers)
+        merged["Content-Length"] = str(len(body))
+        head = "".join(f"{name}: {value}\r\n" for name, value in merged.items())
+        return f"{method} {target} HTTP/1.1\r\n{head}\r\n".encode("latin-1") + body
+
+    async def _exchange(self, connection: _Connection, request_bytes: bytes, method: str) -> tuple[HTTPResponse, bool]:
+        connection.sent = True
+        connection.writer.write(request_bytes)
+        await connection.writer.drain()
+        reader = connection.reader
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed before response")
+        version, status, *_ = status_line.decode("latin-1").split(" ", 2)
+        headers: dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name = name.strip().lower()
+            value = value.strip()
+            headers[name] = f"{headers[name]}, {value}" if name in headers else value
+
+        status_code = int(status)
+        keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        if method == "HEAD" or status_code in (204, 304) or 100 <= status_code < 200:
+            body = b""
+        elif "chunked" in headers.get("transfer-encoding", "").lower():
+            body = await self._read_chunked(reader)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+            keep_alive = False
+        return HTTPResponse(status=status_code, headers=headers, body=body), keep_alive
+
+    @staticmethod
+    async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+        chunks: list[bytes] = []
+        while True:
+            size_line = await reader.readline()
+            size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+            if size == 0:
+                # Skip trailers up to the blank line.
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import os
+import socket
+import time
+from typing import Any, Callable
+
+from .async_storage import AsyncAppDatabase
+
+# Lease key that lets one shard member at a time drain the shared outbox.
+OUTBOX_LEASE = "__alert_outbox__"
+# Leases that do not stand for a target.
+INTERNAL_LEASES = frozenset({OUTBOX_LEASE})
+
+
+def default_owner_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class ShardCoordinator:
+    """Claims per-target leases in the shared database so several processes can split the targets.
+
+    A lease is only held while its target is being synced. Leases and shard membership carry an
+    expiry that the heartbeat pushes forward, so a dead process stops owning anything after one TTL.
+    """
+
+    def __init__(
+        self,
+        storage: AsyncAppDatabase,
+        owner_id: str | None = None,
+        lease_ttl_seconds: int = 120,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.storage = storage
+        self.owner_id = owner_id or default_owner_id()
+        self.lease_ttl_seconds = max(1, lease_ttl_seconds)
+        self._clock = clock
+        self._owned: set[str] = set()
+
+    @property
+    def heartbeat_interval_seconds(self) -> float:
+        return max(1.0, self.lease_ttl_seconds / 3)
+
+    def _now(self) -> int:
+        return int(self._clock())
+
+    async def join(self) -> None:
+        await self.storage.upsert_shard_member(
+            self.owner_id, socket.gethostname(), os.getpid(), self._now() + self.lease_ttl_seconds
+        )
+
+    async def heartbeat(self) -> None:
+        now = self._now()
+        await self.storage.renew_shard(self.owner_id, now + self.lease_ttl_seconds)
+        await self.storage.prune_expired_shard_state(now)
+
+    async def leave(self) -> None:
+        await self.storage.remove_shard_member(self.owner_id)
+        self._owned.clear()
+
+    async def claim(self, user_id: str) -> bool:
+        now = self._now()
+        if not await self.storage.claim_target_lease(user_id, self.owner_id, now + self.lease_ttl_seconds, now=now):
+            return False
+        self._owned.add(user_id)
+        return True
+
+    async def release(self, user_id: str) -> None:
+        self._owned.discard(user_id)
+        await self.storage.release_target_lease(user_id, self.owner_id)
+
+    async def snapshot(self) -> dict[str, Any]:
+        now = self._now()
+        members = await self.storage.list_shard_members()
+        return {
+            "owner_id": self.owner_id,
+            "lease_ttl_seconds": self.lease_ttl_seconds,
+            "owned_targets": sorted(self._owned - INTERNAL_LEASES),
+            "members": [{**member, "alive": member["expires_at"] > now} for member in members],
+        }
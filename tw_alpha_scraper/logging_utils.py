@@ -1,68 +1,127 @@
 from __future__ import annotations
 
+import atexit
+import copy
+import json
 import logging
+import queue
 import re
-from logging.handlers import RotatingFileHandler
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 
 
-SENSITIVE_PATTERNS = [
-    re.compile(r"https://discord\.com/api/webhooks/[^\s]+"),
-    re.compile(r"(auth_token=)[^;\s]+"),
-    re.compile(r"(ct0=)[^;\s]+"),
-    re.compile(r"(https?://)([^:@/\s]+):([^@/\s]+)@"),
-]
+# One pass over the text instead of one per secret kind: a Twitter session cookie, a webhook
+# URL, or credentials embedded in a proxy URL. The lookahead lets the engine skip positions
+# that cannot start any of them, and the two URL cases share their scheme prefix.
+SENSITIVE_PATTERN = re.compile(
+    r"(?=[ach])(?:"
+    r"(?P<cookie>(?:auth_token|ct0)=)[^;\s]+"
+    r"|(?P<scheme>https?://)(?:(?P<webhook>discord\.com/api/webhooks/[^\s]+)|[^:@/\s]+:[^@/\s]+@)"
+    r")"
+)
+LOG_FORMATS = ("text", "json")
 
 
 def sanitize_text(value: str) -> str:
-    sanitized = value
-    for pattern in SENSITIVE_PATTERNS:
-        sanitized = pattern.sub(lambda match: _replacement(match), sanitized)
-    return sanitized
+    # Every match contains one of these, so most lines never reach the regex.
+    if "://" not in value and "auth_token=" not in value and "ct0=" not in value:
+        return value
+    return SENSITIVE_PATTERN.sub(_replacement, value)
 
 
 def _replacement(match: re.Match[str]) -> str:
-    if match.lastindex and match.group(1):
-        if len(match.groups()) >= 3:
-            return f"{match.group(1)}[REDACTED]:[REDACTED]@"
-        return f"{match.group(1)}[REDACTED]"
-    return "[REDACTED]"
+    if match.group("webhook"):
+        return "[REDACTED]"
+    if match.group("cookie"):
+        return f"{match.group('cookie')}[REDACTED]"
+    return f"{match.group('scheme')}[REDACTED]:[REDACTED]@"
 
 
 class RedactingFormatter(logging.Formatter):
     def format(self, record: logging.LogRecord) -> str:
-        original_msg = record.msg
-        original_args = record.args
-        try:
-            record.msg = sanitize_text(str(record.msg))
-            if record.args:
-                record.args = tuple(sanitize_text(str(arg)) for arg in record.args)
-            return super().format(record)
-        finally:
-            record.msg = original_msg
-            record.args = original_args
-
-
-def setup_logging(log_path: str) -> logging.Logger:
+        # Redacting the finished line covers the message, its arguments and any traceback at once.
+        return sanitize_text(super().format(record))
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per line, with the same redaction as the text format."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": sanitize_text(record.getMessage()),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc"] = sanitize_text(record.exc_text)
+        return json.dumps(payload, ensure_ascii=False)
+
+
+class _DeferredFormatHandler(QueueHandler):
+    """Queues records with their arguments merged and traceback rendered, nothing more.
+
+    Both must happen on the logging thread because arguments and frames can change once it
+    moves on; the line layout and redaction are left to the listener's formatters.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _TRACEBACK_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_TRACEBACK_FORMATTER = logging.Formatter()
+
+
+def start_log_queue(*handlers: logging.Handler) -> tuple[QueueHandler, QueueListener]:
+    """Return a handler that enqueues records and the started listener that feeds ``handlers``."""
+    records: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    return _DeferredFormatHandler(records), listener
+
+
+def setup_logging(log_path: str, log_format: str = "text") -> logging.Logger:
+    """Send log records through a queue to a background thread that redacts and writes them.
+
+    The event loop only pays for enqueueing a record; formatting, redaction, file writes and
+    rotation all happen on the listener thread, which is flushed and stopped at exit.
+    """
     logger = logging.getLogger("tw_alpha_scraper")
     if logger.handlers:
         return logger
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"Unknown log format `{log_format}`; expected one of {', '.join(LOG_FORMATS)}.")
 
     logger.setLevel(logging.INFO)
-    formatter = RedactingFormatter(
-        fmt="%(asctime)s %(levelname)s %(name)s %(message)s",
-        datefmt="%Y-%m-%dT%H:%M:%SZ",
-    )
+    if log_format == "json":
+        formatter: logging.Formatter = JsonLinesFormatter()
+    else:
+        formatter = RedactingFormatter(
+            fmt="%(asctime)s %(levelname)s %(name)s %(message)s",
+            datefmt="%Y-%m-%dT%H:%M:%SZ",
+        )
 
     console = logging.StreamHandler()
     console.setFormatter(formatter)
-    logger.addHandler(console)
 
     log_file = Path(log_path)
     log_file.parent.mkdir(parents=True, exist_ok=True)
     file_handler = RotatingFileHandler(log_file, maxBytes=2_000_000, backupCount=5)
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+
+    queue_handler, listener = start_log_queue(console, file_handler)
+    atexit.register(listener.stop)
+    logger.addHandler(queue_handler)
 
     logger.propagate = False
     return logger
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+from .metrics import MonitorMetrics
+
+# Innermost frames kept from the loop thread's stack when it is caught stalling.
+STALL_STACK_LIMIT = 8
+
+
+@dataclass(slots=True)
+class LoopStall:
+    lag_ms: float
+    at: str
+    task: str | None = None
+    stack: str | None = None
+
+
+@dataclass(slots=True)
+class LoopLagStats:
+    samples: int = 0
+    stalls: int = 0
+    last_lag_ms: float = 0.0
+    max_lag_ms: float = 0.0
+    total_lag_ms: float = 0.0
+    worst: list[tuple[float, int, LoopStall]] = field(default_factory=list)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "samples": self.samples,
+            "stalls": self.stalls,
+            "last_lag_ms": round(self.last_lag_ms, 2),
+            "max_lag_ms": round(self.max_lag_ms, 2),
+            "avg_lag_ms": round(self.total_lag_ms / self.samples, 2) if self.samples else None,
+            "worst_stalls": [
+                {"lag_ms": round(stall.lag_ms, 2), "at": stall.at, "task": stall.task, "stack": stall.stack}
+                for _, _, stall in sorted(self.worst, reverse=True)
+            ],
+        }
+
+
+class LoopWatchdog:
+    """Measures how late the event loop wakes a sleeping task and catches whatever blocks it.
+
+    The monitor loop, the Discord bot and webhook sends share one loop, so anything that holds
+    it (a synchronous SQLite call, a large regex, a slow callback) also delays the bot's gateway
+    heartbeat. Every ``interval_seconds`` the watchdog sleeps and records how late it woke up.
+    A helper thread watches the same heartbeat. When the loop has not come back within
+    ``stall_threshold_seconds``, the thread records the running task and the loop thread's
+    stack, so the culprit is still on the stack when it is captured. The ``max_stalls`` worst
+    stalls are kept and each one is logged.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        *,
+        interval_seconds: float = 0.25,
+        stall_threshold_seconds: float = 0.5,
+        max_stalls: int = 10,
+        metrics: MonitorMetrics | None = None,
+    ) -> None:
+        self.logger = logger
+        self.interval_seconds = interval_seconds
+        self.stall_threshold_seconds = stall_threshold_seconds
+        self.max_stalls = max(1, max_stalls)
+        self.metrics = metrics
+        self.stats = LoopLagStats()
+        self._heartbeat = 0.0
+        self._capture: tuple[float, str | None, str | None] | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._stall_sequence = 0
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        stop_thread = threading.Event()
+        watcher = threading.Thread(target=self._watch, args=(stop_thread,), name="loop-watchdog", daemon=True)
+        self._heartbeat = time.monotonic()
+        watcher.start()
+        try:
+            while not stop_event.is_set():
+                scheduled = time.monotonic()
+                self._heartbeat = scheduled
+                await asyncio.sleep(self.interval_seconds)
+                self._record(scheduled, max(0.0, time.monotonic() - scheduled - self.interval_seconds))
+        finally:
+            stop_thread.set()
+            watcher.join(timeout=1.0)
+
+    def snapshot(self) -> dict[str, Any]:
+        return self.stats.snapshot()
+
+    def _record(self, scheduled: float, lag: float) -> None:
+        stats = self.stats
+        lag_ms = lag * 1000
+        stats.samples += 1
+        stats.last_lag_ms = lag_ms
+        stats.max_lag_ms = max(stats.max_lag_ms, lag_ms)
+        stats.total_lag_ms += lag_ms
+        if self.metrics is not None:
+            self.metrics.loop_lag_seconds.observe(lag)
+        if lag < self.stall_threshold_seconds:
+            return
+
+        capture = self._capture
+        task, stack = (capture[1], capture[2]) if capture is not None and capture[0] == scheduled else (None, None)
+        stall = LoopStall(
+            lag_ms=lag_ms,
+            at=datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+            task=task,
+            stack=stack,
+        )
+        stats.stalls += 1
+        if self.metrics is not None:
+            self.metrics.loop_stalls.inc()
+        self._stall_sequence += 1
+        entry = (lag_ms, self._stall_sequence, stall)
+        if len(stats.worst) < self.max_stalls:
+            heapq.heappush(stats.worst, entry)
+        elif lag_ms > stats.worst[0][0]:
+            heapq.heapreplace(stats.worst, entry)
+        self.logger.warning(
+            "Event loop stalled for %.0f ms in %s%s",
+            lag_ms,
+            task or "an unknown task",
+            f"\n{stack}" if stack else "",
+        )
+
+    def _watch(self, stop_thread: threading.Event) -> None:
+        poll_seconds = max(0.005, self.stall_threshold_seconds / 4)
+        while not stop_thread.wait(poll_seconds):
+            heartbeat = self._heartbeat
+            overdue = time.monotonic() - heartbeat - self.interval_seconds
+            if overdue < self.stall_threshold_seconds or (self._capture and self._capture[0] == heartbeat):
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id) if self._loop_thread_id else None
+            stack = "".join(traceback.format_stack(frame, limit=STALL_STACK_LIMIT)) if frame is not None else None
+            self._capture = (heartbeat, self._describe_current_task(), stack)
+
+    def _describe_current_task(self) -> str | None:
+        # Reading another thread's current task is racy, but only ever used for this report.
+        try:
+            task = asyncio.current_task(self._loop) if self._loop is not None else None
+        except RuntimeError:
+            return None
+        if task is None:
+            return "a callback outside any task"
+        return f"{task.get_name()} ({task.get_coro()!r})"
@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import threading
+from bisect import bisect_left
+from typing import Awaitable, Callable, Iterator
+
+# Seconds. Sync stages and webhook posts range from milliseconds to a full API timeout.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# SQLite commits in WAL mode usually finish well under a millisecond.
+FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+# A healthy loop wakes within a millisecond or two; Discord drops the gateway after tens of seconds.
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._lock = threading.Lock()
+
+    def _key(self, label_values: tuple[str, ...]) -> tuple[str, ...]:
+        if len(label_values) != len(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {label_values}")
+        return tuple(str(value) for value in label_values)
+
+    def lines(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} {self.kind}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> None:
+        super().__init__(name, help_text, labels)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        key = self._key(label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set_total(self, value: float, *label_values: str) -> None:
+        """Mirror a count that is already kept elsewhere, such as ``OutboxStats``."""
+        key = self._key(label_values)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(self._key(label_values), 0.0)
+
+    def lines(self) -> Iterator[str]:
+        yield from super().lines()
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, *label_values: str) -> None:
+        self.set_total(value, *label_values)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class _HistogramSeries:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self, size: int) -> None:
+        self.counts = [0] * size
+        self.total = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram. ``observe`` is a bisect and three additions under a lock."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple[str, ...], _HistogramSeries] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        key = self._key(label_values)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _HistogramSeries(len(self.buckets) + 1)
+            series.counts[index] += 1
+            series.total += value
+            series.count += 1
+
+    def count(self, *label_values: str) -> int:
+        series = self._series.get(self._key(label_values))
+        return series.count if series is not None else 0
+
+    def lines(self) -> Iterator[str]:
+        yield from super().lines()
+        with self._lock:
+            snapshot = sorted(
+                (key, list(series.counts), series.total, series.count) for key, series in self._series.items()
+            )
+        for key, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, math.inf), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labels, key)} {count}"
+
+
+class MetricsRegistry:
+    """Named instruments rendered in the Prometheus text exposition format."""
+
+    def __init__(self, prefix: str = "tw_alpha_") -> None:
+        self.prefix = prefix
+        self._metrics: dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric `{metric.name}` is already registered.")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(self.prefix + name, help_text, labels))  # type: ignore[return-value]
+
+    def gauge(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(self.prefix + name, help_text, labels))  # type: ignore[return-value]
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(self.prefix + name, help_text, labels, buckets))  # type: ignore[return-value]
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics.values() for line in metric.lines()) + "\n"
+
+
+class MonitorMetrics:
+    """The instruments the monitor records into.
+
+    Hot paths only observe histograms and bump counters. Values that are already tracked
+    elsewhere (outbox and notifier stats, worker budgets, the due heap) are copied into
+    gauges by ``AlphaMonitorService.collect_metrics`` when the endpoint is scraped.
+    """
+
+    def __init__(self, registry: MetricsRegistry | None = None) -> None:
+        self.registry = registry or MetricsRegistry()
+        metric = self.registry
+        self.sync_seconds = metric.histogram(
+            "sync_stage_seconds", "Time spent in each stage of a target sync.", labels=("stage",)
+        )
+        self.cycle_seconds = metric.histogram(
+            "cycle_seconds", "Duration of monitor cycles that had due targets."
+        )
+        self.cycle_targets = metric.gauge("cycle_targets", "Targets that were due in the last monitor cycle.")
+        self.syncs = metric.counter("syncs_total", "Finished target syncs by outcome.", labels=("outcome",))
+        self.retries = metric.counter(
+            "retries_total", "Twitter calls retried after a failure.", labels=("operation",)
+        )
+        self.retries_exhausted = metric.counter(
+            "retries_exhausted_total", "Twitter calls that failed on every attempt.", labels=("operation",)
+        )
+        self.webhook_seconds = metric.histogram("webhook_request_seconds", "Discord webhook round trip time.")
+        self.webhook_failures = metric.counter(
+            "webhook_failures_total", "Webhook posts that errored or were refused.", labels=("reason",)
+        )
+        self.commit_seconds = metric.histogram(
+            "sqlite_commit_seconds", "Time spent in SQLite commits on the writer connection.", buckets=FAST_BUCKETS
+        )
+        self.scheduled_targets = metric.gauge("scheduled_targets", "Targets in the due heap.")
+        self.due_targets = metric.gauge("due_targets", "Scheduled targets whose due time has passed.")
+        self.pending_alerts = metric.gauge("pending_alerts", "Alert deliveries waiting in the outbox.")
+        self.outbox = metric.counter("outbox_total", "Outbox delivery outcomes.", labels=("outcome",))
+        self.worker_remaining = metric.gauge(
+            "worker_remaining_requests", "Requests left in each worker's window.", labels=("worker",)
+        )
+        self.worker_available = metric.gauge(
+            "worker_available", "1 when a worker can take a sync.", labels=("worker",)
+        )
+        self.worker_failures = metric.gauge(
+            "worker_consecutive_failures", "Consecutive failed syncs per worker.", labels=("worker",)
+        )
+        self.loop_lag_seconds = metric.histogram(
+            "event_loop_lag_seconds", "How late the event loop woke the watchdog.", buckets=LAG_BUCKETS
+        )
+        self.loop_stalls = metric.counter("event_loop_stalls_total", "Event loop lags over the stall threshold.")
+        self.paused = metric.gauge("paused", "1 while the monitor is paused.")
+        self.degraded = metric.gauge("degraded", "1 while the monitor is degraded.")
+
+
+class MetricsServer:
+    """Serves ``GET /metrics`` from a bare asyncio server; meant for a local scraper only."""
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        host: str,
+        port: int,
+        logger: logging.Logger,
+        *,
+        collect: Callable[[], Awaitable[None]] | None = None,
+        read_timeout: float = 5.0,
+    ) -> None:
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.logger = logger
+        self.collect = collect
+        self.read_timeout = read_timeout
+        self._server: asyncio.AbstractServer | None = None
+
+    @property
+    def bound_port(self) -> int | None:
+        if self._server is None or not self._server.sockets:
+            return None
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.logger.info("Serving metrics on http://%s:%s/metrics", self.host, self.bound_port)
+
+    async def close(self) -> None:
+        if self._server is None:
+            return
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=self.read_timeout)
+            while True:
+                header = await asyncio.wait_for(reader.readline(), timeout=self.read_timeout)
+                if header in (b"\r\n", b"\n", b""):
+                    break
+            parts = request_line.decode("latin-1").split()
+            path = parts[1].split("?", 1)[0] if len(parts) >= 2 else ""
+            if len(parts) < 2 or parts[0] != "GET":
+                status, body, content_type = "405 Method Not Allowed", b"", "text/plain"
+            elif path != "/metrics":
+                status, body, content_type = "404 Not Found", b"", "text/plain"
+            else:
+                if self.collect is not None:
+                    await self.collect()
+                status, body, content_type = "200 OK", self.registry.render().encode("utf-8"), CONTENT_TYPE
+            writer.write(
+                (
+                    f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                    f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+                ).encode("latin-1")
+                + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        except Exception:  # noqa: BLE001
+            self.logger.exception("Metrics request failed")
+        finally:
+            writer.close()
@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import sqlite3
+from contextlib import closing
+from typing import Callable
+
+Migration = Callable[[sqlite3.Cursor], None]
+
+FOLLOW_EVENTS_INDEXES = """
+    CREATE INDEX IF NOT EXISTS idx_follow_events_target_observed
+        ON follow_events(target_user_id, observed_at DESC);
+    CREATE INDEX IF NOT EXISTS idx_follow_events_observed ON follow_events(observed_at DESC);
+"""
+
+
+def _execute_script(cur: sqlite3.Cursor, script: str) -> None:
+    # Not executescript(): it commits first, which would split a step from its version bump.
+    # None of these scripts has a semicolon inside a string literal.
+    for statement in script.split(";"):
+        if statement.strip():
+            cur.execute(statement)
+
+
+def _rebuild_follow_events(cur: sqlite3.Cursor) -> None:
+    """Copy follow_events into the narrow layout: event identity and notification time only."""
+    _execute_script(
+        cur,
+        """
+        CREATE TABLE follow_events_narrow (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            target_user_id TEXT NOT NULL,
+            followed_user_id TEXT NOT NULL,
+            observed_at TEXT NOT NULL,
+            notified_at TEXT,
+            UNIQUE(target_user_id, followed_user_id)
+        );
+        INSERT INTO follow_events_narrow (id, target_user_id, followed_user_id, observed_at, notified_at)
+            SELECT id, target_user_id, followed_user_id, observed_at, notified_at FROM follow_events;
+        DROP TABLE follow_events;
+        ALTER TABLE follow_events_narrow RENAME TO follow_events;
+        """
+        + FOLLOW_EVENTS_INDEXES,
+    )
+
+
+def _create_base_tables(cur: sqlite3.Cursor) -> None:
+    _execute_script(
+        cur,
+        """
+        CREATE TABLE IF NOT EXISTS targets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL UNIQUE,
+            username TEXT,
+            display_name TEXT,
+            label TEXT,
+            poll_interval_seconds INTEGER,
+            active INTEGER NOT NULL DEFAULT 1,
+            last_seen_followed_user_id TEXT,
+            last_polled_at TEXT,
+            last_success_at TEXT,
+            last_error TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS monitor_state (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS follow_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            target_user_id TEXT NOT NULL,
+            target_username TEXT,
+            target_display_name TEXT,
+            followed_user_id TEXT NOT NULL,
+            followed_username TEXT,
+            followed_display_name TEXT,
+            followed_bio TEXT,
+            followed_profile_image_url TEXT,
+            observed_at TEXT NOT NULL,
+            notified_at TEXT,
+            payload_json TEXT NOT NULL,
+            UNIQUE(target_user_id, followed_user_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_follow_events_target_observed
+            ON follow_events(target_user_id, observed_at DESC);
+
+        CREATE TABLE IF NOT EXISTS worker_health (
+            username TEXT PRIMARY KEY,
+            active INTEGER NOT NULL DEFAULT 0,
+            proxy TEXT,
+            is_healthy INTEGER NOT NULL DEFAULT 1,
+            last_checked_at TEXT NOT NULL,
+            last_success_at TEXT,
+            last_failure_at TEXT,
+            consecutive_failures INTEGER NOT NULL DEFAULT 0,
+            cooldown_until TEXT,
+            last_error TEXT,
+            details_json TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS admin_actions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            actor_id TEXT NOT NULL,
+            actor_name TEXT,
+            action TEXT NOT NULL,
+            details_json TEXT,
+            created_at TEXT NOT NULL
+        );
+        """
+    )
+
+
+def _add_next_due_at(cur: sqlite3.Cursor) -> None:
+    columns = {row[1] for row in cur.execute("PRAGMA table_info(targets)").fetchall()}
+    if "next_due_at" not in columns:
+        cur.execute("ALTER TABLE targets ADD COLUMN next_due_at INTEGER NOT NULL DEFAULT 0")
+        # The poll interval default lives in config, so existing rows become due at their
+        # last poll time and pick up their real schedule after the next poll.
+        cur.execute(
+            """
+            UPDATE targets
+            SET next_due_at = COALESCE(CAST(strftime('%s', last_polled_at) AS INTEGER), 0)
+            """
+        )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_targets_active_next_due ON targets(active, next_due_at)")
+
+
+def _create_shard_tables(cur: sqlite3.Cursor) -> None:
+    _execute_script(
+        cur,
+        """
+        CREATE TABLE IF NOT EXISTS target_leases (
+            user_id TEXT PRIMARY KEY,
+            owner_id TEXT NOT NULL,
+            acquired_at TEXT NOT NULL,
+            expires_at INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_target_leases_owner
+            ON target_leases(owner_id);
+
+        CREATE TABLE IF NOT EXISTS shard_members (
+            owner_id TEXT PRIMARY KEY,
+            hostname TEXT,
+            pid INTEGER,
+            joined_at TEXT NOT NULL,
+            heartbeat_at TEXT NOT NULL,
+            expires_at INTEGER NOT NULL
+        );
+        """
+    )
+
+
+def _add_lookup_indexes(cur: sqlite3.Cursor) -> None:
+    _execute_script(
+        cur,
+        """
+        CREATE INDEX IF NOT EXISTS idx_targets_username ON targets(username);
+        CREATE INDEX IF NOT EXISTS idx_targets_label ON targets(label);
+        CREATE INDEX IF NOT EXISTS idx_targets_active ON targets(active);
+        CREATE INDEX IF NOT EXISTS idx_follow_events_observed ON follow_events(observed_at DESC);
+        """
+    )
+
+
+def _normalize_followed_profiles(cur: sqlite3.Cursor) -> None:
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS twitter_users (
+            user_id TEXT PRIMARY KEY,
+            username TEXT,
+            display_name TEXT,
+            bio TEXT,
+            profile_image_url TEXT,
+            updated_at TEXT NOT NULL
+        )
+        """
+    )
+    columns = {row[1] for row in cur.execute("PRAGMA table_info(follow_events)").fetchall()}
+    if "followed_bio" not in columns:
+        return
+    # Keep the most recently recorded profile of each followed account.
+    cur.execute(
+        """
+        INSERT OR IGNORE INTO twitter_users (user_id, username, display_name, bio, profile_image_url, updated_at)
+        SELECT followed_user_id, followed_username, followed_display_name, followed_bio,
+               followed_profile_image_url, observed_at
+        FROM (
+            SELECT followed_user_id, followed_username, followed_display_name, followed_bio,
+                   followed_profile_image_url, observed_at, MAX(id)
+            FROM follow_events
+            GROUP BY followed_user_id
+        )
+        """
+    )
+    _rebuild_follow_events(cur)
+
+
+def _add_alert_deliveries(cur: sqlite3.Cursor) -> None:
+    # One outbox row per (event, sink) so each webhook retries on its own schedule. Events
+    # recorded before the outbox have no rows here, since a missing notified_at on them may
+    # also mean alerts were never requested.
+    _execute_script(
+        cur,
+        """
+        CREATE TABLE IF NOT EXISTS alert_deliveries (
+            event_id INTEGER NOT NULL,
+            sink TEXT NOT NULL,
+            next_attempt_at INTEGER,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            delivered_at TEXT,
+            PRIMARY KEY (event_id, sink)
+        );
+        CREATE INDEX IF NOT EXISTS idx_alert_deliveries_due
+            ON alert_deliveries(next_attempt_at) WHERE next_attempt_at IS NOT NULL;
+        """
+    )
+
+
+def _add_user_resolution_cache(cur: sqlite3.Cursor) -> None:
+    columns = {row[1] for row in cur.execute("PRAGMA table_info(twitter_users)").fetchall()}
+    # Unix time a profile was last confirmed by Twitter; NULL rows are never served from cache.
+    if "resolved_at" not in columns:
+        cur.execute("ALTER TABLE twitter_users ADD COLUMN resolved_at INTEGER")
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_twitter_users_username ON twitter_users(username COLLATE NOCASE)"
+    )
+
+
+def _add_following_probe(cur: sqlite3.Cursor) -> None:
+    columns = {row[1] for row in cur.execute("PRAGMA table_info(targets)").fetchall()}
+    # Following count seen at the last full scan and when that scan ran (unix time).
+    if "following_count" not in columns:
+        cur.execute("ALTER TABLE targets ADD COLUMN following_count INTEGER")
+    if "last_scanned_at" not in columns:
+        cur.execute("ALTER TABLE targets ADD COLUMN last_scanned_at INTEGER")
+
+
+def _add_sync_latency(cur: sqlite3.Cursor) -> None:
+    columns = {row[1] for row in cur.execute("PRAGMA table_info(targets)").fetchall()}
+    # Duration of the last successful sync and its moving average, in milliseconds.
+    if "last_sync_ms" not in columns:
+        cur.execute("ALTER TABLE targets ADD COLUMN last_sync_ms REAL")
+    if "avg_sync_ms" not in columns:
+        cur.execute("ALTER TABLE targets ADD COLUMN avg_sync_ms REAL")
+
+
+def _add_archived_follows(cur: sqlite3.Cursor) -> None:
+    # Archiving deletes follow_events rows, but their pairs still have to count as seen, or a
+    # scan that misses its known head would alert on them again.
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS archived_follows (
+            target_user_id TEXT NOT NULL,
+            followed_user_id TEXT NOT NULL,
+            observed_at TEXT NOT NULL,
+            PRIMARY KEY (target_user_id, followed_user_id)
+        ) WITHOUT ROWID
+        """
+    )
+
+
+# Append only: position N in this list is schema version N + 1. Every step must also be
+# safe on databases created before versioning, which report user_version 0.
+MIGRATIONS: list[Migration] = [
+    _create_base_tables,
+    _add_next_due_at,
+    _create_shard_tables,
+    _add_lookup_indexes,
+    _normalize_followed_profiles,
+    _add_alert_deliveries,
+    _add_user_resolution_cache,
+    _add_following_probe,
+    _add_sync_latency,
+    _add_archived_follows,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return int(conn.execute("PRAGMA user_version").fetchone()[0])
+
+
+def apply_migrations(conn: sqlite3.Connection) -> int:
+    """Bring the database up to SCHEMA_VERSION and return the version it started at."""
+    current = schema_version(conn)
+    if current > SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Database schema version {current} is newer than this build supports ({SCHEMA_VERSION})."
+        )
+    if conn.in_transaction:
+        conn.commit()
+    for version, migration in enumerate(MIGRATIONS[current:], start=current + 1):
+        # Each step commits together with its version bump, so a crash leaves the previous version.
+        with closing(conn.cursor()) as cur:
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                migration(cur)
+                cur.execute(f"PRAGMA user_version = {version}")
+            except BaseException:
+                conn.rollback()
+                raise
+        conn.commit()
+    return current
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from typing import Any
 
@@ -12,6 +12,13 @@ class DiscordSettings:
     guild_id: int | None = None
     admin_channel_id: int | None = None
     admin_role_ids: tuple[int, ...] = ()
+    webhook_timeout_seconds: float = 15.0
+    webhook_connect_timeout_seconds: float = 10.0
+    webhook_max_connections: int = 4
+    alert_max_attempts: int = 8
+    alert_retry_base_seconds: float = 5.0
+    alert_retry_max_seconds: float = 900.0
+    alert_coalesce_seconds: float = 2.0
 
 
 @dataclass(slots=True)
@@ -26,6 +33,23 @@ class MonitorSettings:
     max_follow_scan: int = 100
     api_timeout_seconds: int = 60
     worker_cooldown_seconds: int = 900
+    worker_requests_per_window: int = 450
+    worker_window_seconds: int = 900
+    worker_failure_threshold: int = 3
+    max_concurrent_syncs: int = 1
+    streaming_diff: bool = True
+    known_run_stop_count: int = 3
+    sharding_enabled: bool = False
+    shard_owner_id: str | None = None
+    lease_ttl_seconds: int = 120
+    change_probe_enabled: bool = False
+    change_probe_max_staleness_seconds: int = 1800
+    user_cache_ttl_seconds: int = 86400
+    metrics_enabled: bool = False
+    metrics_host: str = "127.0.0.1"
+    metrics_port: int = 9464
+    loop_watchdog_enabled: bool = True
+    loop_stall_threshold_seconds: float = 0.5
 
 
 @dataclass(slots=True)
@@ -33,6 +57,13 @@ class StorageSettings:
     app_db_path: str = "data/tw_alpha_scraper.db"
     legacy_state_path: str = "state.json"
     log_file_path: str = "logs/tw_alpha_scraper.log"
+    log_format: str = "text"
+    archive_dir: str = "data/archive"
+    retention_enabled: bool = False
+    follow_event_retention_days: int = 90
+    admin_action_retention_days: int = 365
+    retention_batch_size: int = 500
+    retention_interval_seconds: int = 21600
 
 
 @dataclass(slots=True)
@@ -42,12 +73,27 @@ class TargetConfig:
     poll_interval_override: int | None = None
 
 
+@dataclass(slots=True)
+class WebhookRoute:
+    """Sends alerts for the listed targets (user IDs or @usernames) and labels to one webhook.
+
+    A route without targets or labels matches every target. ``webhook_url`` falls back to
+    ``discord.alert_webhook_url``, so the secret can stay in the environment.
+    """
+
+    name: str
+    webhook_url: str | None = None
+    targets: tuple[str, ...] = ()
+    labels: tuple[str, ...] = ()
+
+
 @dataclass(slots=True)
 class AppConfig:
     discord: DiscordSettings = field(default_factory=DiscordSettings)
     monitor: MonitorSettings = field(default_factory=MonitorSettings)
     storage: StorageSettings = field(default_factory=StorageSettings)
     targets: list[TargetConfig] = field(default_factory=list)
+    routes: list[WebhookRoute] = field(default_factory=list)
 
 
 @dataclass(slots=True)
@@ -57,6 +103,8 @@ class ResolvedUser:
     display_name: str | None = None
     description: str | None = None
     profile_image_url: str | None = None
+    following_count: int | None = None
+    # Only set when TwitterClient(keep_raw=True); scans drop it so the twscrape model can be freed.
     raw: Any | None = None
 
 
@@ -74,6 +122,11 @@ class TargetRecord:
     last_error: str | None
     created_at: str
     updated_at: str
+    next_due_at: int = 0
+    following_count: int | None = None
+    last_scanned_at: int | None = None
+    last_sync_ms: float | None = None
+    avg_sync_ms: float | None = None
 
     def poll_interval(self, default_seconds: int) -> int:
         return self.poll_interval_seconds or default_seconds
@@ -85,15 +138,12 @@ class TargetRecord:
 @dataclass(slots=True)
 class FollowEvent:
     target_user_id: str
-    target_username: str | None
-    target_display_name: str | None
     followed_user_id: str
-    followed_username: str | None
-    followed_display_name: str | None
-    followed_bio: str | None
-    followed_profile_image_url: str | None
     observed_at: str
-    payload_json: str
+    followed_username: str | None = None
+    followed_display_name: str | None = None
+    followed_bio: str | None = None
+    followed_profile_image_url: str | None = None
 
 
 @dataclass(slots=True)
@@ -123,6 +173,16 @@ class RuntimeSnapshot:
     healthy_workers: int
     total_workers: int
     recent_events: list[dict[str, Any]]
+    worker_budgets: list[dict[str, Any]] = field(default_factory=list)
+    deferred_syncs: int = 0
+    shard: dict[str, Any] | None = None
+    state_cache: dict[str, int] = field(default_factory=dict)
+    notifier: dict[str, Any] = field(default_factory=dict)
+    pending_alerts: int = 0
+    outbox: dict[str, int] = field(default_factory=dict)
+    probe: dict[str, Any] = field(default_factory=dict)
+    slowest_targets: list[dict[str, Any]] = field(default_factory=list)
+    event_loop: dict[str, Any] = field(default_factory=dict)
 
 
 @dataclass(slots=True)
@@ -138,6 +198,33 @@ class CommandResult:
     payload: dict[str, Any] | None = None
 
 
+@dataclass(slots=True)
+class FollowScan:
+    new_users: list[ResolvedUser] = field(default_factory=list)
+    users: list[ResolvedUser] = field(default_factory=list)
+    head: ResolvedUser | None = None
+    fetched_count: int = 0
+    stop_reason: str | None = None
+    # Time spent comparing users against the last seen head, as opposed to waiting on pages.
+    diff_seconds: float = 0.0
+
+
+@dataclass(slots=True)
+class ProbeStats:
+    """Outcomes of the following-count probe that runs before a full scan."""
+
+    unchanged: int = 0
+    changed: int = 0
+    stale: int = 0
+    unavailable: int = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        probes = self.unchanged + self.changed + self.stale + self.unavailable
+        payload = asdict(self)
+        payload["hit_rate"] = round(self.unchanged / probes, 3) if probes else None
+        return payload
+
+
 @dataclass(slots=True)
 class SyncResult:
     target_user_id: str
@@ -145,6 +232,11 @@ class SyncResult:
     bootstrapped: bool
     fetched_count: int
     inserted_count: int
-    notified_count: int
+    queued_count: int
     last_seen_followed_user_id: str | None
     observed_at: datetime
+    next_due_at: int | None = None
+    scan_stop_reason: str | None = None
+    probed: bool = False
+    # Milliseconds per stage: probe, fetch, retry_wait, diff, persist and total (sync-target adds notify).
+    timings_ms: dict[str, float] = field(default_factory=dict)
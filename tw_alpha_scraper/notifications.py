@@ -3,67 +3,239 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
+import time
+from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
-from typing import Any
-from urllib import request
+from typing import Any, Callable, Sequence
 
+from .http_client import AsyncHTTPClient, HTTPResponse
+from .metrics import MonitorMetrics
 from .models import ResolvedUser, TargetRecord
 
+# Waits longer than this are handed back to the caller instead of holding the sender.
+MAX_INLINE_RATE_LIMIT_WAIT_SECONDS = 5.0
+
+
+# Discord rejects messages with more embeds or more embed text than this.
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+MAX_EMBED_FIELD_CHARS = 1024
+
+
+def _truncate(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[: limit - 1] + "\u2026"
+
+
+def build_follow_embed(target: TargetRecord, followed_user: ResolvedUser) -> dict[str, Any]:
+    embed: dict[str, Any] = {
+        "title": f"New follow detected: {target.display_label()}",
+        "description": (
+            f"**{followed_user.display_name or followed_user.username or followed_user.id}** "
+            f"(@{followed_user.username or 'unknown'})"
+        ),
+        "color": 0x03B2F8,
+        "fields": [
+            {
+                "name": "Target",
+                "value": (
+                    f"{target.display_label()}\n"
+                    f"`{target.user_id}`"
+                ),
+                "inline": True,
+            },
+            {
+                "name": "Profile",
+                "value": f"https://x.com/{followed_user.username}" if followed_user.username else "Unknown",
+                "inline": True,
+            },
+            {
+                "name": "Bio",
+                "value": _truncate(followed_user.description or "No bio available.", MAX_EMBED_FIELD_CHARS),
+                "inline": False,
+            },
+        ],
+        "timestamp": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+    }
+    if followed_user.profile_image_url:
+        embed["thumbnail"] = {"url": followed_user.profile_image_url}
+    return embed
+
+
+def embed_length(embed: dict[str, Any]) -> int:
+    """Characters Discord counts against the per-message embed limit."""
+    total = len(embed.get("title", "")) + len(embed.get("description", ""))
+    for embed_field in embed.get("fields", ()):
+        total += len(embed_field["name"]) + len(embed_field["value"])
+    total += len(embed.get("footer", {}).get("text", "")) + len(embed.get("author", {}).get("name", ""))
+    return total
+
+
+def pack_follow_alerts(
+    alerts: Sequence[tuple[TargetRecord, ResolvedUser]],
+    max_embeds: int = MAX_EMBEDS_PER_MESSAGE,
+    max_chars: int = MAX_EMBED_CHARS_PER_MESSAGE,
+) -> list[list[int]]:
+    """Split alerts, in order, into groups of indexes that each fit in one webhook message."""
+    batches: list[list[int]] = []
+    current: list[int] = []
+    current_chars = 0
+    for index, (target, followed_user) in enumerate(alerts):
+        size = embed_length(build_follow_embed(target, followed_user))
+        if current and (len(current) >= max_embeds or current_chars + size > max_chars):
+            batches.append(current)
+            current, current_chars = [], 0
+        current.append(index)
+        current_chars += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+class WebhookRateLimited(RuntimeError):
+    def __init__(self, retry_after: float, is_global: bool = False):
+        super().__init__(f"Discord webhook rate limited for {retry_after:.2f}s")
+        self.retry_after = retry_after
+        self.is_global = is_global
+
+
+@dataclass(slots=True)
+class RateLimitBucket:
+    """Discord's view of one webhook's budget, taken from the X-RateLimit-* response headers."""
+
+    remaining: int | None = None
+    blocked_until: float = 0.0
+    bucket_id: str | None = None
+
+    def delay(self, now: float) -> float:
+        return max(0.0, self.blocked_until - now)
+
+    def update(self, response: HTTPResponse, now: float) -> float | None:
+        """Apply a response to the bucket; returns the retry delay when Discord answered 429."""
+        headers = response.headers
+        self.bucket_id = headers.get("x-ratelimit-bucket", self.bucket_id)
+        if "x-ratelimit-remaining" in headers:
+            self.remaining = int(headers["x-ratelimit-remaining"])
+            if self.remaining <= 0 and "x-ratelimit-reset-after" in headers:
+                self.blocked_until = max(self.blocked_until, now + float(headers["x-ratelimit-reset-after"]))
+        if response.status != 429:
+            return None
+        retry_after = None
+        try:
+            retry_after = (response.json() or {}).get("retry_after")
+        except ValueError:
+            pass
+        if retry_after is None:
+            retry_after = headers.get("retry-after", 1.0)
+        retry_after = float(retry_after)
+        self.remaining = 0
+        self.blocked_until = max(self.blocked_until, now + retry_after)
+        return retry_after
+
+
+@dataclass(slots=True)
+class DeliveryStats:
+    sent: int = 0
+    failed: int = 0
+    last_latency_ms: float | None = None
+    max_latency_ms: float = 0.0
+    total_latency_ms: float = 0.0
+
+    def record(self, latency_ms: float, ok: bool) -> None:
+        if ok:
+            self.sent += 1
+        else:
+            self.failed += 1
+        self.last_latency_ms = latency_ms
+        self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+        self.total_latency_ms += latency_ms
+
+    def snapshot(self) -> dict[str, Any]:
+        attempts = self.sent + self.failed
+        payload = asdict(self)
+        payload["avg_latency_ms"] = round(self.total_latency_ms / attempts, 2) if attempts else None
+        return payload
+
 
 class DiscordWebhookNotifier:
-    def __init__(self, webhook_url: str | None, logger: logging.Logger):
+    def __init__(
+        self,
+        webhook_url: str | None,
+        logger: logging.Logger,
+        *,
+        timeout_seconds: float = 15.0,
+        connect_timeout_seconds: float = 10.0,
+        max_connections: int = 4,
+        http_client: AsyncHTTPClient | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        metrics: MonitorMetrics | None = None,
+    ):
         self.webhook_url = webhook_url
         self.logger = logger
+        self.http = http_client or AsyncHTTPClient(
+            max_connections=max_connections,
+            connect_timeout=connect_timeout_seconds,
+            read_timeout=timeout_seconds,
+        )
+        self.stats = DeliveryStats()
+        self.buckets: dict[str, RateLimitBucket] = {}
+        self._clock = clock
+        self.metrics = metrics
 
     async def send_follow_alert(self, target: TargetRecord, followed_user: ResolvedUser) -> bool:
-        if not self.webhook_url:
+        return await self.send_follow_alerts([(target, followed_user)])
+
+    async def send_follow_alerts(
+        self,
+        alerts: Sequence[tuple[TargetRecord, ResolvedUser]],
+        webhook_url: str | None = None,
+    ) -> bool:
+        """Post all ``alerts`` as one message; ``pack_follow_alerts`` keeps them within Discord's limits.
+
+        ``webhook_url`` defaults to the notifier's own webhook. Every URL gets its own rate-limit bucket.
+        """
+        webhook_url = webhook_url or self.webhook_url
+        if not webhook_url:
             self.logger.warning("Discord webhook is not configured; skipping alert delivery.")
             return False
-
-        embed: dict[str, Any] = {
-            "title": f"New follow detected: {target.display_label()}",
-            "description": (
-                f"**{followed_user.display_name or followed_user.username or followed_user.id}** "
-                f"(@{followed_user.username or 'unknown'})"
-            ),
-            "color": 0x03B2F8,
-            "fields": [
-                {
-                    "name": "Target",
-                    "value": (
-                        f"{target.display_label()}\n"
-                        f"`{target.user_id}`"
-                    ),
-                    "inline": True,
-                },
-                {
-                    "name": "Profile",
-                    "value": f"https://x.com/{followed_user.username}" if followed_user.username else "Unknown",
-                    "inline": True,
-                },
-                {
-                    "name": "Bio",
-                    "value": followed_user.description or "No bio available.",
-                    "inline": False,
-                },
-            ],
-            "timestamp": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
-        }
-        if followed_user.profile_image_url:
-            embed["thumbnail"] = {"url": followed_user.profile_image_url}
-
-        payload = {"embeds": [embed]}
-        await asyncio.to_thread(self._post_payload, payload)
+        if not alerts:
+            return True
+        payload = {"embeds": [build_follow_embed(target, followed_user) for target, followed_user in alerts]}
+        await self._post_payload(payload, webhook_url)
         return True
 
-    def _post_payload(self, payload: dict[str, Any]) -> None:
-        data = json.dumps(payload).encode("utf-8")
-        req = request.Request(
-            self.webhook_url,
-            data=data,
-            headers={"Content-Type": "application/json", "User-Agent": "tw_alpha_scraper (https://github.com, 1.0)"},
-            method="POST",
-        )
-        with request.urlopen(req, timeout=15) as response:
-            if response.status >= 400:
-                raise RuntimeError(f"Discord webhook returned HTTP {response.status}")
+    async def close(self) -> None:
+        await self.http.close()
+
+    async def _post_payload(self, payload: dict[str, Any], webhook_url: str) -> None:
+        bucket = self.buckets.setdefault(webhook_url, RateLimitBucket())
+        delay = bucket.delay(self._clock())
+        if delay > MAX_INLINE_RATE_LIMIT_WAIT_SECONDS:
+            raise WebhookRateLimited(delay)
+        if delay:
+            await asyncio.sleep(delay)
+        try:
+            response = await self.http.request(
+                "POST",
+                webhook_url,
+                body=json.dumps(payload).encode("utf-8"),
+                headers={"Content-Type": "application/json"},
+            )
+        except Exception:
+            self.stats.failed += 1
+            if self.metrics is not None:
+                self.metrics.webhook_failures.inc("transport")
+            raise
+        latency_ms = response.elapsed_seconds * 1000
+        self.stats.record(latency_ms, ok=response.status < 400)
+        if self.metrics is not None:
+            self.metrics.webhook_seconds.observe(response.elapsed_seconds)
+            if response.status == 429:
+                self.metrics.webhook_failures.inc("rate_limited")
+            elif response.status >= 400:
+                self.metrics.webhook_failures.inc("http_error")
+        self.logger.debug("Discord webhook answered HTTP %s in %.1f ms", response.status, latency_ms)
+        retry_after = bucket.update(response, self._clock())
+        if retry_after is not None:
+            raise WebhookRateLimited(retry_after, is_global=response.headers.get("x-ratelimit-global") == "true")
+        if response.status >= 400:
+            raise RuntimeError(f"Discord webhook returned HTTP {response.status}")
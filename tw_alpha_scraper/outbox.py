@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable
+
+from .async_storage import AsyncAppDatabase
+from .leases import OUTBOX_LEASE, ShardCoordinator
+from .models import ResolvedUser, TargetRecord
+from .notifications import DiscordWebhookNotifier, WebhookRateLimited, pack_follow_alerts
+from .routing import AlertRouter
+
+
+@dataclass(slots=True)
+class OutboxStats:
+    delivered: int = 0
+    messages: int = 0
+    retried: int = 0
+    dropped: int = 0
+    rate_limited: int = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class AlertOutbox:
+    """Delivers follow alerts queued in ``alert_deliveries`` until each sink's webhook accepts them.
+
+    Queued rows carry ``next_attempt_at``, so pending alerts survive a restart. Sinks are sent to
+    in parallel and fail independently. A failed send is pushed back with exponential backoff
+    and given up after ``max_attempts``; a 429 pauses that sink until Discord's ``retry_after``
+    has passed without using up an attempt.
+
+    Due alerts are packed into as few messages as Discord allows. After a wake-up the worker
+    waits ``coalesce_seconds`` so alerts from syncs finishing close together share messages.
+    """
+
+    def __init__(
+        self,
+        storage: AsyncAppDatabase,
+        notifier: DiscordWebhookNotifier,
+        logger: logging.Logger,
+        router: AlertRouter | None = None,
+        *,
+        max_attempts: int = 8,
+        retry_base_seconds: float = 5.0,
+        retry_max_seconds: float = 900.0,
+        batch_size: int = 50,
+        coalesce_seconds: float = 0.0,
+        shard: ShardCoordinator | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.storage = storage
+        self.notifier = notifier
+        self.router = router or AlertRouter([], getattr(notifier, "webhook_url", None))
+        self.logger = logger
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.batch_size = max(1, batch_size)
+        self.coalesce_seconds = max(0.0, coalesce_seconds)
+        self.shard = shard
+        self.stats = OutboxStats()
+        self._clock = clock
+        self._blocked_until: dict[str, float] = {}
+        self._wake = asyncio.Event()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def retry_delay(self, attempt: int) -> float:
+        return min(self.retry_max_seconds, self.retry_base_seconds * (2 ** max(attempt - 1, 0)))
+
+    def _blocked_sinks(self) -> list[str]:
+        now = self._clock()
+        return [sink for sink, until in self._blocked_until.items() if until > now]
+
+    async def run(self, stop_event: asyncio.Event, idle_seconds: float) -> None:
+        while not stop_event.is_set():
+            self._wake.clear()
+            delivered = 0
+            try:
+                delivered = await self.deliver_pending()
+            except Exception:  # noqa: BLE001
+                self.logger.exception("Alert outbox pass failed")
+            timeout = idle_seconds
+            blocked = self._blocked_sinks()
+            next_due = await self.storage.next_alert_due_at(exclude_sinks=blocked)
+            if next_due is not None:
+                timeout = min(timeout, next_due - self._clock())
+            if blocked:
+                timeout = min(timeout, min(self._blocked_until[sink] for sink in blocked) - self._clock())
+            if timeout <= 0:
+                if delivered:
+                    continue
+                # Due rows that could not be sent (e.g. another member holds the outbox lease).
+                timeout = 1.0
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                continue
+            if self.coalesce_seconds:
+                await asyncio.sleep(self.coalesce_seconds)
+
+    async def deliver_pending(self) -> int:
+        """Send every alert that is due now; returns how many deliveries succeeded."""
+        if self.shard is not None and not await self.shard.claim(OUTBOX_LEASE):
+            return 0
+        try:
+            delivered = 0
+            while True:
+                rows = await self.storage.pending_alerts(
+                    int(self._clock()), self.batch_size, exclude_sinks=self._blocked_sinks()
+                )
+                if not rows:
+                    break
+                # Every row ends up delivered, rescheduled, dropped or behind a blocked sink,
+                # so the next query makes progress.
+                by_sink: dict[str, list[dict[str, Any]]] = {}
+                for row in rows:
+                    by_sink.setdefault(row["sink"], []).append(row)
+                targets: dict[str, TargetRecord | None] = {}
+                for row in rows:
+                    if row["target_user_id"] not in targets:
+                        targets[row["target_user_id"]] = await self.storage.get_target(row["target_user_id"])
+                results = await asyncio.gather(
+                    *(self._deliver_to_sink(sink, sink_rows, targets) for sink, sink_rows in by_sink.items())
+                )
+                done = [delivery for result in results for delivery in result]
+                if done:
+                    await self.storage.mark_alerts_delivered(done)
+                delivered += len(done)
+            self.stats.delivered += delivered
+            return delivered
+        finally:
+            if self.shard is not None:
+                await self.shard.release(OUTBOX_LEASE)
+
+    async def _deliver_to_sink(
+        self,
+        sink: str,
+        rows: list[dict[str, Any]],
+        targets: dict[str, TargetRecord | None],
+    ) -> list[tuple[int, str]]:
+        try:
+            webhook_url = self.router.webhook_url(sink)
+        except KeyError:
+            webhook_url = None
+            reason = f"route `{sink}` is no longer configured"
+        else:
+            reason = "no webhook URL is configured"
+        if webhook_url is None:
+            # Retrying cannot help until the config changes, so these are dropped on the first pass.
+            for row in rows:
+                await self._give_up(row, reason)
+            return []
+
+        alerts: list[tuple[TargetRecord, ResolvedUser]] = []
+        alert_rows: list[dict[str, Any]] = []
+        for row in rows:
+            target = targets[row["target_user_id"]]
+            if target is None:
+                await self._give_up(row, "target no longer exists")
+                continue
+            followed_user = ResolvedUser(
+                id=row["followed_user_id"],
+                username=row["followed_username"],
+                display_name=row["followed_display_name"],
+                description=row["followed_bio"],
+                profile_image_url=row["followed_profile_image_url"],
+            )
+            alerts.append((target, followed_user))
+            alert_rows.append(row)
+
+        delivered: list[tuple[int, str]] = []
+        for batch in pack_follow_alerts(alerts):
+            try:
+                if not await self.notifier.send_follow_alerts([alerts[index] for index in batch], webhook_url):
+                    raise RuntimeError("Discord webhook is not configured")
+            except WebhookRateLimited as exc:
+                self.stats.rate_limited += 1
+                self._blocked_until[sink] = self._clock() + exc.retry_after
+                self.logger.warning("Alert delivery to %s paused for %.2fs by a Discord rate limit.", sink, exc.retry_after)
+                break
+            except Exception as exc:  # noqa: BLE001
+                for index in batch:
+                    await self._retry(alert_rows[index], exc)
+            else:
+                delivered.extend((int(alert_rows[index]["id"]), sink) for index in batch)
+                self.stats.messages += 1
+        return delivered
+
+    async def _retry(self, row: dict[str, Any], error: Exception) -> None:
+        attempt = int(row["delivery_attempts"]) + 1
+        if attempt >= self.max_attempts:
+            await self._give_up(row, str(error))
+            return
+        delay = self.retry_delay(attempt)
+        self.stats.retried += 1
+        self.logger.warning(
+            "Alert %s to %s failed on attempt %s/%s, retrying in %.0fs: %s",
+            row["id"],
+            row["sink"],
+            attempt,
+            self.max_attempts,
+            delay,
+            error,
+        )
+        await self.storage.schedule_alert_retry(int(row["id"]), row["sink"], int(self._clock() + delay), str(error))
+
+    async def _give_up(self, row: dict[str, Any], reason: str) -> None:
+        self.stats.dropped += 1
+        self.logger.error(
+            "Dropping alert %s to %s after %s attempts: %s",
+            row["id"],
+            row["sink"],
+            int(row["delivery_attempts"]) + 1,
+            reason,
+        )
+        await self.storage.schedule_alert_retry(int(row["id"]), row["sink"], None, reason)
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+from .models import StorageSettings
+from .storage import AppDatabase
+
+FOLLOW_EVENTS = "follow_events"
+ADMIN_ACTIONS = "admin_actions"
+ARCHIVE_SUFFIX = ".ndjson.gz"
+INCREMENTAL_VACUUM_PAGES = 2048
+
+
+@dataclass(slots=True)
+class RetentionResult:
+    archived_follow_events: int = 0
+    archived_admin_actions: int = 0
+    freed_pages: int = 0
+    partitions: tuple[str, ...] = ()
+
+
+class RetentionManager:
+    """Moves old follow_events and admin_actions rows into monthly gzip NDJSON partitions.
+
+    Rows are appended to ``<archive_dir>/<table>/<YYYY-MM>.ndjson.gz`` and only deleted from
+    SQLite after the partition file has been written and synced, so an interrupted run can
+    leave a row in both places but never in neither. ``read_archive`` skips such repeats.
+    Each call handles one bounded batch so the caller can interleave other writes.
+    """
+
+    tables = (FOLLOW_EVENTS, ADMIN_ACTIONS)
+
+    def __init__(self, settings: StorageSettings) -> None:
+        self.archive_dir = Path(settings.archive_dir)
+        self.follow_event_retention_days = settings.follow_event_retention_days
+        self.admin_action_retention_days = settings.admin_action_retention_days
+        self.batch_size = max(1, settings.retention_batch_size)
+
+    def archive_batch(
+        self,
+        db: AppDatabase,
+        table: str,
+        now: datetime | None = None,
+        partitions: set[str] | None = None,
+    ) -> int:
+        """Archive and delete at most one batch of rows from ``table``; returns the number moved."""
+        cutoff = self.cutoff(table, now)
+        if cutoff is None:
+            return 0
+        if table == FOLLOW_EVENTS:
+            rows = db.follow_events_before(cutoff, self.batch_size)
+            timestamp_key = "observed_at"
+        else:
+            rows = db.admin_actions_before(cutoff, self.batch_size)
+            timestamp_key = "created_at"
+        if not rows:
+            return 0
+
+        by_month: dict[str, list[dict[str, Any]]] = {}
+        for row in rows:
+            by_month.setdefault(str(row[timestamp_key])[:7], []).append(row)
+        for month, month_rows in by_month.items():
+            path = self._append_partition(table, month, month_rows)
+            if partitions is not None:
+                partitions.add(str(path))
+
+        ids = [int(row["id"]) for row in rows]
+        if table == FOLLOW_EVENTS:
+            db.delete_follow_events(ids)
+        else:
+            db.delete_admin_actions(ids)
+        return len(rows)
+
+    def maintain(self, db: AppDatabase, vacuum: bool = False) -> int:
+        if vacuum:
+            db.vacuum()
+            db.checkpoint_wal("TRUNCATE")
+            return 0
+        freed = db.incremental_vacuum(INCREMENTAL_VACUUM_PAGES)
+        db.checkpoint_wal("TRUNCATE")
+        return freed
+
+    def cutoff(self, table: str, now: datetime | None = None) -> str | None:
+        days = self.follow_event_retention_days if table == FOLLOW_EVENTS else self.admin_action_retention_days
+        if not days or days <= 0:
+            return None
+        current = now or datetime.now(timezone.utc)
+        return (current - timedelta(days=days)).replace(microsecond=0).isoformat()
+
+    def _append_partition(self, table: str, month: str, rows: list[dict[str, Any]]) -> Path:
+        path = self.archive_dir / table / f"{month}{ARCHIVE_SUFFIX}"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Appending a new gzip member keeps earlier ones intact; readers see one continuous stream.
+        with open(path, "ab") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb") as handle:
+                for row in rows:
+                    handle.write(json.dumps(row, sort_keys=True).encode("utf-8") + b"\n")
+            raw.flush()
+            os.fsync(raw.fileno())
+        return path
+
+
+def read_archive(
+    archive_dir: str | Path,
+    table: str = FOLLOW_EVENTS,
+    since: str | None = None,
+    until: str | None = None,
+    target_user_id: str | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Yield archived rows in partition order, filtered by timestamp range and target.
+
+    ``since`` (inclusive) and ``until`` (exclusive) are ISO timestamps or prefixes such as
+    ``2024-03``; partitions entirely outside the range are not opened.
+    """
+    timestamp_key = "observed_at" if table == FOLLOW_EVENTS else "created_at"
+    directory = Path(archive_dir) / table
+    if not directory.exists():
+        return
+    seen: set[int] = set()
+    for path in sorted(directory.glob(f"*{ARCHIVE_SUFFIX}")):
+        month = path.name[: -len(ARCHIVE_SUFFIX)]
+        if since and month < since[:7]:
+            continue
+        if until and month > until[:7]:
+            continue
+        with gzip.open(path, "rt", encoding="utf-8") as handle:
+            for line in handle:
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                if row["id"] in seen:
+                    continue
+                seen.add(row["id"])
+                timestamp = str(row.get(timestamp_key, ""))
+                if since and timestamp < since:
+                    continue
+                if until and timestamp >= until:
+                    continue
+                if target_user_id and row.get("target_user_id") != target_user_id:
+                    continue
+                yield row
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from .models import TargetRecord, WebhookRoute
+
+DEFAULT_SINK = "default"
+
+
+class AlertRouter:
+    """Maps each target to the webhook sinks that should receive its follow alerts.
+
+    Without configured routes every target goes to the single ``alert_webhook_url`` under the
+    ``default`` sink, which is also where alerts queued before routing existed are kept.
+    Routes that resolve to no webhook URL receive nothing.
+    """
+
+    def __init__(self, routes: list[WebhookRoute], default_webhook_url: str | None) -> None:
+        self.default_webhook_url = default_webhook_url
+        self.routes = list(routes) or [WebhookRoute(name=DEFAULT_SINK)]
+        self._by_name = {route.name: route for route in self.routes}
+
+    def sinks_for(self, target: TargetRecord) -> tuple[str, ...]:
+        # A route with no webhook URL could never deliver, so nothing is queued for it.
+        return tuple(
+            route.name
+            for route in self.routes
+            if (route.webhook_url or self.default_webhook_url) and _matches(route, target)
+        )
+
+    def webhook_url(self, sink: str) -> str | None:
+        route = self._by_name.get(sink)
+        if route is None:
+            raise KeyError(sink)
+        return route.webhook_url or self.default_webhook_url
+
+
+def _matches(route: WebhookRoute, target: TargetRecord) -> bool:
+    if not route.targets and not route.labels:
+        return True
+    if target.label is not None and target.label in route.labels:
+        return True
+    for identifier in route.targets:
+        if identifier == target.user_id:
+            return True
+        if identifier.startswith("@") and target.username and identifier[1:].lower() == target.username.lower():
+            return True
+    return False
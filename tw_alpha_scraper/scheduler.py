@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import heapq
+import time
+
+
+class DueScheduler:
+    """Min-heap of targets keyed by their next due time (epoch seconds).
+
+    Rescheduling pushes a fresh entry and leaves the old one in the heap; stale
+    entries are skipped when they reach the top, so every update is O(log n).
+    """
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, str]] = []
+        self._due_at: dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._due_at)
+
+    def __contains__(self, user_id: object) -> bool:
+        return user_id in self._due_at
+
+    def clear(self) -> None:
+        self._heap.clear()
+        self._due_at.clear()
+
+    def schedule(self, user_id: str, due_at: float) -> None:
+        self._due_at[user_id] = due_at
+        heapq.heappush(self._heap, (due_at, user_id))
+        if len(self._heap) > 2 * len(self._due_at) + 64:
+            self._compact()
+
+    def remove(self, user_id: str) -> None:
+        self._due_at.pop(user_id, None)
+
+    def due_at(self, user_id: str) -> float | None:
+        return self._due_at.get(user_id)
+
+    def next_due_at(self) -> float | None:
+        self._discard_stale()
+        if not self._heap:
+            return None
+        return self._heap[0][0]
+
+    def due_count(self, now: float | None = None) -> int:
+        """Targets whose due time has passed; a linear scan, meant for metrics scrapes."""
+        current = time.time() if now is None else now
+        return sum(1 for due_at in self._due_at.values() if due_at <= current)
+
+    def seconds_until_due(self, now: float | None = None) -> float | None:
+        next_due = self.next_due_at()
+        if next_due is None:
+            return None
+        return max(0.0, next_due - (time.time() if now is None else now))
+
+    def pop_due(self, now: float | None = None) -> list[str]:
+        current = time.time() if now is None else now
+        due: list[str] = []
+        while True:
+            self._discard_stale()
+            if not self._heap or self._heap[0][0] > current:
+                return due
+            _, user_id = heapq.heappop(self._heap)
+            del self._due_at[user_id]
+            due.append(user_id)
+
+    def _compact(self) -> None:
+        self._heap = [(due_at, user_id) for user_id, due_at in self._due_at.items()]
+        heapq.heapify(self._heap)
+
+    def _discard_stale(self) -> None:
+        heap = self._heap
+        while heap and self._due_at.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
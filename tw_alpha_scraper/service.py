@@ -1,23 +1,98 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
 import random
+import time
+from contextlib import aclosing
 from dataclasses import asdict
 from datetime import datetime, timezone
 from typing import Any, Awaitable, Callable
 
-from .models import AdminActor, AppConfig, CommandResult, FollowEvent, ResolvedUser, SyncResult, TargetRecord
+from .models import (
+    AdminActor,
+    AppConfig,
+    CommandResult,
+    FollowEvent,
+    FollowScan,
+    ProbeStats,
+    ResolvedUser,
+    SyncResult,
+    TargetRecord,
+    WorkerHealthRecord,
+)
+from .async_storage import AsyncAppDatabase
+from .leases import ShardCoordinator
+from .loop_watchdog import LoopWatchdog
+from .metrics import MetricsServer, MonitorMetrics
 from .notifications import DiscordWebhookNotifier
+from .outbox import AlertOutbox
+from .retention import FOLLOW_EVENTS, RetentionManager, RetentionResult
+from .routing import AlertRouter
+from .scheduler import DueScheduler
 from .storage import AppDatabase, utcnow_iso
 from .twitter import TwitterClient, TwitterClientError
+from .workers import WorkerBudgetManager, WorkerLease, estimate_following_requests, is_rate_limit_error
+
+WORKER_REFRESH_INTERVAL_SECONDS = 300
 
 
 def compute_backoff_seconds(attempt: int, base_delay_seconds: float) -> float:
     return base_delay_seconds * (2 ** max(attempt - 1, 0))
 
 
+def _format_worker_budgets(budgets: list[dict[str, Any]]) -> str:
+    if not budgets:
+        return "unmanaged"
+    parts = []
+    for budget in budgets:
+        if budget["available"]:
+            state = "ready"
+        elif budget["cooldown_until"]:
+            state = f"cooldown until {budget['cooldown_until']}"
+        else:
+            state = "exhausted" if budget["active"] else "inactive"
+        parts.append(f"{budget['username']}={budget['remaining_requests']} ({state})")
+    return ", ".join(parts)
+
+
+def _format_shard(shard: dict[str, Any] | None) -> str:
+    if shard is None:
+        return "disabled"
+    alive = sum(1 for member in shard["members"] if member["alive"])
+    return f"{shard['owner_id']} holding {len(shard['owned_targets'])} leases, {alive} live members"
+
+
+def _format_probe(probe: dict[str, Any], enabled: bool) -> str:
+    if not enabled:
+        return "disabled"
+    if probe["hit_rate"] is None:
+        return "no probes yet"
+    return f"{probe['hit_rate']:.0%} skipped ({probe['changed']} changed, {probe['stale']} stale)"
+
+
+def _format_slowest_targets(targets: list[dict[str, Any]], limit: int = 3) -> str:
+    if not targets:
+        return "no syncs yet"
+    parts = []
+    for target in targets[:limit]:
+        name = target["label"] or target["display_name"] or target["username"] or target["user_id"]
+        parts.append(f"{name} avg {target['avg_sync_ms']:.0f}ms (last {target['last_sync_ms']:.0f}ms)")
+    return ", ".join(parts)
+
+
+def _format_event_loop(event_loop: dict[str, Any], enabled: bool) -> str:
+    if not enabled:
+        return "watchdog disabled"
+    if not event_loop["samples"]:
+        return "no samples yet"
+    text = f"lag {event_loop['last_lag_ms']:.0f}ms (max {event_loop['max_lag_ms']:.0f}ms), {event_loop['stalls']} stalls"
+    if event_loop["worst_stalls"]:
+        worst = event_loop["worst_stalls"][0]
+        text += f", worst {worst['lag_ms']:.0f}ms in {worst['task'] or 'unknown task'}"
+    return text
+
+
 class AlphaMonitorService:
     def __init__(
         self,
@@ -29,144 +104,475 @@ class AlphaMonitorService:
     ) -> None:
         self.config = config
         self.storage = storage
+        self.async_storage = AsyncAppDatabase(storage)
         self.twitter = twitter_client or TwitterClient()
         self.logger = logger or logging.getLogger("tw_alpha_scraper")
-        self.notifier = notifier or DiscordWebhookNotifier(config.discord.alert_webhook_url, self.logger)
+        self.metrics = MonitorMetrics()
+        storage.on_commit = self.metrics.commit_seconds.observe
+        self.notifier = notifier or DiscordWebhookNotifier(
+            config.discord.alert_webhook_url,
+            self.logger,
+            timeout_seconds=config.discord.webhook_timeout_seconds,
+            connect_timeout_seconds=config.discord.webhook_connect_timeout_seconds,
+            max_connections=config.discord.webhook_max_connections,
+            metrics=self.metrics,
+        )
         self.started_at = utcnow_iso()
         self.last_cycle_at: str | None = None
         self.last_runtime_error: str | None = None
         self.degraded = False
+        self.scheduler = DueScheduler()
+        self.workers = WorkerBudgetManager(
+            requests_per_window=config.monitor.worker_requests_per_window,
+            window_seconds=config.monitor.worker_window_seconds,
+            cooldown_seconds=config.monitor.worker_cooldown_seconds,
+            failure_threshold=config.monitor.worker_failure_threshold,
+        )
+        self._last_worker_refresh = 0.0
+        self.probe_stats = ProbeStats()
+        self.loop_watchdog = LoopWatchdog(
+            self.logger,
+            stall_threshold_seconds=config.monitor.loop_stall_threshold_seconds,
+            metrics=self.metrics,
+        )
+        self.retention = RetentionManager(config.storage)
+        self.shard: ShardCoordinator | None = None
+        if config.monitor.sharding_enabled:
+            self.shard = ShardCoordinator(
+                self.async_storage,
+                owner_id=config.monitor.shard_owner_id,
+                lease_ttl_seconds=config.monitor.lease_ttl_seconds,
+            )
+        self.router = AlertRouter(config.routes, config.discord.alert_webhook_url)
+        self.outbox = AlertOutbox(
+            self.async_storage,
+            self.notifier,
+            self.logger,
+            self.router,
+            max_attempts=config.discord.alert_max_attempts,
+            retry_base_seconds=config.discord.alert_retry_base_seconds,
+            retry_max_seconds=config.discord.alert_retry_max_seconds,
+            coalesce_seconds=config.discord.alert_coalesce_seconds,
+            shard=self.shard,
+        )
+        self._scheduler_loaded = False
+        # Targets popped from the heap whose sync has not rescheduled them yet.
+        self._in_flight: set[str] = set()
+        self._active_cycle: asyncio.Future[Any] | None = None
+        self._schedule_changed = asyncio.Event()
         self._stop_event = asyncio.Event()
         self._initialized = False
 
     async def initialize(self) -> None:
         if self._initialized:
             return
-        self.storage.initialize()
-        self.storage.seed_targets(self.config.targets)
-        if self.storage.get_state("paused", None) is None:
-            self.storage.set_paused(self.config.monitor.pause_on_start)
-        self.storage.set_state("started_at", self.started_at)
+        await self.async_storage.initialize()
+        await self.async_storage.seed_targets(self.config.targets)
+        if await self.async_storage.get_state("paused", None) is None:
+            await self.async_storage.set_paused(self.config.monitor.pause_on_start)
+        await self.async_storage.set_state("started_at", self.started_at)
         await self.refresh_worker_health()
+        if self.shard is not None:
+            await self.shard.join()
         self._initialized = True
 
     async def run_forever(self) -> None:
-        self.logger.info("Service initialized with %s active targets.", len(self.storage.list_targets(active_only=True)))
-        while not self._stop_event.is_set():
-            if self.storage.is_paused():
-                await asyncio.sleep(self.config.monitor.scheduler_tick_seconds)
-                continue
+        active_targets = await self.async_storage.list_targets(active_only=True)
+        self.logger.info("Service initialized with %s active targets.", len(active_targets))
+        heartbeat_task: asyncio.Task[None] | None = None
+        if self.shard is not None:
+            self.logger.info("Running as shard member %s.", self.shard.owner_id)
+            heartbeat_task = asyncio.create_task(self._shard_heartbeat_loop(), name="shard-heartbeat")
+        # Alerts left in the outbox by a previous run go out on the first pass.
+        outbox_task = asyncio.create_task(
+            self.outbox.run(self._stop_event, idle_seconds=self.config.monitor.scheduler_tick_seconds),
+            name="alert-outbox",
+        )
+        retention_task: asyncio.Task[None] | None = None
+        if self.config.storage.retention_enabled:
+            retention_task = asyncio.create_task(self._retention_loop(), name="retention")
+        watchdog_task: asyncio.Task[None] | None = None
+        if self.config.monitor.loop_watchdog_enabled:
+            watchdog_task = asyncio.create_task(self.loop_watchdog.run(self._stop_event), name="loop-watchdog")
+        metrics_server: MetricsServer | None = None
+        if self.config.monitor.metrics_enabled:
+            metrics_server = MetricsServer(
+                self.metrics.registry,
+                self.config.monitor.metrics_host,
+                self.config.monitor.metrics_port,
+                self.logger,
+                collect=self.collect_metrics,
+            )
+            await metrics_server.start()
+        try:
+            while not self._stop_event.is_set():
+                if await self.async_storage.is_paused():
+                    await asyncio.sleep(self.config.monitor.scheduler_tick_seconds)
+                    continue
 
-            await self.run_monitor_cycle()
-            await asyncio.sleep(self.config.monitor.scheduler_tick_seconds)
+                if time.monotonic() - self._last_worker_refresh >= WORKER_REFRESH_INTERVAL_SECONDS:
+                    await self.refresh_worker_health()
+                await self.run_monitor_cycle()
+                await self._wait_for_next_due()
+        finally:
+            background = [
+                task for task in (heartbeat_task, outbox_task, retention_task, watchdog_task) if task is not None
+            ]
+            for task in background:
+                task.cancel()
+            await asyncio.gather(*background, return_exceptions=True)
+            if metrics_server is not None:
+                await metrics_server.close()
 
     async def shutdown(self) -> None:
         self._stop_event.set()
+        self._schedule_changed.set()
+        self.outbox.wake()
+        if self.shard is not None:
+            # Leaving drops every lease we hold, so let running syncs finish first. Past one TTL
+            # the leases would have lapsed anyway.
+            cycle = self._active_cycle
+            if cycle is not None:
+                await asyncio.wait({cycle}, timeout=self.shard.lease_ttl_seconds)
+            await self.shard.leave()
+        await self.async_storage.flush_state()
+        close_notifier = getattr(self.notifier, "close", None)
+        if close_notifier is not None:
+            await close_notifier()
+
+    async def _shard_heartbeat_loop(self) -> None:
+        assert self.shard is not None
+        while not self._stop_event.is_set():
+            await asyncio.sleep(self.shard.heartbeat_interval_seconds)
+            try:
+                await self.shard.heartbeat()
+            except Exception:  # noqa: BLE001
+                self.logger.exception("Shard heartbeat failed for %s", self.shard.owner_id)
+                continue
+            # Other members add and poll targets and may pause, so pick up what changed in the DB.
+            await self._refresh_schedule()
+            await self.async_storage.invalidate_state_cache()
+
+    async def _retention_loop(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                result = await self.run_retention()
+            except Exception:  # noqa: BLE001
+                self.logger.exception("Retention pass failed")
+            else:
+                if result.archived_follow_events or result.archived_admin_actions:
+                    self.logger.info(
+                        "Archived %s follow events and %s admin actions.",
+                        result.archived_follow_events,
+                        result.archived_admin_actions,
+                    )
+            await asyncio.sleep(self.config.storage.retention_interval_seconds)
+
+    async def run_retention(self, vacuum: bool = False) -> RetentionResult:
+        """Archive rows past their retention age one batch at a time, then reclaim space."""
+        result = RetentionResult()
+        partitions: set[str] = set()
+        for table in self.retention.tables:
+            while not self._stop_event.is_set():
+                moved = await self.async_storage.write(
+                    lambda db, table=table: self.retention.archive_batch(db, table, partitions=partitions)
+                )
+                if table == FOLLOW_EVENTS:
+                    result.archived_follow_events += moved
+                else:
+                    result.archived_admin_actions += moved
+                if moved < self.retention.batch_size:
+                    break
+        result.freed_pages = await self.async_storage.write(lambda db: self.retention.maintain(db, vacuum=vacuum))
+        result.partitions = tuple(sorted(partitions))
+        return result
+
+    async def _wait_for_next_due(self) -> None:
+        # The tick is only an upper bound now, so pause/resume is still noticed promptly.
+        timeout = float(self.config.monitor.scheduler_tick_seconds)
+        seconds_until_due = self.scheduler.seconds_until_due()
+        if seconds_until_due is not None:
+            timeout = min(timeout, seconds_until_due)
+        self._schedule_changed.clear()
+        try:
+            await asyncio.wait_for(self._schedule_changed.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
 
     async def run_monitor_cycle(self) -> None:
-        targets = self.storage.list_targets(active_only=True)
+        await self._ensure_schedule_loaded()
         cycle_started = utcnow_iso()
         self.last_cycle_at = cycle_started
-        self.storage.set_state("last_cycle_at", cycle_started)
-        for target in targets:
+        await self.async_storage.set_state("last_cycle_at", cycle_started, deferred=True)
+        popped = self.scheduler.pop_due()
+        self._in_flight.update(popped)
+        try:
+            due_targets: list[TargetRecord] = []
+            for user_id in popped:
+                target = await self.async_storage.get_target(user_id)
+                if target is not None and target.active:
+                    due_targets.append(target)
+            self.metrics.cycle_targets.set(len(due_targets))
+            if not due_targets:
+                return
+
+            started = time.perf_counter()
+            # Each slot keeps its own jitter, so a limit of 1 behaves like the old serial loop.
+            semaphore = asyncio.Semaphore(max(1, self.config.monitor.max_concurrent_syncs))
+            self._active_cycle = asyncio.gather(*(self._sync_due_target(target, semaphore) for target in due_targets))
+            await self._active_cycle
+            self.metrics.cycle_seconds.observe(time.perf_counter() - started)
+        finally:
+            self._active_cycle = None
+            self._in_flight.difference_update(popped)
+
+    async def _sync_due_target(self, target: TargetRecord, semaphore: asyncio.Semaphore) -> None:
+        async with semaphore:
             if self._stop_event.is_set():
-                break
-            if not self._target_due(target):
-                continue
+                return
+            if self.shard is not None:
+                claimed = await self._claim_shard_target(target)
+                if claimed is None:
+                    return
+                target = claimed
             try:
-                await self.sync_target(target.user_id, send_alerts=True)
-            except Exception as exc:
-                self.last_runtime_error = str(exc)
-                self.storage.set_state("last_runtime_error", self.last_runtime_error)
-                self.storage.set_target_poll_failure(target.user_id, str(exc))
-                self.logger.exception("Target sync failed for %s", target.user_id)
-            await asyncio.sleep(
-                random.uniform(
-                    self.config.monitor.target_jitter_min_seconds,
-                    self.config.monitor.target_jitter_max_seconds,
-                )
+                await self._sync_claimed_target(target)
+            finally:
+                if self.shard is not None:
+                    await self.shard.release(target.user_id)
+
+    async def _claim_shard_target(self, target: TargetRecord) -> TargetRecord | None:
+        assert self.shard is not None
+        if not await self.shard.claim(target.user_id):
+            # Another member is polling it; look again once that lease could have lapsed.
+            self._schedule_target(target, max(target.next_due_at, time.time() + self.shard.lease_ttl_seconds))
+            return None
+        current = await self.async_storage.get_target(target.user_id)
+        if current is not None and current.active and current.next_due_at <= time.time():
+            return current
+        # Polled by another member since our schedule was loaded.
+        await self.shard.release(target.user_id)
+        if current is not None and current.active:
+            self._schedule_target(current, current.next_due_at)
+        return None
+
+    async def _sync_claimed_target(self, target: TargetRecord) -> None:
+        lease = self.workers.acquire()
+        if lease is None:
+            # No account has budget left: push the target back instead of polling a throttled pool.
+            retry_at = self.workers.next_available_at() or time.time() + self.config.monitor.scheduler_tick_seconds
+            self.logger.debug("Deferring %s until %s; worker budget exhausted.", target.user_id, retry_at)
+            self._schedule_target(target, retry_at)
+            return
+        error: Exception | None = None
+        requests_used = 1
+        try:
+            result = await self.sync_target(target.user_id, send_alerts=True)
+            next_due_at = result.next_due_at
+            # A probe that skipped the scan still cost one request, counted by the fetched_count=0 minimum.
+            requests_used = estimate_following_requests(result.fetched_count)
+            if result.probed and result.fetched_count:
+                requests_used += 1
+            self.metrics.syncs.inc("skipped" if result.scan_stop_reason == "probe_unchanged" else "ok")
+        except Exception as exc:
+            error = exc
+            self.metrics.syncs.inc("error")
+            next_due_at = self._next_due_at(target)
+            self.last_runtime_error = str(exc)
+            await self.async_storage.set_target_poll_failure(target.user_id, str(exc), next_due_at=next_due_at)
+            self.logger.exception("Target sync failed for %s", target.user_id)
+        await self._settle_worker_lease(lease, requests_used, error)
+        self._schedule_target(target, next_due_at)
+        await asyncio.sleep(
+            random.uniform(
+                self.config.monitor.target_jitter_min_seconds,
+                self.config.monitor.target_jitter_max_seconds,
             )
+        )
+
+    async def _settle_worker_lease(self, lease: WorkerLease, requests_used: int, error: Exception | None) -> None:
+        if not self.workers.release(lease, requests_used=requests_used, error=error) or lease.username is None:
+            return
+        budget = self.workers.budget(lease.username)
+        if budget is None:
+            return
+        cooldown_until = datetime.fromtimestamp(budget.cooldown_until or time.time(), timezone.utc)
+        await self.async_storage.set_worker_cooldown(
+            lease.username,
+            cooldown_until.replace(microsecond=0).isoformat(),
+            budget.consecutive_failures,
+            budget.last_error,
+        )
+        self.logger.warning("Worker %s cooling down until %s: %s", lease.username, cooldown_until, budget.last_error)
+
+    async def _ensure_schedule_loaded(self) -> None:
+        if self._scheduler_loaded:
+            return
+        self.scheduler.clear()
+        targets = await self.async_storage.list_targets(active_only=True)
+        for target in targets:
+            self.scheduler.schedule(target.user_id, target.next_due_at)
+        self._scheduler_loaded = True
+
+    async def _refresh_schedule(self) -> None:
+        """Add targets the database says are due but the heap does not hold.
+
+        That covers targets another member or the bot added. Entries already in the heap are
+        kept, since they may carry a deliberate deferral; targets another member polled or
+        removed are caught when they are popped.
+        """
+        if not self._scheduler_loaded:
+            return
+        added = 0
+        for target in await self.async_storage.list_due_targets(int(time.time())):
+            if target.user_id in self.scheduler or target.user_id in self._in_flight:
+                continue
+            self.scheduler.schedule(target.user_id, target.next_due_at)
+            added += 1
+        if added:
+            self._schedule_changed.set()
+
+    def _next_due_at(self, target: TargetRecord) -> int:
+        return int(time.time()) + target.poll_interval(self.config.monitor.default_poll_interval_seconds)
 
-    def _target_due(self, target: TargetRecord) -> bool:
-        if not target.last_polled_at:
-            return True
-        last_polled = datetime.fromisoformat(target.last_polled_at)
-        due_after = last_polled.timestamp() + target.poll_interval(self.config.monitor.default_poll_interval_seconds)
-        return datetime.now(timezone.utc).timestamp() >= due_after
+    def _schedule_target(self, target: TargetRecord, due_at: float | None = None) -> None:
+        if not self._scheduler_loaded:
+            return
+        self.scheduler.schedule(target.user_id, self._next_due_at(target) if due_at is None else due_at)
+        self._schedule_changed.set()
+
+    def _unschedule_target(self, user_id: str) -> None:
+        if not self._scheduler_loaded:
+            return
+        self.scheduler.remove(user_id)
+        self._schedule_changed.set()
 
     async def sync_target(self, identifier: str, send_alerts: bool = False) -> SyncResult:
-        target = self.storage.get_target(identifier)
+        target = await self.async_storage.get_target(identifier)
         if target is None:
             raise ValueError(f"Target `{identifier}` is not configured.")
 
         observed_at = datetime.now(timezone.utc)
-        fetched_users = await self._run_with_retries(
-            lambda: self._fetch_following_snapshot(target.user_id),
+        # Seconds per stage; fetch excludes the backoff sleeps in retry_wait and the diff work.
+        timings: dict[str, float] = {}
+        sync_started = time.perf_counter()
+        following_count: int | None = None
+        probed = self.config.monitor.change_probe_enabled
+        if probed:
+            following_count = await self._run_with_retries(
+                lambda: self.twitter.following_count(target.user_id),
+                operation_name=f"probe following count for {target.user_id}",
+                kind="probe",
+                timings=timings,
+            )
+            timings["probe"] = time.perf_counter() - sync_started - timings.get("retry_wait", 0.0)
+            if target.last_seen_followed_user_id is not None and self._probe_unchanged(target, following_count):
+                next_due_at = self._next_due_at(target)
+                persist_started = time.perf_counter()
+                await self.async_storage.write(
+                    lambda db: db.set_target_poll_success(
+                        target.user_id,
+                        None,
+                        next_due_at=next_due_at,
+                        sync_ms=(time.perf_counter() - sync_started) * 1000,
+                    )
+                )
+                self.last_runtime_error = None
+                self.degraded = False
+                return SyncResult(
+                    target_user_id=target.user_id,
+                    target_label=target.display_label(),
+                    bootstrapped=False,
+                    fetched_count=0,
+                    inserted_count=0,
+                    queued_count=0,
+                    last_seen_followed_user_id=target.last_seen_followed_user_id,
+                    observed_at=observed_at,
+                    next_due_at=next_due_at,
+                    scan_stop_reason="probe_unchanged",
+                    probed=True,
+                    timings_ms=self._finish_timings(timings, sync_started, persist_started),
+                )
+
+        fetch_started = time.perf_counter()
+        retry_wait_before = timings.get("retry_wait", 0.0)
+        scan: FollowScan = await self._run_with_retries(
+            lambda: self._scan_following(target),
             operation_name=f"fetch following for {target.user_id}",
+            kind="fetch",
+            timings=timings,
+        )
+        scanned_at = int(time.time())
+        persist_started = time.perf_counter()
+        timings["diff"] = scan.diff_seconds
+        timings["fetch"] = (
+            persist_started - fetch_started - (timings.get("retry_wait", 0.0) - retry_wait_before) - scan.diff_seconds
         )
 
-        current_head = fetched_users[0] if fetched_users else None
+        current_head = scan.head
+        next_due_at = self._next_due_at(target)
         if target.last_seen_followed_user_id is None:
-            self.storage.set_target_poll_success(
-                target.user_id,
-                current_head.id if current_head else None,
-                username=target.username,
-                display_name=target.display_name,
+            await self.async_storage.write(
+                lambda db: self._commit_poll_success(
+                    db,
+                    target,
+                    scan,
+                    current_head.id if current_head else None,
+                    next_due_at,
+                    following_count=following_count,
+                    scanned_at=scanned_at,
+                    sync_ms=(time.perf_counter() - sync_started) * 1000,
+                )
             )
             return SyncResult(
                 target_user_id=target.user_id,
                 target_label=target.display_label(),
                 bootstrapped=True,
-                fetched_count=len(fetched_users),
+                fetched_count=scan.fetched_count,
                 inserted_count=0,
-                notified_count=0,
+                queued_count=0,
                 last_seen_followed_user_id=current_head.id if current_head else None,
                 observed_at=observed_at,
+                next_due_at=next_due_at,
+                scan_stop_reason=scan.stop_reason,
+                probed=probed,
+                timings_ms=self._finish_timings(timings, sync_started, persist_started),
             )
 
-        new_users: list[ResolvedUser] = []
-        for followed_user in fetched_users:
-            if followed_user.id == target.last_seen_followed_user_id:
-                break
-            new_users.append(followed_user)
-
-        inserted_count = 0
-        notified_count = 0
-        for followed_user in reversed(new_users):
-            event_id = self.storage.record_follow_event(
+        new_users = list(reversed(scan.new_users))
+        alert_sinks = self.router.sinks_for(target) if send_alerts else ()
+        event_ids = await self.async_storage.record_follow_events(
+            [
                 FollowEvent(
                     target_user_id=target.user_id,
-                    target_username=target.username,
-                    target_display_name=target.display_label(),
                     followed_user_id=followed_user.id,
+                    observed_at=observed_at.replace(microsecond=0).isoformat(),
                     followed_username=followed_user.username,
                     followed_display_name=followed_user.display_name,
                     followed_bio=followed_user.description,
                     followed_profile_image_url=followed_user.profile_image_url,
-                    observed_at=observed_at.replace(microsecond=0).isoformat(),
-                    payload_json=json.dumps(
-                        {
-                            "target_user_id": target.user_id,
-                            "followed_user_id": followed_user.id,
-                            "followed_username": followed_user.username,
-                        }
-                    ),
                 )
+                for followed_user in new_users
+            ],
+            alert_sinks=alert_sinks,
+        )
+        inserted_count = sum(1 for event_id in event_ids if event_id)
+        if alert_sinks and inserted_count:
+            # Delivery happens in the outbox, so a slow or throttled webhook never holds up polling.
+            self.outbox.wake()
+
+        last_seen = current_head.id if current_head else target.last_seen_followed_user_id
+        await self.async_storage.write(
+            lambda db: self._commit_poll_success(
+                db,
+                target,
+                scan,
+                last_seen,
+                next_due_at,
+                following_count=following_count,
+                scanned_at=scanned_at,
+                sync_ms=(time.perf_counter() - sync_started) * 1000,
             )
-            if not event_id:
-                continue
-            inserted_count += 1
-            if send_alerts:
-                delivered = await self.notifier.send_follow_alert(target, followed_user)
-                if delivered:
-                    self.storage.mark_event_notified(event_id)
-                    notified_count += 1
-
-        self.storage.set_target_poll_success(
-            target.user_id,
-            current_head.id if current_head else target.last_seen_followed_user_id,
-            username=target.username,
-            display_name=target.display_name,
         )
         self.last_runtime_error = None
         self.degraded = False
@@ -174,12 +580,81 @@ class AlphaMonitorService:
             target_user_id=target.user_id,
             target_label=target.display_label(),
             bootstrapped=False,
-            fetched_count=len(fetched_users),
+            fetched_count=scan.fetched_count,
             inserted_count=inserted_count,
-            notified_count=notified_count,
+            queued_count=inserted_count if alert_sinks else 0,
             last_seen_followed_user_id=current_head.id if current_head else target.last_seen_followed_user_id,
             observed_at=observed_at,
+            next_due_at=next_due_at,
+            scan_stop_reason=scan.stop_reason,
+            probed=probed,
+            timings_ms=self._finish_timings(timings, sync_started, persist_started),
+        )
+
+    def _finish_timings(self, timings: dict[str, float], sync_started: float, persist_started: float) -> dict[str, float]:
+        """Close the persist and total stages, feed the stage histogram and return milliseconds."""
+        now = time.perf_counter()
+        timings["persist"] = now - persist_started
+        timings["total"] = now - sync_started
+        for stage, seconds in timings.items():
+            self.metrics.sync_seconds.observe(seconds, stage)
+        return {stage: round(seconds * 1000, 2) for stage, seconds in timings.items()}
+
+    def _probe_unchanged(self, target: TargetRecord, following_count: int | None) -> bool:
+        """True when the probe shows nothing to scan for; also records the outcome."""
+        if following_count is None:
+            self.probe_stats.unavailable += 1
+            return False
+        if target.following_count != following_count:
+            self.probe_stats.changed += 1
+            return False
+        # An unfollow plus a follow leaves the count unchanged, so scan anyway once in a while.
+        staleness = self.config.monitor.change_probe_max_staleness_seconds
+        if target.last_scanned_at is None or time.time() - target.last_scanned_at >= staleness:
+            self.probe_stats.stale += 1
+            return False
+        self.probe_stats.unchanged += 1
+        return True
+
+    @staticmethod
+    def _commit_poll_success(
+        db: AppDatabase,
+        target: TargetRecord,
+        scan: FollowScan,
+        last_seen: str | None,
+        next_due_at: int,
+        following_count: int | None = None,
+        scanned_at: int | None = None,
+        sync_ms: float | None = None,
+    ) -> None:
+        # Every fetched profile refreshes the resolution cache in the same commit as the poll result.
+        with db.transaction():
+            db.cache_twitter_users(scan.users)
+            db.set_target_poll_success(
+                target.user_id,
+                last_seen,
+                username=target.username,
+                display_name=target.display_name,
+                next_due_at=next_due_at,
+                following_count=following_count,
+                scanned_at=scanned_at,
+                sync_ms=sync_ms,
+            )
+
+    async def resolve_user(self, identifier: str) -> ResolvedUser:
+        """Resolve a user ID or handle, answering from the twitter_users cache while it is fresh."""
+        ttl = self.config.monitor.user_cache_ttl_seconds
+        if ttl and ttl > 0:
+            cached = await self.async_storage.lookup_twitter_user(identifier, ttl)
+            if cached is not None:
+                return cached
+        resolved = await self._run_with_retries(
+            lambda: self.twitter.resolve_user(identifier),
+            operation_name=f"resolve target {identifier}",
+            kind="resolve",
         )
+        await self.async_storage.cache_twitter_users([resolved])
+        return resolved
 
     async def add_target(
         self,
@@ -188,11 +663,8 @@ class AlphaMonitorService:
         poll_interval_seconds: int | None = None,
         actor: AdminActor | None = None,
     ) -> CommandResult:
-        resolved = await self._run_with_retries(
-            lambda: self.twitter.resolve_user(identifier),
-            operation_name=f"resolve target {identifier}",
-        )
-        self.storage.upsert_target(
+        resolved = await self.resolve_user(identifier)
+        await self.async_storage.upsert_target(
             user_id=resolved.id,
             username=resolved.username,
             display_name=resolved.display_name,
@@ -201,8 +673,11 @@ class AlphaMonitorService:
             active=True,
         )
         result = await self.sync_target(resolved.id, send_alerts=False)
+        target = await self.async_storage.get_target(resolved.id)
+        if target is not None:
+            self._schedule_target(target, result.next_due_at)
         if actor:
-            self.storage.record_admin_action(
+            await self.async_storage.record_admin_action(
                 actor.actor_id,
                 actor.actor_name,
                 "targets.add",
@@ -223,11 +698,14 @@ class AlphaMonitorService:
         )
 
     async def remove_target(self, identifier: str, actor: AdminActor | None = None) -> CommandResult:
-        removed = self.storage.deactivate_target(identifier)
+        target = await self.async_storage.get_target(identifier)
+        removed = await self.async_storage.deactivate_target(identifier)
         if not removed:
             return CommandResult(ok=False, message=f"Target `{identifier}` was not found.")
+        if target is not None:
+            self._unschedule_target(target.user_id)
         if actor:
-            self.storage.record_admin_action(
+            await self.async_storage.record_admin_action(
                 actor.actor_id,
                 actor.actor_name,
                 "targets.remove",
@@ -236,15 +714,15 @@ class AlphaMonitorService:
         return CommandResult(ok=True, message=f"Target `{identifier}` deactivated.")
 
     async def pause(self, actor: AdminActor | None = None) -> CommandResult:
-        self.storage.set_paused(True)
+        await self.async_storage.set_paused(True)
         if actor:
-            self.storage.record_admin_action(actor.actor_id, actor.actor_name, "monitor.pause", {})
+            await self.async_storage.record_admin_action(actor.actor_id, actor.actor_name, "monitor.pause", {})
         return CommandResult(ok=True, message="Monitor paused.")
 
     async def resume(self, actor: AdminActor | None = None) -> CommandResult:
-        self.storage.set_paused(False)
+        await self.async_storage.set_paused(False)
         if actor:
-            self.storage.record_admin_action(actor.actor_id, actor.actor_name, "monitor.resume", {})
+            await self.async_storage.record_admin_action(actor.actor_id, actor.actor_name, "monitor.resume", {})
         return CommandResult(ok=True, message="Monitor resumed.")
 
     async def refresh_worker_health(self) -> None:
@@ -253,25 +731,62 @@ class AlphaMonitorService:
         except TwitterClientError as exc:
             self.degraded = True
             self.last_runtime_error = str(exc)
-            self.storage.set_state("last_runtime_error", self.last_runtime_error)
+            await self.async_storage.set_state("last_runtime_error", self.last_runtime_error)
             return
 
-        for account in accounts:
-            self.storage.upsert_worker_health(account)
+        def _store_accounts(db: AppDatabase) -> list[WorkerHealthRecord]:
+            with db.transaction():
+                for account in accounts:
+                    db.upsert_worker_health(account)
+            return db.list_worker_health()
+
+        self.workers.sync_accounts(accounts, await self.async_storage.write(_store_accounts))
+        self._last_worker_refresh = time.monotonic()
         self.degraded = not any(account.get("active") for account in accounts) if accounts else True
 
     async def health_check(self) -> dict[str, Any]:
         await self.refresh_worker_health()
-        snapshot = self.storage.build_runtime_snapshot(
+        snapshot = await self.async_storage.build_runtime_snapshot(
             started_at=self.started_at,
-            paused=self.storage.is_paused(),
+            paused=await self.async_storage.is_paused(),
             degraded=self.degraded,
-            last_cycle_at=self.last_cycle_at or self.storage.get_state("last_cycle_at"),
-            last_alert_at=self.storage.get_state("last_alert_at"),
-            last_runtime_error=self.last_runtime_error or self.storage.get_state("last_runtime_error"),
+            last_cycle_at=self.last_cycle_at or await self.async_storage.get_state("last_cycle_at"),
+            last_alert_at=await self.async_storage.get_state("last_alert_at"),
+            last_runtime_error=self.last_runtime_error or await self.async_storage.get_state("last_runtime_error"),
         )
+        snapshot.worker_budgets = self.workers.snapshot()
+        snapshot.deferred_syncs = self.workers.deferred_count
+        snapshot.state_cache = self.storage.state_cache_stats()
+        stats = getattr(self.notifier, "stats", None)
+        if stats is not None:
+            snapshot.notifier = stats.snapshot()
+        snapshot.pending_alerts = await self.async_storage.count_pending_alerts()
+        snapshot.outbox = self.outbox.stats.snapshot()
+        snapshot.probe = self.probe_stats.snapshot()
+        snapshot.slowest_targets = await self.async_storage.slowest_targets()
+        snapshot.event_loop = self.loop_watchdog.snapshot()
+        if self.shard is not None:
+            snapshot.shard = await self.shard.snapshot()
         return asdict(snapshot)
 
+    async def collect_metrics(self) -> None:
+        """Copy state kept elsewhere into the metrics gauges; runs on every scrape."""
+        metrics = self.metrics
+        metrics.scheduled_targets.set(len(self.scheduler))
+        metrics.due_targets.set(self.scheduler.due_count())
+        metrics.pending_alerts.set(await self.async_storage.count_pending_alerts())
+        for outcome, value in self.outbox.stats.snapshot().items():
+            metrics.outbox.set_total(value, outcome)
+        for gauge in (metrics.worker_remaining, metrics.worker_available, metrics.worker_failures):
+            gauge.clear()
+        for budget in self.workers.snapshot():
+            worker = budget["username"]
+            metrics.worker_remaining.set(budget["remaining_requests"], worker)
+            metrics.worker_available.set(1 if budget["available"] else 0, worker)
+            metrics.worker_failures.set(budget["consecutive_failures"], worker)
+        metrics.paused.set(1 if await self.async_storage.is_paused() else 0)
+        metrics.degraded.set(1 if self.degraded else 0)
+
     async def status_text(self) -> str:
         snapshot = await self.health_check()
         lines = [
@@ -282,23 +797,68 @@ class AlphaMonitorService:
             f"last_alert_at: {snapshot['last_alert_at']}",
             f"active_targets: {snapshot['active_targets']}",
             f"healthy_workers: {snapshot['healthy_workers']}/{snapshot['total_workers']}",
+            f"worker_budget: {_format_worker_budgets(snapshot['worker_budgets'])}",
+            f"deferred_syncs: {snapshot['deferred_syncs']}",
+            f"shard: {_format_shard(snapshot['shard'])}",
+            f"pending_alerts: {snapshot['pending_alerts']} (dropped {snapshot['outbox']['dropped']})",
+            f"probe: {_format_probe(snapshot['probe'], self.config.monitor.change_probe_enabled)}",
+            f"slowest_targets: {_format_slowest_targets(snapshot['slowest_targets'])}",
+            f"event_loop: {_format_event_loop(snapshot['event_loop'], self.config.monitor.loop_watchdog_enabled)}",
+            f"state_cache: {snapshot['state_cache']['hits']} hits / {snapshot['state_cache']['misses']} misses",
             f"last_runtime_error: {snapshot['last_runtime_error']}",
         ]
         return "\n".join(lines)
 
-    async def _fetch_following_snapshot(self, user_id: str) -> list[ResolvedUser]:
-        async def _collect() -> list[ResolvedUser]:
-            results: list[ResolvedUser] = []
-            async for user in self.twitter.iter_following(
-                user_id,
-                limit=self.config.monitor.max_follow_scan,
-            ):
-                results.append(user)
-            return results
+    async def _scan_following(self, target: TargetRecord) -> FollowScan:
+        monitor = self.config.monitor
+        last_seen = target.last_seen_followed_user_id
+        streaming = monitor.streaming_diff
+        known_ids: set[str] = set()
+        lookup_started = time.perf_counter()
+        if streaming and last_seen is not None and monitor.known_run_stop_count > 0:
+            known_ids = await self.async_storage.recent_followed_user_ids(target.user_id, limit=monitor.max_follow_scan)
+        lookup_seconds = time.perf_counter() - lookup_started
+        # A bootstrap only needs the current head, so streaming mode stops after one user.
+        limit = 1 if streaming and last_seen is None else monitor.max_follow_scan
+
+        async def _collect() -> FollowScan:
+            scan = FollowScan(diff_seconds=lookup_seconds)
+            head_found = last_seen is None
+            known_run = 0
+            async with aclosing(self.twitter.iter_following(target.user_id, limit=limit)) as users:
+                async for user in users:
+                    # Everything in the loop body is diff work; the time between iterations is paging.
+                    user_started = time.perf_counter()
+                    try:
+                        scan.fetched_count += 1
+                        scan.users.append(user)
+                        if scan.head is None:
+                            scan.head = user
+                        if head_found:
+                            continue
+                        if user.id == last_seen:
+                            head_found = True
+                            if streaming:
+                                scan.stop_reason = "known_head"
+                                break
+                            continue
+                        if user.id in known_ids:
+                            known_run += 1
+                            if known_run >= monitor.known_run_stop_count:
+                                scan.stop_reason = "known_run"
+                                break
+                            continue
+                        known_run = 0
+                        scan.new_users.append(user)
+                    finally:
+                        scan.diff_seconds += time.perf_counter() - user_started
+            if scan.stop_reason is None:
+                scan.stop_reason = "limit" if scan.fetched_count >= limit else "exhausted"
+            return scan
 
         return await asyncio.wait_for(
             _collect(),
-            timeout=self.config.monitor.api_timeout_seconds,
+            timeout=monitor.api_timeout_seconds,
         )
 
     async def _run_with_retries(
@@ -306,6 +866,8 @@ class AlphaMonitorService:
         action: Callable[[], Awaitable[Any]],
         *,
         operation_name: str,
+        kind: str = "other",
+        timings: dict[str, float] | None = None,
     ) -> Any:
         last_error: Exception | None = None
         for attempt in range(1, self.config.monitor.max_retry_attempts + 1):
@@ -313,12 +875,13 @@ class AlphaMonitorService:
                 return await action()
             except Exception as exc:  # noqa: BLE001
                 last_error = exc
-                if attempt >= self.config.monitor.max_retry_attempts:
+                if attempt >= self.config.monitor.max_retry_attempts or is_rate_limit_error(exc):
                     break
                 delay = compute_backoff_seconds(
                     attempt,
                     self.config.monitor.retry_base_delay_seconds,
                 )
+                self.metrics.retries.inc(kind)
                 self.logger.warning(
                     "Retrying %s after failure on attempt %s/%s: %s",
                     operation_name,
@@ -326,8 +889,12 @@ class AlphaMonitorService:
                     self.config.monitor.max_retry_attempts,
                     exc,
                 )
+                slept_since = time.perf_counter()
                 await asyncio.sleep(delay)
+                if timings is not None:
+                    timings["retry_wait"] = timings.get("retry_wait", 0.0) + time.perf_counter() - slept_since
 
+        self.metrics.retries_exhausted.inc(kind)
         error_message = f"{operation_name} failed after {self.config.monitor.max_retry_attempts} attempts: {last_error}"
         self.last_runtime_error = error_message
         self.degraded = True
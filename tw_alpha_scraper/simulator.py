@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from .models import ResolvedUser
+from .twitter import TwitterClientError, TwitterRateLimitError
+from .workers import FOLLOWING_PAGE_SIZE
+
+# Only the head of a timeline is ever scanned, so older follows are trimmed past this many.
+MAX_SIMULATED_FOLLOWING = 250
+
+
+class SimulatedRateLimit(TwitterRateLimitError):
+    """Raised for a simulated 429."""
+
+
+@dataclass(slots=True)
+class SimulationSettings:
+    """Knobs for ``SimulatedTwitterClient``. Rates are per simulated target or per request."""
+
+    follows_per_hour: float = 2.0
+    initial_following: int = 40
+    page_size: int = FOLLOWING_PAGE_SIZE
+    page_latency_seconds: float = 0.0
+    page_latency_jitter: float = 0.25
+    rate_limit_probability: float = 0.0
+    rate_limit_burst: int = 5
+    ban_probability: float = 0.0
+    workers: int = 4
+    seed: int | None = None
+
+
+@dataclass(slots=True)
+class _SimulatedTarget:
+    user: ResolvedUser
+    # Newest first, like the following timeline.
+    following: list[ResolvedUser] = field(default_factory=list)
+    # The list is trimmed, so the profile's following count is kept separately.
+    following_count: int = 0
+    advanced_at: float = 0.0
+
+
+class SimulatedTwitterClient:
+    """Offline stand-in for ``TwitterClient`` with follow churn, paging latency, 429s and bans.
+
+    Targets are created on first use, so a simulation of 50k targets only builds the ones
+    that are polled, and they all start out following the same ``initial_following`` users
+    to keep memory flat. New follows arrive as a Poisson process at ``follows_per_hour`` per
+    target and are materialized lazily whenever a target is read. ``arrivals`` records when
+    each simulated follow happened, so alert latency can be measured end to end.
+
+    Every page request picks the next worker in turn. A request can start a burst of
+    ``rate_limit_burst`` consecutive 429s, and it can get its worker banned, which
+    ``list_accounts`` then reports as inactive. Once every worker is banned, all requests fail.
+    """
+
+    def __init__(self, settings: SimulationSettings | None = None, *, clock: Callable[[], float] = time.time) -> None:
+        self.settings = settings or SimulationSettings()
+        self._clock = clock
+        self._random = random.Random(self.settings.seed)
+        self._targets: dict[str, _SimulatedTarget] = {}
+        self._next_user_id = 10_000_000
+        self._workers = [f"sim-worker-{index + 1}" for index in range(max(1, self.settings.workers))]
+        self._banned: dict[str, str] = {}
+        self._initial_following = [self._new_user() for _ in range(self.settings.initial_following)]
+        self._next_worker = 0
+        self._rate_limited_pages = 0
+        self.arrivals: dict[tuple[str, str], float] = {}
+        self.requests = 0
+        self.rate_limited = 0
+
+    async def resolve_user(self, identifier: str) -> ResolvedUser:
+        await self._request()
+        user_id = identifier.lstrip("@")
+        if not user_id.isdigit():
+            user_id = str(zlib.crc32(user_id.lower().encode("utf-8")))
+        return self._target(user_id).user
+
+    async def following_count(self, user_id: str) -> int | None:
+        await self._request()
+        return self._advance(self._target(user_id)).following_count
+
+    async def iter_following(self, user_id: str, limit: int | None = None):
+        target = self._advance(self._target(user_id))
+        # Snapshot like a real timeline cursor: follows arriving mid-scan show up next time.
+        following = list(target.following)
+        if limit is not None:
+            following = following[:limit]
+        page_size = max(1, self.settings.page_size)
+        for start in range(0, len(following), page_size):
+            await self._request()
+            for user in following[start : start + page_size]:
+                yield user
+        if not following:
+            await self._request()
+
+    async def list_accounts(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "username": username,
+                "active": username not in self._banned,
+                "proxy": None,
+                "last_error": self._banned.get(username),
+            }
+            for username in self._workers
+        ]
+
+    def _target(self, user_id: str) -> _SimulatedTarget:
+        target = self._targets.get(user_id)
+        if target is None:
+            target = _SimulatedTarget(
+                user=ResolvedUser(id=user_id, username=f"target{user_id}", display_name=f"Target {user_id}"),
+                following=list(self._initial_following),
+                following_count=len(self._initial_following),
+                advanced_at=self._clock(),
+            )
+            self._targets[user_id] = target
+        return target
+
+    def _advance(self, target: _SimulatedTarget) -> _SimulatedTarget:
+        now = self._clock()
+        rate = self.settings.follows_per_hour / 3600
+        if rate <= 0:
+            target.advanced_at = now
+            return target
+        # Walk exponential gaps from the last read to now; each gap ends in one new follow.
+        arrived_at = target.advanced_at + self._random.expovariate(rate)
+        while arrived_at <= now:
+            user = self._new_user()
+            target.following.insert(0, user)
+            target.following_count += 1
+            self.arrivals[(target.user.id, user.id)] = arrived_at
+            arrived_at += self._random.expovariate(rate)
+        del target.following[MAX_SIMULATED_FOLLOWING:]
+        target.advanced_at = now
+        return target
+
+    def _new_user(self) -> ResolvedUser:
+        self._next_user_id += 1
+        user_id = str(self._next_user_id)
+        return ResolvedUser(id=user_id, username=f"user{user_id}", display_name=f"User {user_id}")
+
+    async def _request(self) -> None:
+        settings = self.settings
+        self.requests += 1
+        if settings.page_latency_seconds > 0:
+            jitter = 1 + self._random.uniform(-settings.page_latency_jitter, settings.page_latency_jitter)
+            await asyncio.sleep(settings.page_latency_seconds * max(0.0, jitter))
+        active = [username for username in self._workers if username not in self._banned]
+        if not active:
+            raise TwitterClientError("No active accounts in the simulated pool")
+        worker = active[self._next_worker % len(active)]
+        self._next_worker += 1
+        if settings.ban_probability and self._random.random() < settings.ban_probability:
+            self._banned[worker] = "simulated ban"
+        if self._rate_limited_pages or (
+            settings.rate_limit_probability and self._random.random() < settings.rate_limit_probability
+        ):
+            self._rate_limited_pages = (self._rate_limited_pages or settings.rate_limit_burst) - 1
+            self.rate_limited += 1
+            raise SimulatedRateLimit(f"429 Too Many Requests for {worker}")
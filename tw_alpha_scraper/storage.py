@@ -2,13 +2,29 @@ from __future__ import annotations
 
 import json
 import sqlite3
-from contextlib import closing
+import threading
+import time
+from contextlib import contextmanager
 from dataclasses import asdict
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Callable, Iterable, Iterator, Sequence
 
-from .models import FollowEvent, RuntimeSnapshot, TargetConfig, TargetRecord, WorkerHealthRecord
+from .migrations import apply_migrations
+from .models import FollowEvent, ResolvedUser, RuntimeSnapshot, TargetConfig, TargetRecord, WorkerHealthRecord
+
+
+# Stays under SQLITE_MAX_VARIABLE_NUMBER on older SQLite builds.
+IN_CLAUSE_CHUNK_SIZE = 500
+
+
+# Deferred monitor_state writes ride along with the next commit, or are flushed after this long.
+STATE_FLUSH_INTERVAL_SECONDS = 60
+
+# Weight of the newest sync in targets.avg_sync_ms; about the last ten syncs dominate it.
+SYNC_LATENCY_SMOOTHING = 0.2
+
+_MISSING = object()
 
 
 def utcnow_iso() -> str:
@@ -16,95 +32,89 @@ def utcnow_iso() -> str:
 
 
 class AppDatabase:
-    def __init__(self, path: str):
+    def __init__(self, path: str, read_only: bool = False):
         self.path = Path(path)
-        self.path.parent.mkdir(parents=True, exist_ok=True)
-        self._conn = sqlite3.connect(self.path)
+        self.read_only = read_only
+        # Connections may be handed to the storage writer/reader threads (see async_storage).
+        if read_only:
+            self._conn = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            # Only takes effect for new files; existing ones switch on the next full VACUUM.
+            self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL;")
+            self._conn.execute("PRAGMA journal_mode=WAL;")
         self._conn.row_factory = sqlite3.Row
-        self._conn.execute("PRAGMA journal_mode=WAL;")
         self._conn.execute("PRAGMA foreign_keys=ON;")
+        self._transaction_depth = 0
+        self.commit_count = 0
+        # Called with each commit's duration in seconds (the service feeds its commit histogram).
+        self.on_commit: Callable[[float], None] | None = None
+        # monitor_state is read far more often than it changes; the DB stays the source of truth.
+        # Read-only connections live on other threads and would go stale, so they skip the cache.
+        # The writer thread fills the cache while the event loop peeks at it, hence the lock.
+        self._state_lock = threading.Lock()
+        self._state_cache: dict[str, Any] = {}
+        self._pending_state: dict[str, tuple[str, str]] = {}
+        # Deferred writes queued before the outermost open transaction, restored if it rolls back.
+        self._pending_before_transaction: dict[str, tuple[str, str]] = {}
+        self._pending_since: float | None = None
+        self.state_cache_hits = 0
+        self.state_cache_misses = 0
 
     def close(self) -> None:
+        if not self.read_only:
+            self.flush_state()
         self._conn.close()
 
-    def initialize(self) -> None:
-        with closing(self._conn.cursor()) as cur:
-            cur.executescript(
-                """
-                CREATE TABLE IF NOT EXISTS targets (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id TEXT NOT NULL UNIQUE,
-                    username TEXT,
-                    display_name TEXT,
-                    label TEXT,
-                    poll_interval_seconds INTEGER,
-                    active INTEGER NOT NULL DEFAULT 1,
-                    last_seen_followed_user_id TEXT,
-                    last_polled_at TEXT,
-                    last_success_at TEXT,
-                    last_error TEXT,
-                    created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL
-                );
-
-                CREATE TABLE IF NOT EXISTS monitor_state (
-                    key TEXT PRIMARY KEY,
-                    value TEXT NOT NULL,
-                    updated_at TEXT NOT NULL
-                );
-
-                CREATE TABLE IF NOT EXISTS follow_events (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    target_user_id TEXT NOT NULL,
-                    target_username TEXT,
-                    target_display_name TEXT,
-                    followed_user_id TEXT NOT NULL,
-                    followed_username TEXT,
-                    followed_display_name TEXT,
-                    followed_bio TEXT,
-                    followed_profile_image_url TEXT,
-                    observed_at TEXT NOT NULL,
-                    notified_at TEXT,
-                    payload_json TEXT NOT NULL,
-                    UNIQUE(target_user_id, followed_user_id)
-                );
-                CREATE INDEX IF NOT EXISTS idx_follow_events_target_observed
-                    ON follow_events(target_user_id, observed_at DESC);
-
-                CREATE TABLE IF NOT EXISTS worker_health (
-                    username TEXT PRIMARY KEY,
-                    active INTEGER NOT NULL DEFAULT 0,
-                    proxy TEXT,
-                    is_healthy INTEGER NOT NULL DEFAULT 1,
-                    last_checked_at TEXT NOT NULL,
-                    last_success_at TEXT,
-                    last_failure_at TEXT,
-                    consecutive_failures INTEGER NOT NULL DEFAULT 0,
-                    cooldown_until TEXT,
-                    last_error TEXT,
-                    details_json TEXT
-                );
-
-                CREATE TABLE IF NOT EXISTS admin_actions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    actor_id TEXT NOT NULL,
-                    actor_name TEXT,
-                    action TEXT NOT NULL,
-                    details_json TEXT,
-                    created_at TEXT NOT NULL
-                );
-                """
-            )
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Group writes into one commit. Nested blocks join the outermost one.
+
+        Do not await inside the block: the connection is shared by every coroutine.
+        """
+        if self._transaction_depth == 0:
+            with self._state_lock:
+                self._pending_before_transaction = dict(self._pending_state)
+        self._transaction_depth += 1
+        try:
+            yield
+        except BaseException:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self._conn.rollback()
+                # State deferred inside the block belongs to the rolled back work.
+                with self._state_lock:
+                    self._pending_state = self._pending_before_transaction
+                    if not self._pending_state:
+                        self._pending_since = None
+                self.invalidate_state_cache()
+            raise
+        self._transaction_depth -= 1
+        self._commit()
+
+    def _commit(self) -> None:
+        if self._transaction_depth:
+            return
+        started = time.perf_counter()
+        self._write_pending_state()
         self._conn.commit()
+        self.commit_count += 1
+        if self.on_commit is not None:
+            self.on_commit(time.perf_counter() - started)
+
+    def initialize(self) -> None:
+        apply_migrations(self._conn)
 
     def seed_targets(self, targets: Iterable[TargetConfig]) -> None:
-        for target in targets:
-            self.upsert_target(
-                user_id=str(target.user_id),
-                label=target.label,
-                poll_interval_seconds=target.poll_interval_override,
-                active=True,
-            )
+        with self.transaction():
+            for target in targets:
+                self.upsert_target(
+                    user_id=str(target.user_id),
+                    label=target.label,
+                    poll_interval_seconds=target.poll_interval_override,
+                    active=True,
+                )
 
     def upsert_target(
         self,
@@ -116,7 +126,8 @@ class AppDatabase:
         active: bool = True,
     ) -> None:
         now = utcnow_iso()
-        existing = self.get_target(user_id)
+        # By user_id only: get_target would also match another target's username or label.
+        existing = self._conn.execute("SELECT 1 FROM targets WHERE user_id = ?", (user_id,)).fetchone()
         if existing:
             self._conn.execute(
                 """
@@ -158,7 +169,7 @@ class AppDatabase:
                     now,
                 ),
             )
-        self._conn.commit()
+        self._commit()
 
     def list_targets(self, active_only: bool = False) -> list[TargetRecord]:
         query = "SELECT * FROM targets"
@@ -169,11 +180,29 @@ class AppDatabase:
         rows = self._conn.execute(query, params).fetchall()
         return [self._row_to_target(row) for row in rows]
 
+    def list_due_targets(self, now: int, limit: int | None = None) -> list[TargetRecord]:
+        rows = self._conn.execute(
+            """
+            SELECT * FROM targets
+            WHERE active = 1 AND next_due_at <= ?
+            ORDER BY next_due_at
+            LIMIT ?
+            """,
+            (now, -1 if limit is None else limit),
+        ).fetchall()
+        return [self._row_to_target(row) for row in rows]
+
     def get_target(self, identifier: str) -> TargetRecord | None:
+        # One indexed branch per identifier kind. A compound SELECT has no inherent order, so the
+        # branch rank makes a user_id match win over username, then label.
         row = self._conn.execute(
             """
-            SELECT * FROM targets
-            WHERE user_id = ? OR username = ? OR label = ?
+            SELECT *, 0 AS match_rank FROM targets WHERE user_id = ?
+            UNION ALL
+            SELECT *, 1 AS match_rank FROM targets WHERE username = ?
+            UNION ALL
+            SELECT *, 2 AS match_rank FROM targets WHERE label = ?
+            ORDER BY match_rank, id
             LIMIT 1
             """,
             (identifier, identifier.lstrip("@"), identifier),
@@ -191,69 +220,389 @@ class AppDatabase:
             "UPDATE targets SET active = 0, updated_at = ? WHERE user_id = ?",
             (now, target.user_id),
         )
-        self._conn.commit()
+        self._commit()
         return True
 
-    def record_follow_event(self, event: FollowEvent) -> int | None:
-        cur = self._conn.execute(
+    def record_follow_event(self, event: FollowEvent, alert_sinks: Sequence[str] = ()) -> int | None:
+        return self.record_follow_events([event], alert_sinks=alert_sinks)[0]
+
+    def record_follow_events(
+        self,
+        events: list[FollowEvent],
+        alert_sinks: Sequence[str] = (),
+    ) -> list[int | None]:
+        """Insert follow events in one statement batch and one commit.
+
+        Profile fields go to twitter_users once per account; follow_events only keeps ids and
+        timestamps. Each new event is queued in the alert outbox once per sink in ``alert_sinks``.
+        Returns the new row id for each event, or None where the follow was already recorded.
+        """
+        if not events:
+            return []
+        with self.transaction():
+            self._upsert_twitter_users(events)
+            existing = self._follow_event_ids(events).keys() | self._archived_follow_pairs(events)
+            fresh = [event for event in events if (event.target_user_id, event.followed_user_id) not in existing]
+            self._conn.executemany(
+                """
+                INSERT OR IGNORE INTO follow_events (target_user_id, followed_user_id, observed_at)
+                VALUES (?, ?, ?)
+                """,
+                [(event.target_user_id, event.followed_user_id, event.observed_at) for event in fresh],
+            )
+            inserted = self._follow_event_ids(fresh) if fresh else {}
+            if alert_sinks and inserted:
+                queued_at = int(time.time())
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO alert_deliveries (event_id, sink, next_attempt_at) VALUES (?, ?, ?)",
+                    [(event_id, sink, queued_at) for event_id in inserted.values() for sink in alert_sinks],
+                )
+        ids: list[int | None] = []
+        seen: set[tuple[str, str]] = set()
+        for event in events:
+            key = (event.target_user_id, event.followed_user_id)
+            # Only the first occurrence of a pair in the batch counts as new.
+            ids.append(inserted.get(key) if key not in seen else None)
+            seen.add(key)
+        return ids
+
+    def cache_twitter_users(self, users: Iterable[ResolvedUser], resolved_at: int | None = None) -> None:
+        """Remember profiles fetched from Twitter so ``lookup_twitter_user`` can skip the network."""
+        resolved_at = int(time.time()) if resolved_at is None else resolved_at
+        now = utcnow_iso()
+        profiles = {
+            user.id: (user.id, user.username, user.display_name, user.description, user.profile_image_url, now, resolved_at)
+            for user in users
+            if user.id
+        }
+        if not profiles:
+            return
+        self._conn.executemany(
             """
-            INSERT OR IGNORE INTO follow_events (
-                target_user_id, target_username, target_display_name,
-                followed_user_id, followed_username, followed_display_name,
-                followed_bio, followed_profile_image_url, observed_at, payload_json
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            INSERT INTO twitter_users (user_id, username, display_name, bio, profile_image_url, updated_at, resolved_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET
+                updated_at = CASE
+                    WHEN twitter_users.username IS NOT excluded.username
+                      OR twitter_users.display_name IS NOT excluded.display_name
+                      OR twitter_users.bio IS NOT excluded.bio
+                      OR twitter_users.profile_image_url IS NOT excluded.profile_image_url
+                    THEN excluded.updated_at ELSE twitter_users.updated_at END,
+                username = excluded.username,
+                display_name = excluded.display_name,
+                bio = excluded.bio,
+                profile_image_url = excluded.profile_image_url,
+                resolved_at = excluded.resolved_at
             """,
-            (
-                event.target_user_id,
-                event.target_username,
-                event.target_display_name,
+            list(profiles.values()),
+        )
+        self._commit()
+
+    def lookup_twitter_user(self, identifier: str, max_age_seconds: int, now: int | None = None) -> ResolvedUser | None:
+        """Return a cached profile by user ID or handle if it was resolved within ``max_age_seconds``."""
+        cutoff = (int(time.time()) if now is None else now) - max_age_seconds
+        handle = identifier.lstrip("@")
+        if identifier.isdigit():
+            query = "SELECT * FROM twitter_users WHERE user_id = ? AND resolved_at >= ?"
+        else:
+            query = "SELECT * FROM twitter_users WHERE username = ? COLLATE NOCASE AND resolved_at >= ? ORDER BY resolved_at DESC LIMIT 1"
+        row = self._conn.execute(query, (handle, cutoff)).fetchone()
+        if row is None:
+            return None
+        return ResolvedUser(
+            id=row["user_id"],
+            username=row["username"],
+            display_name=row["display_name"],
+            description=row["bio"],
+            profile_image_url=row["profile_image_url"],
+        )
+
+    def _upsert_twitter_users(self, events: list[FollowEvent]) -> None:
+        profiles = {
+            event.followed_user_id: (
                 event.followed_user_id,
                 event.followed_username,
                 event.followed_display_name,
                 event.followed_bio,
                 event.followed_profile_image_url,
                 event.observed_at,
-                event.payload_json,
-            ),
+            )
+            for event in events
+        }
+        # Unchanged profiles are left alone, so updated_at is when the profile last changed.
+        self._conn.executemany(
+            """
+            INSERT INTO twitter_users (user_id, username, display_name, bio, profile_image_url, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET
+                username = excluded.username,
+                display_name = excluded.display_name,
+                bio = excluded.bio,
+                profile_image_url = excluded.profile_image_url,
+                updated_at = excluded.updated_at
+            WHERE twitter_users.username IS NOT excluded.username
+               OR twitter_users.display_name IS NOT excluded.display_name
+               OR twitter_users.bio IS NOT excluded.bio
+               OR twitter_users.profile_image_url IS NOT excluded.profile_image_url
+            """,
+            list(profiles.values()),
         )
-        self._conn.commit()
-        if cur.rowcount == 0:
-            return None
-        return cur.lastrowid or None
+
+    @staticmethod
+    def _follow_id_chunks(events: list[FollowEvent]) -> Iterator[tuple[str, list[str]]]:
+        by_target: dict[str, list[str]] = {}
+        for event in events:
+            by_target.setdefault(event.target_user_id, []).append(event.followed_user_id)
+        for target_user_id, followed_ids in by_target.items():
+            for offset in range(0, len(followed_ids), IN_CLAUSE_CHUNK_SIZE):
+                yield target_user_id, followed_ids[offset : offset + IN_CLAUSE_CHUNK_SIZE]
+
+    def _follow_event_ids(self, events: list[FollowEvent]) -> dict[tuple[str, str], int]:
+        found: dict[tuple[str, str], int] = {}
+        for target_user_id, chunk in self._follow_id_chunks(events):
+            rows = self._conn.execute(
+                f"""
+                SELECT id, followed_user_id FROM follow_events
+                WHERE target_user_id = ? AND followed_user_id IN ({", ".join("?" * len(chunk))})
+                """,
+                (target_user_id, *chunk),
+            ).fetchall()
+            for row in rows:
+                found[(target_user_id, row["followed_user_id"])] = row["id"]
+        return found
+
+    def _archived_follow_pairs(self, events: list[FollowEvent]) -> set[tuple[str, str]]:
+        found: set[tuple[str, str]] = set()
+        for target_user_id, chunk in self._follow_id_chunks(events):
+            rows = self._conn.execute(
+                f"""
+                SELECT followed_user_id FROM archived_follows
+                WHERE target_user_id = ? AND followed_user_id IN ({", ".join("?" * len(chunk))})
+                """,
+                (target_user_id, *chunk),
+            ).fetchall()
+            found.update((target_user_id, row["followed_user_id"]) for row in rows)
+        return found
+
+    def recent_followed_user_ids(self, target_user_id: str, limit: int = 100) -> set[str]:
+        rows = self._conn.execute(
+            """
+            SELECT followed_user_id, observed_at FROM follow_events WHERE target_user_id = ?
+            UNION ALL
+            SELECT followed_user_id, observed_at FROM archived_follows WHERE target_user_id = ?
+            ORDER BY observed_at DESC
+            LIMIT ?
+            """,
+            (target_user_id, target_user_id, limit),
+        ).fetchall()
+        return {row["followed_user_id"] for row in rows}
 
     def mark_event_notified(self, event_id: int) -> None:
+        self.mark_events_notified([event_id])
+
+    def mark_events_notified(self, event_ids: list[int]) -> None:
+        if not event_ids:
+            return
+        now = utcnow_iso()
+        with self.transaction():
+            self._conn.executemany(
+                "UPDATE follow_events SET notified_at = ? WHERE id = ?",
+                [(now, event_id) for event_id in event_ids],
+            )
+            self.set_state("last_alert_at", now)
+
+    def mark_alerts_delivered(self, deliveries: list[tuple[int, str]]) -> None:
+        """Close the given (event_id, sink) deliveries; events with no sink left pending become notified."""
+        if not deliveries:
+            return
         now = utcnow_iso()
+        with self.transaction():
+            self._conn.executemany(
+                """
+                UPDATE alert_deliveries
+                SET delivered_at = ?, next_attempt_at = NULL, last_error = NULL
+                WHERE event_id = ? AND sink = ?
+                """,
+                [(now, event_id, sink) for event_id, sink in deliveries],
+            )
+            self._conn.executemany(
+                """
+                UPDATE follow_events SET notified_at = ?
+                WHERE id = ? AND notified_at IS NULL AND NOT EXISTS (
+                    SELECT 1 FROM alert_deliveries
+                    WHERE event_id = follow_events.id AND next_attempt_at IS NOT NULL
+                )
+                """,
+                [(now, event_id) for event_id in {event_id for event_id, _ in deliveries}],
+            )
+            self.set_state("last_alert_at", now)
+
+    def pending_alerts(
+        self,
+        now: int,
+        limit: int = 50,
+        exclude_sinks: Sequence[str] = (),
+    ) -> list[dict[str, Any]]:
+        excluded = ",".join("?" for _ in exclude_sinks)
+        sink_filter = f"AND d.sink NOT IN ({excluded})" if exclude_sinks else ""
+        rows = self._conn.execute(
+            f"""
+            SELECT d.event_id AS id, d.sink, d.attempts AS delivery_attempts,
+                   e.target_user_id, e.followed_user_id,
+                   u.username AS followed_username,
+                   u.display_name AS followed_display_name,
+                   u.bio AS followed_bio,
+                   u.profile_image_url AS followed_profile_image_url
+            FROM alert_deliveries AS d
+            JOIN follow_events AS e ON e.id = d.event_id
+            LEFT JOIN twitter_users AS u ON u.user_id = e.followed_user_id
+            WHERE d.next_attempt_at IS NOT NULL AND d.next_attempt_at <= ? {sink_filter}
+            ORDER BY d.next_attempt_at, d.event_id
+            LIMIT ?
+            """,
+            (now, *exclude_sinks, limit),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def next_alert_due_at(self, exclude_sinks: Sequence[str] = ()) -> int | None:
+        excluded = ",".join("?" for _ in exclude_sinks)
+        sink_filter = f"AND sink NOT IN ({excluded})" if exclude_sinks else ""
+        row = self._conn.execute(
+            f"SELECT MIN(next_attempt_at) AS due FROM alert_deliveries WHERE next_attempt_at IS NOT NULL {sink_filter}",
+            tuple(exclude_sinks),
+        ).fetchone()
+        return None if row["due"] is None else int(row["due"])
+
+    def count_pending_alerts(self) -> int:
+        return int(
+            self._conn.execute(
+                "SELECT COUNT(*) AS count FROM alert_deliveries WHERE next_attempt_at IS NOT NULL"
+            ).fetchone()["count"]
+        )
+
+    def schedule_alert_retry(self, event_id: int, sink: str, next_attempt_at: int | None, error: str) -> None:
+        """Record a failed delivery; a None ``next_attempt_at`` gives up on that sink."""
         self._conn.execute(
-            "UPDATE follow_events SET notified_at = ? WHERE id = ?",
-            (now, event_id),
+            """
+            UPDATE alert_deliveries
+            SET attempts = attempts + 1,
+                next_attempt_at = ?,
+                last_error = ?
+            WHERE event_id = ? AND sink = ?
+            """,
+            (next_attempt_at, error, event_id, sink),
         )
-        self._conn.commit()
-        self.set_state("last_alert_at", now)
+        self._commit()
 
     def recent_follow_events(self, limit: int = 5) -> list[dict[str, Any]]:
         rows = self._conn.execute(
             """
-            SELECT target_user_id, target_username, target_display_name,
-                   followed_user_id, followed_username, followed_display_name,
-                   observed_at, notified_at
-            FROM follow_events
-            ORDER BY observed_at DESC
+            SELECT e.target_user_id,
+                   t.username AS target_username,
+                   COALESCE(t.label, t.display_name, t.username, e.target_user_id) AS target_display_name,
+                   e.followed_user_id,
+                   u.username AS followed_username,
+                   u.display_name AS followed_display_name,
+                   u.bio AS followed_bio,
+                   u.profile_image_url AS followed_profile_image_url,
+                   e.observed_at,
+                   e.notified_at
+            FROM follow_events AS e
+            LEFT JOIN targets AS t ON t.user_id = e.target_user_id
+            LEFT JOIN twitter_users AS u ON u.user_id = e.followed_user_id
+            ORDER BY e.observed_at DESC
             LIMIT ?
             """,
             (limit,),
         ).fetchall()
         return [dict(row) for row in rows]
 
+    def follow_events_before(self, cutoff: str, limit: int) -> list[dict[str, Any]]:
+        rows = self._conn.execute(
+            """
+            SELECT e.id, e.target_user_id, t.username AS target_username,
+                   e.followed_user_id,
+                   u.username AS followed_username,
+                   u.display_name AS followed_display_name,
+                   u.bio AS followed_bio,
+                   u.profile_image_url AS followed_profile_image_url,
+                   e.observed_at, e.notified_at
+            FROM follow_events AS e
+            LEFT JOIN targets AS t ON t.user_id = e.target_user_id
+            LEFT JOIN twitter_users AS u ON u.user_id = e.followed_user_id
+            WHERE e.observed_at < ? AND NOT EXISTS (
+                SELECT 1 FROM alert_deliveries AS d WHERE d.event_id = e.id AND d.next_attempt_at IS NOT NULL
+            )
+            ORDER BY e.observed_at, e.id
+            LIMIT ?
+            """,
+            (cutoff, limit),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def admin_actions_before(self, cutoff: str, limit: int) -> list[dict[str, Any]]:
+        rows = self._conn.execute(
+            """
+            SELECT id, actor_id, actor_name, action, details_json, created_at
+            FROM admin_actions
+            WHERE created_at < ?
+            ORDER BY created_at, id
+            LIMIT ?
+            """,
+            (cutoff, limit),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def delete_follow_events(self, event_ids: list[int]) -> None:
+        """Delete archived events but keep their (target, followed) pair for deduplication."""
+        with self.transaction():
+            params = [(event_id,) for event_id in event_ids]
+            self._conn.executemany(
+                """
+                INSERT OR IGNORE INTO archived_follows (target_user_id, followed_user_id, observed_at)
+                SELECT target_user_id, followed_user_id, observed_at FROM follow_events WHERE id = ?
+                """,
+                params,
+            )
+            self._conn.executemany("DELETE FROM alert_deliveries WHERE event_id = ?", params)
+            self._conn.executemany("DELETE FROM follow_events WHERE id = ?", params)
+
+    def delete_admin_actions(self, action_ids: list[int]) -> None:
+        self._conn.executemany("DELETE FROM admin_actions WHERE id = ?", [(action_id,) for action_id in action_ids])
+        self._commit()
+
+    def checkpoint_wal(self, mode: str = "PASSIVE") -> tuple[int, int, int]:
+        if mode not in {"PASSIVE", "FULL", "RESTART", "TRUNCATE"}:
+            raise ValueError(f"Unknown WAL checkpoint mode `{mode}`.")
+        self.flush_state()
+        busy, log_frames, checkpointed = self._conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+        return int(busy), int(log_frames), int(checkpointed)
+
+    def incremental_vacuum(self, pages: int) -> int:
+        """Return up to ``pages`` free pages to the OS; a no-op unless auto_vacuum is INCREMENTAL."""
+        before = int(self._conn.execute("PRAGMA freelist_count").fetchone()[0])
+        self._conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+        return before - int(self._conn.execute("PRAGMA freelist_count").fetchone()[0])
+
+    def vacuum(self) -> None:
+        self.flush_state()
+        self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._conn.execute("VACUUM")
+
     def set_target_poll_success(
         self,
         user_id: str,
         last_seen_followed_user_id: str | None,
         username: str | None = None,
         display_name: str | None = None,
+        next_due_at: int | None = None,
+        following_count: int | None = None,
+        scanned_at: int | None = None,
+        sync_ms: float | None = None,
     ) -> None:
         now = utcnow_iso()
         self._conn.execute(
-            """
+            f"""
             UPDATE targets
             SET last_seen_followed_user_id = COALESCE(?, last_seen_followed_user_id),
                 last_polled_at = ?,
@@ -261,25 +610,49 @@ class AppDatabase:
                 last_error = NULL,
                 username = COALESCE(?, username),
                 display_name = COALESCE(?, display_name),
+                next_due_at = COALESCE(?, next_due_at),
+                following_count = COALESCE(?, following_count),
+                last_scanned_at = COALESCE(?, last_scanned_at),
+                avg_sync_ms = CASE
+                    WHEN ? IS NULL THEN avg_sync_ms
+                    WHEN avg_sync_ms IS NULL THEN ?
+                    ELSE avg_sync_ms + (? - avg_sync_ms) * {SYNC_LATENCY_SMOOTHING}
+                END,
+                last_sync_ms = COALESCE(?, last_sync_ms),
                 updated_at = ?
             WHERE user_id = ?
             """,
-            (last_seen_followed_user_id, now, now, username, display_name, now, user_id),
+            (
+                last_seen_followed_user_id,
+                now,
+                now,
+                username,
+                display_name,
+                next_due_at,
+                following_count,
+                scanned_at,
+                sync_ms,
+                sync_ms,
+                sync_ms,
+                sync_ms,
+                now,
+                user_id,
+            ),
         )
-        self._conn.commit()
+        self._commit()
 
-    def set_target_poll_failure(self, user_id: str, error: str) -> None:
+    def set_target_poll_failure(self, user_id: str, error: str, next_due_at: int | None = None) -> None:
         now = utcnow_iso()
-        self._conn.execute(
-            """
-            UPDATE targets
-            SET last_polled_at = ?, last_error = ?, updated_at = ?
-            WHERE user_id = ?
-            """,
-            (now, error, now, user_id),
-        )
-        self._conn.commit()
-        self.set_state("last_runtime_error", error)
+        with self.transaction():
+            self._conn.execute(
+                """
+                UPDATE targets
+                SET last_polled_at = ?, last_error = ?, next_due_at = COALESCE(?, next_due_at), updated_at = ?
+                WHERE user_id = ?
+                """,
+                (now, error, next_due_at, now, user_id),
+            )
+            self.set_state("last_runtime_error", error)
 
     def set_target_last_seen(self, user_id: str, last_seen_followed_user_id: str | None) -> None:
         now = utcnow_iso()
@@ -291,29 +664,101 @@ class AppDatabase:
             """,
             (last_seen_followed_user_id, now, user_id),
         )
-        self._conn.commit()
+        self._commit()
 
-    def set_state(self, key: str, value: Any) -> None:
-        now = utcnow_iso()
+    def set_state(self, key: str, value: Any, deferred: bool = False) -> None:
+        """Write-through update of a monitor_state key.
+
+        ``deferred`` skips the commit for high-frequency keys: the value is cached at once
+        and persisted with the next commit, by flush_state(), or after STATE_FLUSH_INTERVAL_SECONDS.
+        """
         payload = json.dumps(value)
+        with self._state_lock:
+            if not self.read_only:
+                self._state_cache[key] = json.loads(payload)
+            if deferred:
+                self._pending_state[key] = (payload, utcnow_iso())
+                if self._pending_since is None:
+                    self._pending_since = time.monotonic()
+                    return
+                if time.monotonic() - self._pending_since < STATE_FLUSH_INTERVAL_SECONDS:
+                    return
+            else:
+                self._pending_state.pop(key, None)
+        if deferred:
+            self._commit()
+            return
         self._conn.execute(
             """
             INSERT INTO monitor_state (key, value, updated_at)
             VALUES (?, ?, ?)
             ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
             """,
-            (key, payload, now),
+            (key, payload, utcnow_iso()),
         )
-        self._conn.commit()
+        self._commit()
 
     def get_state(self, key: str, default: Any = None) -> Any:
+        found, value = self.peek_state(key, default)
+        if found:
+            return value
+        return self.load_state(key, default)
+
+    def peek_state(self, key: str, default: Any = None) -> tuple[bool, Any]:
+        """Look ``key`` up in the state cache only, counting the hit or miss. Safe from any thread."""
+        with self._state_lock:
+            if key in self._state_cache:
+                self.state_cache_hits += 1
+                value = self._state_cache[key]
+                return True, default if value is _MISSING else value
+            self.state_cache_misses += 1
+        return False, default
+
+    def load_state(self, key: str, default: Any = None) -> Any:
+        """Read ``key`` from the database and refresh its cache entry."""
         row = self._conn.execute(
             "SELECT value FROM monitor_state WHERE key = ?",
             (key,),
         ).fetchone()
-        if row is None:
-            return default
-        return json.loads(row["value"])
+        value = _MISSING if row is None else json.loads(row["value"])
+        if not self.read_only:
+            with self._state_lock:
+                self._state_cache[key] = value
+        return default if value is _MISSING else value
+
+    def flush_state(self) -> None:
+        if self._pending_state:
+            self._commit()
+
+    def invalidate_state_cache(self) -> None:
+        with self._state_lock:
+            self._state_cache.clear()
+
+    def state_cache_stats(self) -> dict[str, int]:
+        with self._state_lock:
+            return {
+                "hits": self.state_cache_hits,
+                "misses": self.state_cache_misses,
+                "cached_keys": len(self._state_cache),
+                "pending_writes": len(self._pending_state),
+            }
+
+    def _write_pending_state(self) -> None:
+        with self._state_lock:
+            pending = list(self._pending_state.items())
+        if not pending:
+            return
+        self._conn.executemany(
+            """
+            INSERT INTO monitor_state (key, value, updated_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+            """,
+            [(key, payload, updated_at) for key, (payload, updated_at) in pending],
+        )
+        with self._state_lock:
+            self._pending_state.clear()
+            self._pending_since = None
 
     def set_paused(self, paused: bool) -> None:
         self.set_state("paused", paused)
@@ -341,7 +786,7 @@ class AppDatabase:
                 utcnow_iso(),
             ),
         )
-        self._conn.commit()
+        self._commit()
 
     def upsert_worker_health(self, account: dict[str, Any]) -> None:
         now = utcnow_iso()
@@ -354,6 +799,8 @@ class AppDatabase:
         ).fetchone()
         previous_failures = int(previous["consecutive_failures"]) if previous else 0
         consecutive_failures = 0 if active and not last_error else previous_failures + 1
+        # twscrape does not report our cooldowns, so one set by set_worker_cooldown is kept until it
+        # expires and then cleared; both timestamps come from utcnow_iso() and compare as text.
         self._conn.execute(
             """
             INSERT INTO worker_health (
@@ -368,7 +815,11 @@ class AppDatabase:
                 last_success_at = excluded.last_success_at,
                 last_failure_at = excluded.last_failure_at,
                 consecutive_failures = excluded.consecutive_failures,
-                cooldown_until = excluded.cooldown_until,
+                cooldown_until = CASE
+                    WHEN excluded.cooldown_until IS NOT NULL THEN excluded.cooldown_until
+                    WHEN worker_health.cooldown_until > excluded.last_checked_at THEN worker_health.cooldown_until
+                    ELSE NULL
+                END,
                 last_error = excluded.last_error,
                 details_json = excluded.details_json
             """,
@@ -386,7 +837,104 @@ class AppDatabase:
                 json.dumps(account, default=str),
             ),
         )
-        self._conn.commit()
+        self._commit()
+
+    def set_worker_cooldown(
+        self,
+        username: str,
+        cooldown_until: str | None,
+        consecutive_failures: int,
+        last_error: str | None,
+    ) -> None:
+        now = utcnow_iso()
+        self._conn.execute(
+            """
+            UPDATE worker_health
+            SET cooldown_until = ?,
+                consecutive_failures = ?,
+                last_error = ?,
+                last_failure_at = ?,
+                is_healthy = 0
+            WHERE username = ?
+            """,
+            (cooldown_until, consecutive_failures, last_error, now, username),
+        )
+        self._commit()
+
+    def claim_target_lease(self, user_id: str, owner_id: str, expires_at: int, now: int) -> bool:
+        # One statement so two processes racing for the same target cannot both win.
+        cur = self._conn.execute(
+            """
+            INSERT INTO target_leases (user_id, owner_id, acquired_at, expires_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET
+                owner_id = excluded.owner_id,
+                acquired_at = excluded.acquired_at,
+                expires_at = excluded.expires_at
+            WHERE target_leases.owner_id = excluded.owner_id OR target_leases.expires_at <= ?
+            """,
+            (user_id, owner_id, utcnow_iso(), expires_at, now),
+        )
+        self._commit()
+        return cur.rowcount > 0
+
+    def release_target_lease(self, user_id: str, owner_id: str) -> None:
+        self._conn.execute(
+            "DELETE FROM target_leases WHERE user_id = ? AND owner_id = ?",
+            (user_id, owner_id),
+        )
+        self._commit()
+
+    def upsert_shard_member(self, owner_id: str, hostname: str | None, pid: int | None, expires_at: int) -> None:
+        now = utcnow_iso()
+        self._conn.execute(
+            """
+            INSERT INTO shard_members (owner_id, hostname, pid, joined_at, heartbeat_at, expires_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(owner_id) DO UPDATE SET
+                hostname = excluded.hostname,
+                pid = excluded.pid,
+                heartbeat_at = excluded.heartbeat_at,
+                expires_at = excluded.expires_at
+            """,
+            (owner_id, hostname, pid, now, now, expires_at),
+        )
+        self._commit()
+
+    def renew_shard(self, owner_id: str, expires_at: int) -> None:
+        now = utcnow_iso()
+        self._conn.execute(
+            "UPDATE shard_members SET heartbeat_at = ?, expires_at = ? WHERE owner_id = ?",
+            (now, expires_at, owner_id),
+        )
+        self._conn.execute(
+            "UPDATE target_leases SET expires_at = ? WHERE owner_id = ?",
+            (expires_at, owner_id),
+        )
+        self._commit()
+
+    def prune_expired_shard_state(self, now: int) -> None:
+        self._conn.execute("DELETE FROM target_leases WHERE expires_at <= ?", (now,))
+        self._conn.execute("DELETE FROM shard_members WHERE expires_at <= ?", (now,))
+        self._commit()
+
+    def remove_shard_member(self, owner_id: str) -> None:
+        self._conn.execute("DELETE FROM target_leases WHERE owner_id = ?", (owner_id,))
+        self._conn.execute("DELETE FROM shard_members WHERE owner_id = ?", (owner_id,))
+        self._commit()
+
+    def list_shard_members(self) -> list[dict[str, Any]]:
+        rows = self._conn.execute(
+            """
+            SELECT m.owner_id, m.hostname, m.pid, m.joined_at, m.heartbeat_at, m.expires_at,
+                   COUNT(l.user_id) AS leased_targets
+            FROM shard_members AS m
+            LEFT JOIN target_leases AS l ON l.owner_id = m.owner_id
+            GROUP BY m.owner_id
+            ORDER BY m.owner_id
+            """
+        ).fetchall()
+        return [dict(row) for row in rows]
 
     def list_worker_health(self) -> list[WorkerHealthRecord]:
         rows = self._conn.execute(
@@ -441,6 +989,19 @@ class AppDatabase:
             recent_events=self.recent_follow_events(),
         )
 
+    def slowest_targets(self, limit: int = 5) -> list[dict[str, Any]]:
+        rows = self._conn.execute(
+            """
+            SELECT user_id, username, display_name, label, last_sync_ms, avg_sync_ms
+            FROM targets
+            WHERE active = 1 AND avg_sync_ms IS NOT NULL
+            ORDER BY avg_sync_ms DESC
+            LIMIT ?
+            """,
+            (limit,),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
     def export_status(self) -> dict[str, Any]:
         return {
             "targets": [asdict(target) for target in self.list_targets()],
@@ -464,4 +1025,9 @@ class AppDatabase:
             last_error=row["last_error"],
             created_at=row["created_at"],
             updated_at=row["updated_at"],
+            next_due_at=row["next_due_at"],
+            following_count=row["following_count"],
+            last_scanned_at=row["last_scanned_at"],
+            last_sync_ms=row["last_sync_ms"],
+            avg_sync_ms=row["avg_sync_ms"],
         )
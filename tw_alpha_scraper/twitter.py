@@ -2,18 +2,65 @@ from __future__ import annotations
 
 import json
 import re
-from typing import Any
+from contextlib import contextmanager
+from typing import Any, Iterator
 
 from .models import ResolvedUser
 
+# twscrape renamed its username lookup across releases; they are tried in this order.
+USERNAME_LOOKUP_METHODS = ("user_by_login", "user_by_username", "user_by_screen_name")
+
+# A bare "429" is not enough: user IDs and request URLs are full of it.
+RATE_LIMIT_MESSAGE = re.compile(
+    r"too many requests|rate[ _-]?limit|\b(?:http|status(?: code)?|code)[ :=]*429\b",
+    re.IGNORECASE,
+)
+
 
 class TwitterClientError(RuntimeError):
     """Raised when the Twitter client cannot complete a request."""
 
 
+class TwitterRateLimitError(TwitterClientError):
+    """Raised when Twitter refused a request with a 429; the worker should cool down."""
+
+
+def _status_code(exc: BaseException) -> int | None:
+    for source in (exc, getattr(exc, "response", None)):
+        for name in ("status_code", "status"):
+            value = getattr(source, name, None)
+            if isinstance(value, int):
+                return value
+    return None
+
+
+def looks_rate_limited(exc: BaseException) -> bool:
+    """Whether ``exc`` itself reports a 429, by its status code or, failing that, its message."""
+    status = _status_code(exc)
+    if status is not None:
+        return status == 429
+    return RATE_LIMIT_MESSAGE.search(str(exc)) is not None
+
+
+@contextmanager
+def _rate_limits_raised(operation: str) -> Iterator[None]:
+    # twscrape and httpx report 429s in several shapes; callers only need to catch one type.
+    try:
+        yield
+    except TwitterClientError:
+        raise
+    except Exception as exc:
+        if looks_rate_limited(exc):
+            raise TwitterRateLimitError(f"Twitter rate limited {operation}: {exc}") from exc
+        raise
+
+
 class TwitterClient:
-    def __init__(self) -> None:
+    def __init__(self, keep_raw: bool = False) -> None:
+        # Raw twscrape models carry the whole GraphQL payload; only keep them when debugging.
+        self.keep_raw = keep_raw
         self._api: Any | None = None
+        self._username_method: str | None = None
 
     def _ensure_api(self) -> Any:
         if self._api is not None:
@@ -64,32 +111,52 @@ class TwitterClient:
     async def resolve_user(self, identifier: str) -> ResolvedUser:
         api = self._ensure_api()
         if identifier.isdigit():
-            raw_user = await api.user_by_id(int(identifier))
+            with _rate_limits_raised(f"the lookup of user {identifier}"):
+                raw_user = await api.user_by_id(int(identifier))
             if not raw_user:
                 raise TwitterClientError(f"Twitter user `{identifier}` was not found.")
-            return self._to_user(raw_user)
+            return self._to_user(raw_user, self.keep_raw)
 
         username = identifier.lstrip("@")
-        for method_name in ("user_by_login", "user_by_username", "user_by_screen_name"):
-            method = getattr(api, method_name, None)
+        # The method that last found a user goes first; the others are still tried when it returns None.
+        names = USERNAME_LOOKUP_METHODS
+        if self._username_method is not None:
+            names = (self._username_method, *(name for name in names if name != self._username_method))
+        supported = False
+        for name in names:
+            method = getattr(api, name, None)
             if method is None:
                 continue
-            raw_user = await method(username)
+            supported = True
+            with _rate_limits_raised(f"the lookup of @{username}"):
+                raw_user = await method(username)
             if raw_user:
-                return self._to_user(raw_user)
+                self._username_method = name
+                return self._to_user(raw_user, self.keep_raw)
+        if not supported:
+            raise TwitterClientError(
+                "The current twscrape version cannot resolve usernames directly. Use numeric user_id instead."
+            )
+        raise TwitterClientError(f"Twitter user `{identifier}` was not found.")
 
-        raise TwitterClientError(
-            "The current twscrape version cannot resolve usernames directly. Use numeric user_id instead."
-        )
+    async def following_count(self, user_id: str) -> int | None:
+        """One profile lookup instead of a following page walk; None when twscrape omits the count."""
+        api = self._ensure_api()
+        with _rate_limits_raised(f"the profile probe of user {user_id}"):
+            raw_user = await api.user_by_id(int(user_id))
+        if not raw_user:
+            raise TwitterClientError(f"Twitter user `{user_id}` was not found.")
+        return getattr(raw_user, "friendsCount", None)
 
     async def iter_following(self, user_id: str, limit: int | None = None):
         api = self._ensure_api()
         count = 0
-        async for raw_user in api.following(int(user_id)):
-            yield self._to_user(raw_user)
-            count += 1
-            if limit is not None and count >= limit:
-                break
+        with _rate_limits_raised(f"the following scan of user {user_id}"):
+            async for raw_user in api.following(int(user_id)):
+                yield self._to_user(raw_user, self.keep_raw)
+                count += 1
+                if limit is not None and count >= limit:
+                    break
 
     async def list_accounts(self) -> list[dict[str, Any]]:
         api = self._ensure_api()
@@ -142,12 +209,13 @@ class TwitterClient:
         await api.pool.login_all()
 
     @staticmethod
-    def _to_user(raw_user: Any) -> ResolvedUser:
+    def _to_user(raw_user: Any, keep_raw: bool = False) -> ResolvedUser:
         return ResolvedUser(
             id=str(getattr(raw_user, "id", "")),
             username=getattr(raw_user, "username", None),
             display_name=getattr(raw_user, "name", None),
             description=getattr(raw_user, "description", None),
             profile_image_url=getattr(raw_user, "profile_image_url", None),
-            raw=raw_user,
+            following_count=getattr(raw_user, "friendsCount", None),
+            raw=raw_user if keep_raw else None,
         )
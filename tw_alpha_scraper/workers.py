@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterable
+
+from .models import WorkerHealthRecord
+from .twitter import TwitterRateLimitError, looks_rate_limited
+
+# twscrape requests the following timeline in pages of this many users.
+FOLLOWING_PAGE_SIZE = 20
+
+
+def is_rate_limit_error(exc: BaseException) -> bool:
+    """Classify the underlying error, never the wrapper that names the operation and target.
+
+    A TwitterRateLimitError anywhere in the chain counts, since TwitterClient raises it from the
+    twscrape error it classified.
+    """
+    while exc.__cause__ is not None:
+        if isinstance(exc, TwitterRateLimitError):
+            return True
+        exc = exc.__cause__
+    return isinstance(exc, TwitterRateLimitError) or looks_rate_limited(exc)
+
+
+def estimate_following_requests(fetched_count: int) -> int:
+    return max(1, math.ceil(fetched_count / FOLLOWING_PAGE_SIZE))
+
+
+@dataclass(slots=True)
+class WorkerBudget:
+    username: str
+    active: bool
+    remaining: int
+    window_started_at: float
+    cooldown_until: float | None = None
+    consecutive_failures: int = 0
+    last_error: str | None = None
+    in_flight: int = 0
+
+
+@dataclass(slots=True)
+class WorkerLease:
+    username: str | None
+
+
+class WorkerBudgetManager:
+    """Tracks a request budget and cooldown per twscrape account.
+
+    twscrape rotates accounts internally, so a lease charges the account with the
+    most budget left; the totals still bound how hard the pool as a whole is used.
+    """
+
+    def __init__(
+        self,
+        requests_per_window: int,
+        window_seconds: int,
+        cooldown_seconds: int,
+        failure_threshold: int,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.requests_per_window = requests_per_window
+        self.window_seconds = window_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self.failure_threshold = failure_threshold
+        self.deferred_count = 0
+        self._clock = clock
+        self._budgets: dict[str, WorkerBudget] = {}
+
+    @property
+    def managed(self) -> bool:
+        return bool(self._budgets)
+
+    def sync_accounts(
+        self,
+        accounts: Iterable[dict[str, Any]],
+        persisted: Iterable[WorkerHealthRecord] = (),
+    ) -> None:
+        now = self._clock()
+        persisted_by_name = {record.username: record for record in persisted}
+        seen: set[str] = set()
+        for account in accounts:
+            username = str(account.get("username", "unknown"))
+            seen.add(username)
+            budget = self._budgets.get(username)
+            if budget is None:
+                budget = WorkerBudget(
+                    username=username,
+                    active=False,
+                    remaining=self.requests_per_window,
+                    window_started_at=now,
+                )
+                record = persisted_by_name.get(username)
+                if record is not None and record.cooldown_until:
+                    budget.cooldown_until = _parse_epoch(record.cooldown_until)
+                self._budgets[username] = budget
+            budget.active = bool(account.get("active", False))
+        for username in set(self._budgets) - seen:
+            del self._budgets[username]
+
+    def acquire(self) -> WorkerLease | None:
+        if not self._budgets:
+            return WorkerLease(username=None)
+        now = self._clock()
+        best: WorkerBudget | None = None
+        for budget in self._budgets.values():
+            self._refresh(budget, now)
+            if not self._available(budget, now):
+                continue
+            if best is None or budget.remaining > best.remaining:
+                best = budget
+        if best is None:
+            self.deferred_count += 1
+            return None
+        best.remaining -= 1
+        best.in_flight += 1
+        return WorkerLease(username=best.username)
+
+    def release(self, lease: WorkerLease, *, requests_used: int = 1, error: BaseException | None = None) -> bool:
+        """Settle a lease. Returns True when the account was put into cooldown."""
+        budget = self._budgets.get(lease.username) if lease.username else None
+        if budget is None:
+            return False
+        budget.in_flight = max(0, budget.in_flight - 1)
+        budget.remaining = max(0, budget.remaining - max(0, requests_used - 1))
+        if error is None:
+            budget.consecutive_failures = 0
+            budget.last_error = None
+            return False
+
+        budget.consecutive_failures += 1
+        budget.last_error = str(error)
+        if is_rate_limit_error(error) or budget.consecutive_failures >= self.failure_threshold:
+            budget.cooldown_until = self._clock() + self.cooldown_seconds
+            budget.remaining = 0
+            return True
+        return False
+
+    def budget(self, username: str) -> WorkerBudget | None:
+        return self._budgets.get(username)
+
+    def next_available_at(self) -> float | None:
+        candidates: list[float] = []
+        for budget in self._budgets.values():
+            if not budget.active:
+                continue
+            ready_at = budget.window_started_at + self.window_seconds if budget.remaining <= 0 else 0.0
+            if budget.cooldown_until is not None:
+                ready_at = max(ready_at, budget.cooldown_until)
+            candidates.append(ready_at)
+        return min(candidates) if candidates else None
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        now = self._clock()
+        rows: list[dict[str, Any]] = []
+        for budget in sorted(self._budgets.values(), key=lambda item: item.username):
+            self._refresh(budget, now)
+            rows.append(
+                {
+                    "username": budget.username,
+                    "active": budget.active,
+                    "available": self._available(budget, now),
+                    "remaining_requests": budget.remaining,
+                    "window_resets_at": _format_epoch(budget.window_started_at + self.window_seconds),
+                    "cooldown_until": _format_epoch(budget.cooldown_until),
+                    "consecutive_failures": budget.consecutive_failures,
+                    "in_flight": budget.in_flight,
+                    "last_error": budget.last_error,
+                }
+            )
+        return rows
+
+    def _refresh(self, budget: WorkerBudget, now: float) -> None:
+        if now - budget.window_started_at >= self.window_seconds:
+            budget.window_started_at = now
+            budget.remaining = self.requests_per_window
+        if budget.cooldown_until is not None and budget.cooldown_until <= now:
+            budget.cooldown_until = None
+            budget.consecutive_failures = 0
+            budget.remaining = self.requests_per_window
+            budget.window_started_at = now
+
+    @staticmethod
+    def _available(budget: WorkerBudget, now: float) -> bool:
+        if not budget.active or budget.remaining <= 0:
+            return False
+        return budget.cooldown_until is None or budget.cooldown_until <= now
+
+
+def _parse_epoch(value: str) -> float | None:
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
+
+
+def _format_epoch(value: float | None) -> str | None:
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value, timezone.utc).replace(microsecond=0).isoformat()